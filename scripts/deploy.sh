@@ -88,7 +88,7 @@ build_and_push_images() {
     # Build and push each service
     for service in producer inference consumer; do
         log_info "Building $service..."
-        docker build -t $ECR_REGISTRY/video-pipeline/$service:latest services/$service/
+        docker build -t $ECR_REGISTRY/video-pipeline/$service:latest --build-context common=services/common services/$service/
         
         log_info "Pushing $service..."
         docker push $ECR_REGISTRY/video-pipeline/$service:latest
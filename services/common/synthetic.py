@@ -0,0 +1,33 @@
+"""
+Synthetic camera-like frames for the service benchmarks.
+
+Shared by the producer, inference and consumer benchmarks; images that ship
+a benchmark copy this module from the "common" build context.
+"""
+
+import cv2
+import numpy as np
+
+
+def synthetic_frame(width: int, height: int, seed: int = 0) -> np.ndarray:
+    """A noisy gradient frame with filled rectangles, roughly as hard to encode as a camera frame."""
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    blue = np.broadcast_to(x, (height, width))
+    green = np.broadcast_to(y, (height, width))
+    frame = np.ascontiguousarray(np.stack([blue, green, (blue + green) / 2], axis=2).astype(np.uint8))
+
+    for _ in range(20):
+        x1, y1 = int(rng.integers(0, width - width // 10)), int(rng.integers(0, height - height // 10))
+        x2, y2 = x1 + int(rng.integers(width // 30, width // 6)), y1 + int(rng.integers(height // 30, height // 4))
+        color = tuple(int(c) for c in rng.integers(0, 255, 3))
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, -1)
+    noise = rng.normal(0, 6, frame.shape).astype(np.int16)
+    return np.clip(frame.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+def synthetic_jpeg(width: int, height: int, quality: int, seed: int = 0) -> bytes:
+    """synthetic_frame encoded as JPEG."""
+    _, buffer = cv2.imencode(".jpg", synthetic_frame(width, height, seed), [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buffer.tobytes()
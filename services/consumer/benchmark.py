@@ -0,0 +1,96 @@
+"""
+Consumer Benchmarks: Offline throughput of the consumer's post-processing.
+
+Runs on synthetic frames and detections, so no Kafka, inference service or S3
+is needed.
+
+Usage:
+    python benchmark.py annotate
+    python benchmark.py annotate --workers 1 2 4 --frames 200 --detections 15
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+# services/common in a checkout; the image copies synthetic.py next to this file
+sys.path.append(str(Path(__file__).resolve().parent.parent / "common"))
+
+from consumer import DetectionArrays, SharedMemoryAnnotator, annotate_frame, settings
+from synthetic import synthetic_jpeg
+
+
+def synthetic_detections(width: int, height: int, count: int, seed: int = 0) -> DetectionArrays:
+    """Random boxes over a handful of classes."""
+    rng = np.random.default_rng(seed)
+    top_left = rng.uniform([0, 0], [width - 200, height - 200], (count, 2))
+    sizes = rng.uniform(40, 200, (count, 2))
+    class_ids = rng.integers(0, 5, count).astype(np.int32)
+    return DetectionArrays(
+        boxes=np.hstack([top_left, top_left + sizes]).astype(np.float32),
+        confidences=rng.uniform(0.5, 1.0, count).astype(np.float32),
+        class_ids=class_ids,
+        class_names={class_id: f"class_{class_id}" for class_id in range(5)},
+    )
+
+
+def frames_per_second(annotate, workers: int, frames: List[bytes], detections: DetectionArrays) -> float:
+    """Annotate all frames from `workers` threads (like the annotate stage) and return frames/s."""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Warm up (process start, slot allocation) outside the timed region
+        list(pool.map(lambda frame: annotate(frame, detections), frames[:workers * 2]))
+        start_time = time.perf_counter()
+        list(pool.map(lambda frame: annotate(frame, detections), frames))
+        return len(frames) / (time.perf_counter() - start_time)
+
+
+def bench_annotate(args):
+    """Throughput of the thread vs shared-memory process annotate backends."""
+    frames = [synthetic_jpeg(args.width, args.height, args.quality, seed) for seed in range(8)]
+    frames = (frames * (args.frames // len(frames) + 1))[:args.frames]
+    detections = synthetic_detections(args.width, args.height, args.detections)
+
+    print(f"{args.width}x{args.height}, {len(frames[0]) / 1024:.0f} KB/frame, {args.detections} detections/frame")
+    print(f"{'workers':<9}{'thread fps':>12}{'process fps':>13}{'speedup':>9}")
+    for workers in args.workers:
+        thread_fps = frames_per_second(annotate_frame, workers, frames, detections)
+
+        annotator = SharedMemoryAnnotator(workers)
+        try:
+            process_fps = frames_per_second(annotator.annotate, workers, frames, detections)
+        finally:
+            annotator.shutdown()
+
+        print(f"{workers:<9}{thread_fps:>12.1f}{process_fps:>13.1f}{process_fps / thread_fps:>8.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consumer benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    annotate = subparsers.add_parser("annotate", help="Thread vs process annotate backend throughput")
+    annotate.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=[1, settings.annotate_workers],
+        help="Annotate worker counts to compare",
+    )
+    annotate.add_argument("--frames", type=int, default=200, help="Frames per measurement")
+    annotate.add_argument("--width", type=int, default=1280, help="Frame width")
+    annotate.add_argument("--height", type=int, default=720, help="Frame height")
+    annotate.add_argument("--quality", type=int, default=85, help="JPEG quality of the synthetic frames")
+    annotate.add_argument("--detections", type=int, default=10, help="Boxes drawn per frame")
+    annotate.set_defaults(func=bench_annotate)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,22 +4,51 @@ draws bounding boxes, and uploads to topic-specific S3 buckets.
 
 Supports dual-stream PARALLEL processing with separate S3 bucket routing per topic.
 
+Batches flow through explicit stages connected by bounded queues:
+infer (threads, HTTP) -> annotate (decode + draw + encode) -> upload (threads, S3).
+Each stage has its own worker count and exports its queue depth and service time,
+so the bottleneck stage can be scaled on its own. Annotation runs in the stage
+threads by default, or in a process pool fed through shared memory
+(ANNOTATE_BACKEND=process) on hosts with cores to spare.
+
+Frames published to several topics (the producer sends every frame to each
+topic) are inferred once: later copies are deduplicated by stream_id +
+frame_number + timestamp (or content hash) and the annotated result is copied
+server-side into each copy's bucket.
+
+CONSUMER_MODE=asyncio swaps the threaded stages for a single event loop (async
+HTTP to the inference service, async S3 PUTs, Kafka poll bridged from a thread).
+
+Accepts both frame wire formats published by the producer: the legacy JSON
+envelope and the binary envelope (raw JPEG value + metadata headers), so
+producers can be switched over one at a time.
+
+Frames the producer downscaled before sending carry scale_x/scale_y; when a
+full-resolution copy was stored in S3 (full_res_key), detections are scaled
+up and drawn on that copy instead (RENDER_FULL_RESOLUTION).
+
 Usage:
     python consumer.py
 """
 
+import asyncio
 import base64
-import io
+import hashlib
 import json
 import logging
+import multiprocessing
 import os
 import signal
 import sys
 import time
-from concurrent.futures import ThreadPoolExecutor, Future, as_completed
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, Future
+from contextlib import contextmanager
 from datetime import datetime
-from threading import Lock
-from typing import Dict, List, Optional
+from multiprocessing import shared_memory
+from queue import Queue
+from threading import Lock, Thread
+from typing import Any, Callable, Deque, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
 
 import boto3
 import cv2
@@ -27,8 +56,8 @@ import httpx
 import numpy as np
 import structlog
 from botocore.config import Config as BotoConfig
-from confluent_kafka import Consumer, KafkaError, KafkaException
-from PIL import Image, ImageDraw, ImageFont
+from confluent_kafka import Consumer, KafkaError, KafkaException, TopicPartition
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
 from pydantic import BaseModel
 from pydantic_settings import BaseSettings
 from tenacity import retry, stop_after_attempt, wait_exponential
@@ -88,6 +117,66 @@ def parse_topic_bucket_mapping(mapping_str: str, topics: List[str], default_buck
     return mapping
 
 
+# Binary envelope header and the versions this consumer understands
+FRAME_FORMAT_HEADER = "frame-format"
+SUPPORTED_BINARY_FORMATS = {"jpeg-v1"}
+
+# Optional binary envelope headers (set by producers that resize frames)
+OPTIONAL_FRAME_HEADERS = {
+    "original-width": ("original_width", int),
+    "original-height": ("original_height", int),
+    "scale-x": ("scale_x", float),
+    "scale-y": ("scale_y", float),
+    "full-res-bucket": ("full_res_bucket", str),
+    "full-res-key": ("full_res_key", str),
+}
+
+
+def parse_frame_message(value: bytes, headers: Optional[List[tuple]]) -> dict:
+    """
+    Parse a Kafka message into a frame dict with raw JPEG bytes in "frame_bytes".
+    
+    Messages carrying a "frame-format" header use the binary envelope; anything
+    else is treated as the legacy JSON envelope with base64 "frame_data".
+    Raises ValueError for malformed messages or unknown envelope versions.
+    """
+    header_map = {}
+    for key, header_value in headers or []:
+        if header_value is not None:
+            header_map[key] = header_value.decode("utf-8")
+    
+    frame_format = header_map.get(FRAME_FORMAT_HEADER)
+    if frame_format is None:
+        try:
+            frame_msg = json.loads(value.decode("utf-8"))
+            frame_msg["frame_bytes"] = base64.b64decode(frame_msg.pop("frame_data"))
+            # Required downstream (batching, dedup keys, S3 keys)
+            frame_msg["stream_id"] = str(frame_msg["stream_id"])
+            frame_msg["frame_number"] = int(frame_msg["frame_number"])
+        except (json.JSONDecodeError, UnicodeDecodeError, KeyError, TypeError, AttributeError, ValueError) as e:
+            raise ValueError(f"Invalid JSON frame message: {e}")
+        return frame_msg
+    
+    if frame_format not in SUPPORTED_BINARY_FORMATS:
+        raise ValueError(f"Unsupported frame format: {frame_format}")
+    
+    try:
+        frame_msg = {
+            "stream_id": header_map["stream-id"],
+            "frame_number": int(header_map["frame-number"]),
+            "timestamp": header_map.get("timestamp"),
+            "width": int(header_map["width"]),
+            "height": int(header_map["height"]),
+            "frame_bytes": value,
+        }
+        for header, (field, cast) in OPTIONAL_FRAME_HEADERS.items():
+            if header in header_map:
+                frame_msg[field] = cast(header_map[header])
+    except (KeyError, ValueError) as e:
+        raise ValueError(f"Invalid binary frame headers: {e}")
+    return frame_msg
+
+
 # Settings
 class Settings(BaseSettings):
     # Kafka settings
@@ -99,18 +188,49 @@ class Settings(BaseSettings):
     # Inference settings
     inference_service_url: str = "http://inference-service:8000"
     inference_timeout: int = 30
+    inference_transport: str = "json"  # "json" (base64 /predict) or "raw" (multipart /predict/raw)
+    inference_response_format: str = "json"  # "json" (per-box objects) or "columnar" (packed arrays)
+    inference_max_connections: int = 100  # asyncio mode: httpx.AsyncClient connection pool size
     
     # S3 settings (defaults)
     s3_bucket: str = "video-pipeline-output"  # Default/fallback bucket
     s3_prefix: str = "annotated"
     aws_region: str = "us-east-1"
     
+    s3_upload_workers: int = 16  # Upload stage threads / concurrent async PUTs (also the S3 connection pool size)
+    
     # Topic to bucket mapping (JSON string)
     topic_bucket_mapping: str = ""
     
     # Processing settings
     batch_size: int = 25
     batch_timeout_seconds: float = 5.0
+    max_inflight_batches: int = 2  # Per topic; further frames pause the topic's partitions
+    async_max_inflight_batches: int = 0  # asyncio mode, per topic; 0 = enough to fill inference_max_connections
+    
+    consumer_mode: str = "threaded"  # "threaded" (stage pipeline) or "asyncio" (event loop, async HTTP + S3)
+    
+    # Pipeline stages (upload stage is sized by s3_upload_workers)
+    infer_stage_workers: int = 4  # Threads calling the inference service
+    annotate_backend: str = "thread"  # "thread" (stage threads) or "process" (shared-memory worker pool)
+    annotate_workers: int = 2  # Annotate workers: processes, or threads for the thread backend
+    pipeline_queue_size: int = 64  # Bound on each stage's input queue
+    
+    # Cross-topic deduplication (the producer publishes every frame to all topics)
+    dedup_enabled: bool = True
+    dedup_key: str = "frame"  # "frame" (stream_id + frame_number + timestamp) or "hash" (content hash of the JPEG)
+    dedup_ttl_seconds: float = 60.0  # How long a processed frame is remembered
+    dedup_max_entries: int = 10000
+    
+    # Frames resized by the producer: draw on the stored full-resolution copy when there is one
+    render_full_resolution: bool = True
+    
+    # Offset commit settings
+    commit_interval_seconds: float = 5.0  # Commit processed offsets at least this often
+    commit_max_pending: int = 100  # ...or as soon as this many processed frames are uncommitted
+    
+    # Metrics
+    metrics_port: int = 9100
     
     class Config:
         env_prefix = ""
@@ -144,6 +264,300 @@ class InferenceResponse(BaseModel):
     total_inference_time_ms: float
 
 
+class DetectionArrays:
+    """Per-frame detections decoded from a columnar inference response (no per-box objects)."""
+
+    __slots__ = ("boxes", "confidences", "class_ids", "class_names")
+
+    def __init__(
+        self,
+        boxes: np.ndarray,
+        confidences: np.ndarray,
+        class_ids: np.ndarray,
+        class_names: Dict[int, str],
+    ):
+        self.boxes = boxes
+        self.confidences = confidences
+        self.class_ids = class_ids
+        self.class_names = class_names
+
+    def __len__(self) -> int:
+        return len(self.confidences)
+
+
+class ColumnarFrameResult(NamedTuple):
+    frame_number: int
+    detections: DetectionArrays
+    inference_time_ms: float
+
+
+class ColumnarInferenceResponse(NamedTuple):
+    stream_id: str
+    results: List[ColumnarFrameResult]
+    total_frames: int
+    total_detections: int
+    total_inference_time_ms: float
+
+
+def decode_columnar_response(payload: dict) -> ColumnarInferenceResponse:
+    """Decode a columnar-v1 inference response into per-frame array views."""
+    boxes = np.frombuffer(base64.b64decode(payload["boxes"]), dtype="<f4").reshape(-1, 4)
+    confidences = np.frombuffer(base64.b64decode(payload["confidences"]), dtype="<f4")
+    class_ids = np.frombuffer(base64.b64decode(payload["class_ids"]), dtype="<u2")
+    class_names = {int(class_id): name for class_id, name in payload["class_names"].items()}
+    
+    results = []
+    offset = 0
+    for frame_number, count, inference_time in zip(
+        payload["frame_numbers"], payload["detection_counts"], payload["inference_time_ms"]
+    ):
+        end = offset + count
+        results.append(ColumnarFrameResult(
+            frame_number=frame_number,
+            detections=DetectionArrays(
+                boxes[offset:end], confidences[offset:end], class_ids[offset:end], class_names
+            ),
+            inference_time_ms=inference_time,
+        ))
+        offset = end
+    
+    return ColumnarInferenceResponse(
+        stream_id=payload["stream_id"],
+        results=results,
+        total_frames=payload["total_frames"],
+        total_detections=payload["total_detections"],
+        total_inference_time_ms=payload["total_inference_time_ms"],
+    )
+
+
+def detection_rows(detections: Union[List[BoundingBox], DetectionArrays]) -> Iterator[tuple]:
+    """Yield (x1, y1, x2, y2, confidence, class_id, class_name) for either detection format."""
+    if isinstance(detections, DetectionArrays):
+        for (x1, y1, x2, y2), confidence, class_id in zip(
+            detections.boxes.astype(np.int32).tolist(),
+            detections.confidences.tolist(),
+            detections.class_ids.tolist(),
+        ):
+            yield x1, y1, x2, y2, confidence, class_id, detections.class_names[class_id]
+        return
+    
+    for det in detections:
+        yield int(det.x1), int(det.y1), int(det.x2), int(det.y2), det.confidence, det.class_id, det.class_name
+
+
+def to_detection_arrays(detections: Union[List[BoundingBox], DetectionArrays]) -> DetectionArrays:
+    """Normalize either detection format to arrays (what the annotate stage ships around)."""
+    if isinstance(detections, DetectionArrays):
+        return detections
+    return DetectionArrays(
+        boxes=np.array([[d.x1, d.y1, d.x2, d.y2] for d in detections], dtype=np.float32).reshape(-1, 4),
+        confidences=np.array([d.confidence for d in detections], dtype=np.float32),
+        class_ids=np.array([d.class_id for d in detections], dtype=np.int32),
+        class_names={d.class_id: d.class_name for d in detections},
+    )
+
+
+def scale_detection_arrays(detections: DetectionArrays, scale_x: float, scale_y: float) -> DetectionArrays:
+    """Map boxes from a producer-downscaled frame to full-resolution coordinates."""
+    factors = np.array([scale_x, scale_y, scale_x, scale_y], dtype=np.float32)
+    return DetectionArrays(
+        boxes=detections.boxes * factors,
+        confidences=detections.confidences,
+        class_ids=detections.class_ids,
+        class_names=detections.class_names,
+    )
+
+
+def decode_frame(image_bytes: bytes) -> np.ndarray:
+    """Decode JPEG bytes straight to a BGR numpy array."""
+    frame = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        raise ValueError("Invalid frame data: not a decodable image")
+    return frame
+
+
+def draw_bounding_boxes(frame: np.ndarray, detections: DetectionArrays) -> np.ndarray:
+    """Draw bounding boxes on a copy of the frame."""
+    annotated = frame.copy()
+    
+    for x1, y1, x2, y2, confidence, class_id, class_name in detection_rows(detections):
+        # Get color based on class ID
+        color = COLORS[class_id % len(COLORS)]
+        
+        # Draw bounding box
+        cv2.rectangle(annotated, (x1, y1), (x2, y2), color, 2)
+        
+        # Draw label background
+        label = f"{class_name}: {confidence:.2f}"
+        (label_width, label_height), baseline = cv2.getTextSize(
+            label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1
+        )
+        cv2.rectangle(
+            annotated,
+            (x1, y1 - label_height - baseline - 5),
+            (x1 + label_width, y1),
+            color,
+            -1,
+        )
+        
+        # Draw label text
+        cv2.putText(
+            annotated,
+            label,
+            (x1, y1 - baseline - 2),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.5,
+            (255, 255, 255),
+            1,
+        )
+    
+    return annotated
+
+
+def encode_frame(frame: np.ndarray) -> bytes:
+    """Encode frame to JPEG bytes."""
+    _, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return buffer.tobytes()
+
+
+def annotate_frame(image_bytes: bytes, detections: DetectionArrays) -> bytes:
+    """Decode, draw and re-encode one frame (annotate stage)."""
+    return encode_frame(draw_bounding_boxes(decode_frame(image_bytes), detections))
+
+
+# Shared memory slot layout: JPEG | boxes float32 (N, 4) | confidences float32 (N,) |
+# class ids int32 (N,) | encoded output JPEG
+SLOT_DETECTION_BYTES = 24
+SLOT_MIN_SIZE = 4 * 1024 * 1024
+SLOT_ATTACH_CACHE = 8
+
+# Worker-process cache of attached slots (attaching per frame would map/unmap every time)
+_attached_slots: Dict[str, shared_memory.SharedMemory] = {}
+
+
+def slot_layout(image_size: int, num_detections: int) -> Tuple[int, int]:
+    """Offsets of the detection arrays and of the output JPEG within a slot."""
+    arrays_offset = (image_size + 7) // 8 * 8
+    return arrays_offset, arrays_offset + SLOT_DETECTION_BYTES * num_detections
+
+
+def slot_arrays(buf: memoryview, image_size: int, num_detections: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Views of the boxes, confidences and class ids stored in a slot."""
+    offset, _ = slot_layout(image_size, num_detections)
+    n = num_detections
+    return (
+        np.ndarray((n, 4), dtype=np.float32, buffer=buf, offset=offset),
+        np.ndarray((n,), dtype=np.float32, buffer=buf, offset=offset + 16 * n),
+        np.ndarray((n,), dtype=np.int32, buffer=buf, offset=offset + 20 * n),
+    )
+
+
+def annotate_shared_frame(
+    slot_name: str,
+    image_size: int,
+    num_detections: int,
+    class_names: Dict[int, str],
+) -> Union[int, bytes]:
+    """
+    Annotate the frame stored in a shared memory slot (runs in a worker process).
+    
+    Writes the encoded JPEG back into the slot and returns its size, or returns
+    the bytes themselves if they don't fit.
+    """
+    shm = _attached_slots.get(slot_name)
+    if shm is None:
+        if len(_attached_slots) >= SLOT_ATTACH_CACHE:
+            # Slots replaced by larger ones are never used again
+            _attached_slots.pop(next(iter(_attached_slots))).close()
+        shm = shared_memory.SharedMemory(name=slot_name)
+        _attached_slots[slot_name] = shm
+    
+    buf = shm.buf
+    boxes, confidences, class_ids = slot_arrays(buf, image_size, num_detections)
+    detections = DetectionArrays(boxes, confidences, class_ids, class_names)
+    encoded = annotate_frame(buf[:image_size], detections)
+    del boxes, confidences, class_ids, detections
+    
+    _, output_offset = slot_layout(image_size, num_detections)
+    if output_offset + len(encoded) > shm.size:
+        return encoded
+    buf[output_offset:output_offset + len(encoded)] = encoded
+    return len(encoded)
+
+
+class SharedMemoryAnnotator:
+    """
+    Process-pool annotate backend.
+    
+    JPEG bytes and detection arrays are written into reusable shared memory
+    slots (one per worker, grown on demand) instead of being pickled, and the
+    worker writes the annotated JPEG back into the same slot.
+    """
+
+    def __init__(self, workers: int):
+        # spawn: the stage threads are already running when workers are started lazily
+        self.pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        self.free_slots: Queue = Queue()
+        for _ in range(workers):
+            self.free_slots.put(None)  # Allocated on first use
+        self.slots_lock = Lock()
+        self.slots: Dict[str, shared_memory.SharedMemory] = {}
+
+    def _allocate_slot(self, old: Optional[shared_memory.SharedMemory], size: int) -> shared_memory.SharedMemory:
+        with self.slots_lock:
+            if old is not None:
+                del self.slots[old.name]
+                old.close()
+                old.unlink()
+            slot = shared_memory.SharedMemory(create=True, size=max(size, SLOT_MIN_SIZE))
+            self.slots[slot.name] = slot
+            return slot
+
+    def annotate(self, image_bytes: bytes, detections: DetectionArrays) -> bytes:
+        """Decode, draw and re-encode one frame in a worker process."""
+        slot = self.free_slots.get()
+        try:
+            image_size = len(image_bytes)
+            num_detections = len(detections)
+            _, output_offset = slot_layout(image_size, num_detections)
+            # Annotated output is re-encoded at higher quality; leave room for growth
+            needed = output_offset + 2 * image_size + 65536
+            if slot is None or slot.size < needed:
+                slot = self._allocate_slot(slot, 2 * needed)
+            
+            buf = slot.buf
+            buf[:image_size] = image_bytes
+            boxes, confidences, class_ids = slot_arrays(buf, image_size, num_detections)
+            boxes[:] = detections.boxes
+            confidences[:] = detections.confidences
+            class_ids[:] = detections.class_ids
+            del boxes, confidences, class_ids
+            
+            class_names = {
+                class_id: detections.class_names[class_id]
+                for class_id in set(detections.class_ids.tolist())
+            }
+            result = self.pool.submit(
+                annotate_shared_frame, slot.name, image_size, num_detections, class_names
+            ).result()
+            if isinstance(result, bytes):
+                return result
+            return bytes(buf[output_offset:output_offset + result])
+        finally:
+            self.free_slots.put(slot)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=True)
+        with self.slots_lock:
+            for slot in self.slots.values():
+                slot.close()
+                slot.unlink()
+            self.slots.clear()
+
+
 # Color palette for bounding boxes (BGR format)
 COLORS = [
     (255, 0, 0),      # Blue
@@ -159,6 +573,345 @@ COLORS = [
 ]
 
 
+# Prometheus metrics
+COMMIT_LATENCY = Histogram(
+    "consumer_commit_latency_seconds",
+    "Time from issuing an async offset commit to its broker acknowledgement",
+    buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5]
+)
+COMMITS_TOTAL = Counter(
+    "consumer_commits_total",
+    "Offset commits by outcome",
+    ["status"]
+)
+UNCOMMITTED_FRAMES = Gauge(
+    "consumer_uncommitted_frames",
+    "Frames processed but not yet covered by a committed offset"
+)
+FRAMES_DEDUPLICATED = Counter(
+    "consumer_frames_deduplicated_total",
+    "Frames skipped because the same frame was already processed from another topic",
+    ["topic"]
+)
+DEDUP_INDEX_ENTRIES = Gauge(
+    "consumer_dedup_index_entries",
+    "Frames currently remembered by the cross-topic dedup index"
+)
+S3_UPLOADS_INFLIGHT = Gauge(
+    "consumer_s3_uploads_inflight",
+    "Annotated frame uploads currently running",
+    ["bucket"]
+)
+S3_UPLOAD_LATENCY = Histogram(
+    "consumer_s3_upload_latency_seconds",
+    "Annotated frame upload time including retries",
+    ["bucket"],
+    buckets=[0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+)
+S3_UPLOADS_TOTAL = Counter(
+    "consumer_s3_uploads_total",
+    "Annotated frame uploads by outcome",
+    ["bucket", "status"]
+)
+FULL_RES_RENDERS = Counter(
+    "consumer_full_res_renders_total",
+    "Annotated frames of resized streams, drawn on the full-resolution copy or (fallback) the sent frame",
+    ["result"]
+)
+STAGE_QUEUE_DEPTH = Gauge(
+    "consumer_stage_queue_depth",
+    "Items waiting in a pipeline stage's input queue",
+    ["stage"]
+)
+STAGE_SERVICE_TIME = Histogram(
+    "consumer_stage_service_seconds",
+    "Time a pipeline stage worker spends on one item (batch for infer, frame otherwise)",
+    ["stage"],
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]
+)
+
+
+@contextmanager
+def upload_metrics(bucket: str):
+    """Record in-flight count, latency and outcome of one upload to `bucket`."""
+    S3_UPLOADS_INFLIGHT.labels(bucket=bucket).inc()
+    start_time = time.time()
+    try:
+        yield
+        S3_UPLOADS_TOTAL.labels(bucket=bucket, status="success").inc()
+    except Exception:
+        S3_UPLOADS_TOTAL.labels(bucket=bucket, status="error").inc()
+        raise
+    finally:
+        S3_UPLOAD_LATENCY.labels(bucket=bucket).observe(time.time() - start_time)
+        S3_UPLOADS_INFLIGHT.labels(bucket=bucket).dec()
+
+
+class PipelineStage:
+    """
+    One pipeline stage: a bounded input queue drained by its own worker threads.
+    
+    put() blocks while the queue is full, which propagates backpressure to the
+    upstream stage (and ultimately to the poll loop, which pauses partitions).
+    """
+
+    def __init__(self, name: str, handler: Callable[[Any], None], workers: int, queue_size: int):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.queue: Queue = Queue(maxsize=queue_size)
+        self.threads: List[Thread] = []
+
+    def start(self):
+        for i in range(self.workers):
+            thread = Thread(target=self._worker, name=f"{self.name}-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def put(self, item: Any):
+        self.queue.put(item)
+        STAGE_QUEUE_DEPTH.labels(stage=self.name).set(self.queue.qsize())
+
+    def _worker(self):
+        while True:
+            item = self.queue.get()
+            STAGE_QUEUE_DEPTH.labels(stage=self.name).set(self.queue.qsize())
+            if item is None:
+                break
+            
+            start_time = time.time()
+            try:
+                self.handler(item)
+            except Exception as e:
+                logger.error("Pipeline stage error", stage=self.name, error=str(e))
+            STAGE_SERVICE_TIME.labels(stage=self.name).observe(time.time() - start_time)
+
+    def stop(self):
+        """Drain queued items, then stop the workers."""
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+
+class BatchJob:
+    """A batch moving through the pipeline; its future resolves once every frame is uploaded."""
+
+    def __init__(self, batch: List[dict], topic: str, bucket: str):
+        self.batch = batch
+        self.topic = topic
+        self.bucket = bucket
+        self.stream_id = batch[0]["stream_id"]
+        self.start_time = time.time()
+        self.future: Future = Future()
+        self.lock = Lock()
+        self.frames_remaining = 0
+        self.total_detections = 0
+        self.inference_time_ms = 0.0
+
+    @property
+    def done(self) -> bool:
+        return self.future.done()
+
+    def frame_done(self) -> bool:
+        """Count one uploaded frame; True when it was the batch's last."""
+        with self.lock:
+            self.frames_remaining -= 1
+            return self.frames_remaining == 0
+
+    def resolve(self, success: bool) -> bool:
+        """Resolve the job once; False if it was already resolved (e.g. by an earlier failure)."""
+        with self.lock:
+            if self.future.done():
+                return False
+            self.future.set_result(success)
+            return True
+
+
+class AnnotateTask(NamedTuple):
+    job: BatchJob
+    frame_bytes: bytes
+    detections: DetectionArrays
+    key: str
+    frame_msg: Optional[dict] = None
+
+
+class UploadTask(NamedTuple):
+    job: BatchJob
+    image_bytes: bytes
+    key: str
+
+
+class OffsetTracker:
+    """
+    Tracks the highest contiguous processed offset per (topic, partition).
+    
+    Offsets are registered as they are polled and marked done when their batch
+    completes; the commit position only advances past an offset once every
+    earlier offset of the partition is done, so a restart never skips frames
+    that were still in flight.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        # (topic, partition) -> offsets in poll order, offset -> done flag
+        self.offsets: Dict[Tuple[str, int], Dict[int, bool]] = {}
+        # (topic, partition) -> next offset to commit (last contiguous done + 1)
+        self.commit_positions: Dict[Tuple[str, int], int] = {}
+        self.committed_positions: Dict[Tuple[str, int], int] = {}
+        self.done_uncommitted = 0
+
+    def track(self, topic: str, partition: int, offset: int):
+        """Register a polled offset as in progress."""
+        with self.lock:
+            self.offsets.setdefault((topic, partition), {})[offset] = False
+
+    def mark_done(self, topic: str, partition: int, offset: int):
+        """Mark an offset processed and advance the partition's commit position."""
+        with self.lock:
+            pending = self.offsets.get((topic, partition))
+            if pending is None or offset not in pending:
+                # Partition was revoked while the frame was in flight
+                return
+            pending[offset] = True
+            self.done_uncommitted += 1
+            
+            # Dicts keep insertion (= offset) order: pop the done prefix
+            for head, done in list(pending.items()):
+                if not done:
+                    break
+                del pending[head]
+                self.commit_positions[(topic, partition)] = head + 1
+            UNCOMMITTED_FRAMES.set(self.done_uncommitted)
+
+    def committable(self) -> List[TopicPartition]:
+        """Commit positions that advanced since the last commit."""
+        with self.lock:
+            return [
+                TopicPartition(topic, partition, position)
+                for (topic, partition), position in self.commit_positions.items()
+                if self.committed_positions.get((topic, partition)) != position
+            ]
+
+    def mark_committed(self, offsets: List[TopicPartition]):
+        """Record positions handed to the broker."""
+        with self.lock:
+            for tp in offsets:
+                self.committed_positions[(tp.topic, tp.partition)] = tp.offset
+            self.done_uncommitted = 0
+            UNCOMMITTED_FRAMES.set(0)
+
+    def pending_done(self) -> int:
+        """Processed frames not yet covered by a commit."""
+        with self.lock:
+            return self.done_uncommitted
+
+    def forget(self, partitions: List[TopicPartition]):
+        """Drop state for revoked partitions."""
+        with self.lock:
+            for tp in partitions:
+                key = (tp.topic, tp.partition)
+                self.offsets.pop(key, None)
+                self.commit_positions.pop(key, None)
+                self.committed_positions.pop(key, None)
+
+
+def frame_dedup_key(frame_msg: dict, mode: str) -> str:
+    """
+    Identity of a frame across topics: stream_id + frame_number + capture
+    timestamp, or a hash of the JPEG.
+    
+    frame_number alone is not unique: it restarts at 0 when the producer
+    restarts, and a frame dropped on a full producer queue after reaching some
+    topics leaves its number to the next frame. The timestamp tells those apart.
+    """
+    if mode == "hash":
+        return hashlib.blake2b(frame_msg["frame_bytes"], digest_size=16).hexdigest()
+    return f"{frame_msg['stream_id']}:{frame_msg['frame_number']}:{frame_msg.get('timestamp')}"
+
+
+class DedupEntry:
+    """A frame seen on some topic: copies from other topics wait here until it is processed."""
+
+    __slots__ = ("topic", "created", "resolved", "source_bucket", "s3_key", "waiting")
+
+    def __init__(self, topic: str):
+        self.topic = topic
+        self.created = time.time()
+        self.resolved = False
+        self.source_bucket: Optional[str] = None
+        self.s3_key: Optional[str] = None  # None: no detections (nothing uploaded) or failed
+        self.waiting: List[dict] = []
+
+
+class FrameDedupIndex:
+    """
+    Bounded TTL index of frames by dedup key.
+    
+    The first copy of a frame is processed normally. Copies from other topics are
+    queued on its entry while it is in flight, and fanned out once it resolves.
+    Resolved entries expire after ttl_seconds or when the index is over capacity;
+    in-flight entries are never evicted, so queued copies can't be lost.
+    """
+
+    PRIMARY, QUEUED, RESOLVED = "primary", "queued", "resolved"
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.lock = Lock()
+        self.entries: "OrderedDict[str, DedupEntry]" = OrderedDict()
+
+    def add(self, key: str, frame_msg: dict) -> Tuple[str, DedupEntry]:
+        """
+        Register a polled frame. Returns PRIMARY (process it), QUEUED (a copy
+        waiting for the in-flight original) or RESOLVED (a copy of a frame that
+        is already done; fan it out now), with the frame's entry.
+        """
+        with self.lock:
+            self._evict()
+            entry = self.entries.get(key)
+            if entry is None or (entry.topic == frame_msg["_topic"] and entry.resolved):
+                # New frame, or a redelivery of a processed one (e.g. after a restart)
+                entry = DedupEntry(frame_msg["_topic"])
+                self.entries[key] = entry
+                self.entries.move_to_end(key)
+                DEDUP_INDEX_ENTRIES.set(len(self.entries))
+                return self.PRIMARY, entry
+            if entry.topic == frame_msg["_topic"]:
+                # Redelivered while the original is in flight: process it too, the
+                # first of the two to finish resolves the entry
+                return self.PRIMARY, entry
+            if entry.resolved:
+                return self.RESOLVED, entry
+            entry.waiting.append(frame_msg)
+            return self.QUEUED, entry
+
+    def resolve(self, key: str, source_bucket: str, s3_key: Optional[str]) -> List[dict]:
+        """Record the outcome of a processed frame; returns the copies queued on it."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry.resolved:
+                return []
+            entry.resolved = True
+            entry.source_bucket = source_bucket
+            entry.s3_key = s3_key
+            waiting, entry.waiting = entry.waiting, []
+            return waiting
+
+    def _evict(self):
+        """Drop expired resolved entries and, over capacity, the oldest resolved ones."""
+        cutoff = time.time() - self.ttl_seconds
+        for key in list(self.entries):
+            entry = self.entries[key]
+            if entry.created >= cutoff and len(self.entries) <= self.max_entries:
+                break
+            if entry.resolved:
+                del self.entries[key]
+        DEDUP_INDEX_ENTRIES.set(len(self.entries))
+
+
 class FrameProcessor:
     """Processes frames from multiple topics IN PARALLEL: consumes from Kafka, runs inference, uploads to S3."""
 
@@ -183,12 +936,31 @@ class FrameProcessor:
         self.batch_start_times: Dict[str, Optional[float]] = {topic: None for topic in self.topics}
         self.batch_locks: Dict[str, Lock] = {topic: Lock() for topic in self.topics}
         
-        # Track which topics have pending batch processing
-        self.pending_batches: Dict[str, bool] = {topic: False for topic in self.topics}
+        # In-flight batches per topic (owned by the poll loop) and topics paused for backpressure
+        self.max_inflight_batches = settings.max_inflight_batches
+        self.inflight_batches: Dict[str, int] = {topic: 0 for topic in self.topics}
+        self.paused_topics: set = set()
         
-        # ThreadPoolExecutor for parallel batch processing (one worker per topic)
-        self.executor: Optional[ThreadPoolExecutor] = None
-        self.pending_futures: List[Future] = []
+        # In-flight batch jobs: (future, topic, batch)
+        self.pending_futures: List[Tuple[Future, str, List[dict]]] = []
+        
+        # Pipeline stages (created in start()); annotation runs in worker processes
+        # unless the thread backend is selected
+        self.infer_stage: Optional[PipelineStage] = None
+        self.annotate_stage: Optional[PipelineStage] = None
+        self.upload_stage: Optional[PipelineStage] = None
+        self.annotator: Optional[SharedMemoryAnnotator] = None
+        
+        # Cross-topic dedup index, and the pool doing server-side copies for duplicates
+        self.dedup_index: Optional[FrameDedupIndex] = None
+        if settings.dedup_enabled and len(self.topics) > 1:
+            self.dedup_index = FrameDedupIndex(settings.dedup_ttl_seconds, settings.dedup_max_entries)
+        self.copy_executor: Optional[ThreadPoolExecutor] = None
+        
+        # Offset commits: processed positions per partition, committed asynchronously
+        self.offset_tracker = OffsetTracker()
+        self.last_commit_time = time.time()
+        self.commit_send_times: Deque[float] = deque()
         
         # Statistics (thread-safe)
         self.stats_lock = Lock()
@@ -200,7 +972,7 @@ class FrameProcessor:
             "FrameProcessor initialized (PARALLEL mode)",
             topics=self.topics,
             topic_bucket_mapping=self.topic_bucket_mapping,
-            max_workers=len(self.topics),
+            max_inflight_batches=settings.max_inflight_batches,
         )
 
     def _init_kafka_consumer(self) -> Consumer:
@@ -216,10 +988,82 @@ class FrameProcessor:
         }
         
         logger.info("Initializing Kafka consumer", config=config, topics=self.topics)
-        consumer = Consumer(config)
-        consumer.subscribe(self.topics)  # Subscribe to ALL topics
+        consumer = Consumer({**config, "on_commit": self._on_commit})
+        consumer.subscribe(  # Subscribe to ALL topics
+            self.topics, on_assign=self._on_assign, on_revoke=self._on_revoke
+        )
         return consumer
 
+    def _on_commit(self, err, partitions):
+        """Async commit acknowledgement (served from poll): record latency and outcome."""
+        if self.commit_send_times:
+            COMMIT_LATENCY.observe(time.time() - self.commit_send_times.popleft())
+        if err:
+            COMMITS_TOTAL.labels(status="error").inc()
+            logger.error("Offset commit failed", error=str(err))
+        else:
+            COMMITS_TOTAL.labels(status="success").inc()
+
+    def _on_assign(self, consumer, partitions):
+        """Reapply pauses: partitions of a topic paused for backpressure start paused."""
+        paused = [tp for tp in partitions if tp.topic in self.paused_topics]
+        if not paused:
+            return
+        # Assign here (instead of after the callback) so the pause applies to
+        # the new assignment before anything is fetched
+        consumer.assign(partitions)
+        consumer.pause(paused)
+        logger.info(
+            "Reapplied topic pauses after rebalance",
+            topics=sorted({tp.topic for tp in paused}),
+            partitions=len(paused),
+        )
+
+    def _on_revoke(self, consumer, partitions):
+        """Commit what is done for revoked partitions and forget them."""
+        self.commit_offsets(asynchronous=False)
+        self.offset_tracker.forget(partitions)
+
+    def commit_offsets(self, asynchronous: bool = True):
+        """Commit the highest contiguous processed offset of every partition that advanced."""
+        offsets = self.offset_tracker.committable()
+        if not offsets:
+            return
+        
+        try:
+            if asynchronous:
+                self.commit_send_times.append(time.time())
+                self.consumer.commit(offsets=offsets, asynchronous=True)
+            else:
+                start_time = time.time()
+                self.consumer.commit(offsets=offsets, asynchronous=False)
+                COMMIT_LATENCY.observe(time.time() - start_time)
+                COMMITS_TOTAL.labels(status="success").inc()
+            self.offset_tracker.mark_committed(offsets)
+            self.last_commit_time = time.time()
+        except Exception as e:
+            if asynchronous and self.commit_send_times:
+                self.commit_send_times.pop()
+            COMMITS_TOTAL.labels(status="error").inc()
+            logger.error("Failed to commit offsets", error=str(e))
+
+    def maybe_commit_offsets(self):
+        """Commit asynchronously on the commit interval or once enough frames are pending."""
+        if (
+            self.offset_tracker.pending_done() >= settings.commit_max_pending
+            or time.time() - self.last_commit_time >= settings.commit_interval_seconds
+        ):
+            self.commit_offsets()
+
+    def mark_frame_done(self, frame_msg: dict):
+        """Mark one frame as processed for offset commits."""
+        self.offset_tracker.mark_done(frame_msg["_topic"], frame_msg["_partition"], frame_msg["_offset"])
+
+    def mark_batch_done(self, batch: List[dict]):
+        """Mark every frame of a finished batch as processed for offset commits."""
+        for frame_msg in batch:
+            self.mark_frame_done(frame_msg)
+
     def _init_http_client(self) -> httpx.Client:
         """Initialize HTTP client for inference service."""
         return httpx.Client(
@@ -232,63 +1076,11 @@ class FrameProcessor:
         boto_config = BotoConfig(
             region_name=settings.aws_region,
             retries={"max_attempts": 3, "mode": "adaptive"},
+            # One connection per upload worker (and per duplicate copy worker)
+            max_pool_connections=settings.s3_upload_workers * (2 if self.dedup_index else 1),
         )
         return boto3.client("s3", config=boto_config)
 
-    def decode_frame(self, frame_data: str) -> np.ndarray:
-        """Decode base64 frame to numpy array."""
-        image_bytes = base64.b64decode(frame_data)
-        image = Image.open(io.BytesIO(image_bytes))
-        return cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-
-    def draw_bounding_boxes(
-        self,
-        frame: np.ndarray,
-        detections: List[BoundingBox]
-    ) -> np.ndarray:
-        """Draw bounding boxes on frame."""
-        annotated = frame.copy()
-        
-        for det in detections:
-            # Get color based on class ID
-            color = COLORS[det.class_id % len(COLORS)]
-            
-            # Draw bounding box
-            x1, y1 = int(det.x1), int(det.y1)
-            x2, y2 = int(det.x2), int(det.y2)
-            cv2.rectangle(annotated, (x1, y1), (x2, y2), color, 2)
-            
-            # Draw label background
-            label = f"{det.class_name}: {det.confidence:.2f}"
-            (label_width, label_height), baseline = cv2.getTextSize(
-                label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1
-            )
-            cv2.rectangle(
-                annotated,
-                (x1, y1 - label_height - baseline - 5),
-                (x1 + label_width, y1),
-                color,
-                -1,
-            )
-            
-            # Draw label text
-            cv2.putText(
-                annotated,
-                label,
-                (x1, y1 - baseline - 2),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.5,
-                (255, 255, 255),
-                1,
-            )
-        
-        return annotated
-
-    def encode_frame(self, frame: np.ndarray) -> bytes:
-        """Encode frame to JPEG bytes."""
-        _, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
-        return buffer.tobytes()
-
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=1, max=10),
@@ -307,12 +1099,112 @@ class FrameProcessor:
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=1, max=10),
     )
-    def call_inference_service_chunk(self, chunk: List[dict], stream_id: str) -> InferenceResponse:
+    def copy_in_s3(self, source_bucket: str, key: str, bucket: str):
+        """Server-side copy of an annotated frame to another bucket, with retry."""
+        self.s3_client.copy_object(
+            Bucket=bucket,
+            Key=key,
+            CopySource={"Bucket": source_bucket, "Key": key},
+        )
+        logger.debug("Copied in S3", source_bucket=source_bucket, bucket=bucket, key=key)
+
+    def copy_duplicate(self, frame_msg: dict, source_bucket: str, key: str, bucket: str):
+        """Fan a processed frame out to a duplicate's bucket; the duplicate is done either way."""
+        try:
+            with upload_metrics(bucket):
+                self.copy_in_s3(source_bucket, key, bucket)
+        except Exception as e:
+            logger.error("Duplicate frame copy failed", topic=frame_msg["_topic"], bucket=bucket, error=str(e))
+        finally:
+            self.mark_frame_done(frame_msg)
+
+    def schedule_copy(self, frame_msg: dict, source_bucket: str, key: str, bucket: str):
+        """Run a duplicate's copy off the calling thread (poll loop or upload worker)."""
+        self.copy_executor.submit(self.copy_duplicate, frame_msg, source_bucket, key, bucket)
+
+    def fan_out_duplicates(self, duplicates: List[dict], source_bucket: str, s3_key: Optional[str]):
+        """Deliver duplicate frames: copy the annotated result into their buckets, or just complete them."""
+        for frame_msg in duplicates:
+            FRAMES_DEDUPLICATED.labels(topic=frame_msg["_topic"]).inc()
+            bucket = self.topic_bucket_mapping.get(frame_msg["_topic"], settings.s3_bucket)
+            if s3_key is None or bucket == source_bucket:
+                self.mark_frame_done(frame_msg)
+            else:
+                self.schedule_copy(frame_msg, source_bucket, s3_key, bucket)
+
+    def register_frame(self, frame_msg: dict) -> bool:
+        """Check a polled frame against the dedup index; True if it is a duplicate (handled here)."""
+        key = frame_dedup_key(frame_msg, settings.dedup_key)
+        state, entry = self.dedup_index.add(key, frame_msg)
+        if state == FrameDedupIndex.PRIMARY:
+            frame_msg["_dedup_key"] = key
+            return False
+        if state == FrameDedupIndex.RESOLVED:
+            self.fan_out_duplicates([frame_msg], entry.source_bucket, entry.s3_key)
+        return True
+
+    def resolve_duplicates(self, job: BatchJob, success: bool):
+        """Resolve the batch's dedup entries and fan out the copies queued on them."""
+        for frame_msg in job.batch:
+            key = frame_msg.get("_dedup_key")
+            if key is None:
+                continue
+            s3_key = frame_msg.get("_s3_key") if success else None
+            duplicates = self.dedup_index.resolve(key, job.bucket, s3_key)
+            if duplicates:
+                self.fan_out_duplicates(duplicates, job.bucket, s3_key)
+
+    def upload_frame(self, image_bytes: bytes, key: str, bucket: str):
+        """Upload one annotated frame, recording per-bucket metrics."""
+        with upload_metrics(bucket):
+            self.upload_to_s3(image_bytes, key, bucket)
+
+    def annotate(self, frame_bytes: bytes, detections: DetectionArrays) -> bytes:
+        """Annotate one frame on the configured backend (blocking)."""
+        if self.annotator:
+            return self.annotator.annotate(frame_bytes, detections)
+        return annotate_frame(frame_bytes, detections)
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=1, max=10),
+    )
+    def call_inference_service_chunk(
+        self,
+        chunk: List[dict],
+        stream_id: str,
+    ) -> Union[InferenceResponse, ColumnarInferenceResponse]:
         """Call inference service with a single chunk of frames (max 25)."""
+        path, request = self.inference_request(chunk, stream_id)
+        return self.parse_inference_response(self.http_client.post(path, **request))
+
+    def inference_request(self, chunk: List[dict], stream_id: str) -> Tuple[str, dict]:
+        """Endpoint path and httpx request arguments for one chunk (shared by both modes)."""
+        params = {"response_format": settings.inference_response_format}
+        
+        if settings.inference_transport == "raw":
+            # Raw JPEG parts + JSON metadata: no base64 round-trip
+            metadata = {
+                "stream_id": stream_id,
+                "frames": [
+                    {"frame_number": msg["frame_number"], "timestamp": msg.get("timestamp")}
+                    for msg in chunk
+                ],
+            }
+            files = [
+                ("frames", (f"{msg['frame_number']}.jpg", msg["frame_bytes"], "image/jpeg"))
+                for msg in chunk
+            ]
+            return "/predict/raw", {
+                "params": params,
+                "data": {"metadata": json.dumps(metadata)},
+                "files": files,
+            }
+        
         frames = [
             {
                 "frame_number": msg["frame_number"],
-                "frame_data": msg["frame_data"],
+                "frame_data": base64.b64encode(msg["frame_bytes"]).decode("utf-8"),
                 "timestamp": msg.get("timestamp"),
             }
             for msg in chunk
@@ -323,9 +1215,17 @@ class FrameProcessor:
             "frames": frames,
         }
         
-        response = self.http_client.post("/predict", json=payload)
+        return "/predict", {"params": params, "json": payload}
+
+    def parse_inference_response(
+        self,
+        response: httpx.Response,
+    ) -> Union[InferenceResponse, ColumnarInferenceResponse]:
+        """Raise on HTTP errors and decode the response in the configured format."""
         response.raise_for_status()
         
+        if settings.inference_response_format == "columnar":
+            return decode_columnar_response(response.json())
         return InferenceResponse(**response.json())
 
     def call_inference_service(self, batch: List[dict]) -> List[tuple]:
@@ -344,102 +1244,178 @@ class FrameProcessor:
         
         return results
 
+    def submit_batch_job(self, batch: List[dict], topic: str) -> Future:
+        """Hand a batch to the infer stage; the returned future resolves to True/False."""
+        job = BatchJob(batch, topic, self.topic_bucket_mapping.get(topic, settings.s3_bucket))
+        
+        logger.info(
+            "Processing batch (pipelined)",
+            topic=topic,
+            stream_id=job.stream_id,
+            batch_size=len(batch),
+            target_bucket=job.bucket,
+        )
+        
+        self.infer_stage.put(job)
+        return job.future
+
     def process_batch(self, batch: List[dict], topic: str) -> bool:
         """
         Process a batch of frames: inference + post-processing + S3 upload.
-        Thread-safe: can be called from multiple threads simultaneously.
+        Runs the batch through the pipeline and blocks until it completes.
         Returns True on success, False on failure.
         """
         if not batch:
             return True
-        
-        stream_id = batch[0]["stream_id"]
-        bucket = self.topic_bucket_mapping.get(topic, settings.s3_bucket)
-        start_time = time.time()
-        total_detections = 0
-        total_inference_time = 0.0
-        batch_size = len(batch)
-        
-        logger.info(
-            "Processing batch (parallel)",
-            topic=topic,
-            stream_id=stream_id,
-            batch_size=batch_size,
-            target_bucket=bucket,
-        )
-        
+        return self.submit_batch_job(batch, topic).result()
+
+    def run_infer_stage(self, job: BatchJob):
+        """Infer stage: call the inference service and fan frames with detections out to annotate."""
         try:
             # Call inference service (handles chunking internally for batches > 25)
-            chunk_results = self.call_inference_service(batch)
-            
-            # Process each chunk result
-            for chunk, inference_response in chunk_results:
-                total_detections += inference_response.total_detections
-                total_inference_time += inference_response.total_inference_time_ms
-                
-                for i, result in enumerate(inference_response.results):
-                    frame_msg = chunk[i]
-                    
-                    # Skip frames with no detections
-                    if not result.detections:
-                        continue
-                    
-                    # Decode frame
-                    frame = self.decode_frame(frame_msg["frame_data"])
-                    
-                    # Draw bounding boxes
-                    annotated_frame = self.draw_bounding_boxes(frame, result.detections)
-                    
-                    # Encode annotated frame
-                    image_bytes = self.encode_frame(annotated_frame)
-                    
-                    # Generate S3 key
-                    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-                    s3_key = (
-                        f"{settings.s3_prefix}/{stream_id}/"
-                        f"{timestamp}_frame{result.frame_number}.jpg"
-                    )
-                    
-                    # Upload to topic-specific S3 bucket
-                    self.upload_to_s3(image_bytes, s3_key, bucket)
-            
-            processing_time = time.time() - start_time
-            
-            # Update stats thread-safely
-            with self.stats_lock:
-                self.batches_processed += 1
-                self.frames_processed += batch_size
-                self.frames_per_topic[topic] += batch_size
-                current_batches = self.batches_processed
-            
-            logger.info(
-                "Batch processed successfully (parallel)",
-                topic=topic,
-                stream_id=stream_id,
-                batch_size=batch_size,
-                target_bucket=bucket,
-                total_detections=total_detections,
-                inference_time_ms=total_inference_time,
-                processing_time_seconds=processing_time,
-                batches_processed=current_batches,
-            )
-            
-            return True
+            chunk_results = self.call_inference_service(job.batch)
+            tasks = self.build_annotate_tasks(job, chunk_results)
             
+            # Set the count before handing out frames so a fast upload can't finish the job early
+            job.frames_remaining = len(tasks)
+            if not tasks:
+                self.finish_job(job, True)
+                return
+            for task in tasks:
+                self.annotate_stage.put(task)
         except httpx.HTTPStatusError as e:
             logger.error(
                 "Inference service error",
-                topic=topic,
+                topic=job.topic,
                 status_code=e.response.status_code,
                 detail=e.response.text,
             )
-            return False
+            self.finish_job(job, False)
         except Exception as e:
-            logger.error("Batch processing failed", topic=topic, error=str(e))
-            return False
-        finally:
-            # Mark this topic as no longer having a pending batch
-            self.pending_batches[topic] = False
+            # Also covers a response that doesn't match the batch, so the job's
+            # in-flight slot is always released
+            logger.error("Batch processing failed", topic=job.topic, error=str(e))
+            self.finish_job(job, False)
+
+    def build_annotate_tasks(self, job: BatchJob, chunk_results: List[tuple]) -> List[AnnotateTask]:
+        """Tally the inference results into the job and build a task per frame with detections."""
+        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+        tasks = []
+        for chunk, inference_response in chunk_results:
+            job.total_detections += inference_response.total_detections
+            job.inference_time_ms += inference_response.total_inference_time_ms
+            
+            for i, result in enumerate(inference_response.results):
+                frame_msg = chunk[i]
+                
+                # Skip frames with no detections
+                if not result.detections:
+                    continue
+                
+                # Generate S3 key
+                s3_key = (
+                    f"{settings.s3_prefix}/{job.stream_id}/"
+                    f"{timestamp}_frame{result.frame_number}.jpg"
+                )
+                frame_msg["_s3_key"] = s3_key
+                tasks.append(AnnotateTask(
+                    job, frame_msg["frame_bytes"], to_detection_arrays(result.detections), s3_key, frame_msg
+                ))
+        return tasks
+
+    @staticmethod
+    def full_res_source(frame_msg: Optional[dict]) -> Optional[Tuple[str, str]]:
+        """(bucket, key) of the frame's stored full-resolution copy, if it should be drawn on."""
+        if not settings.render_full_resolution or not frame_msg or not frame_msg.get("full_res_key"):
+            return None
+        return frame_msg["full_res_bucket"], frame_msg["full_res_key"]
+
+    @staticmethod
+    def full_res_detections(frame_msg: dict, detections: DetectionArrays) -> DetectionArrays:
+        """Detections scaled from the sent frame to the full-resolution copy."""
+        return scale_detection_arrays(
+            detections, float(frame_msg.get("scale_x", 1.0)), float(frame_msg.get("scale_y", 1.0))
+        )
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=0.5, min=0.5, max=2),
+    )
+    def fetch_from_s3(self, bucket: str, key: str) -> bytes:
+        """Download an object with retry (the producer uploads full-res copies asynchronously)."""
+        return self.s3_client.get_object(Bucket=bucket, Key=key)["Body"].read()
+
+    def render_source(self, task: AnnotateTask) -> Tuple[bytes, DetectionArrays]:
+        """Frame bytes and detections to draw: the full-resolution copy when available, else the sent frame."""
+        source = self.full_res_source(task.frame_msg)
+        if source is None:
+            return task.frame_bytes, task.detections
+        try:
+            frame_bytes = self.fetch_from_s3(*source)
+        except Exception as e:
+            FULL_RES_RENDERS.labels(result="fallback").inc()
+            logger.warning("Full-resolution frame unavailable, drawing on sent frame", key=source[1], error=str(e))
+            return task.frame_bytes, task.detections
+        FULL_RES_RENDERS.labels(result="full_res").inc()
+        return frame_bytes, self.full_res_detections(task.frame_msg, task.detections)
+
+    def run_annotate_stage(self, task: AnnotateTask):
+        """Annotate stage: decode, draw and encode (in a worker process unless the thread backend is used)."""
+        if task.job.done:
+            return
+        try:
+            image_bytes = self.annotate(*self.render_source(task))
+        except Exception as e:
+            logger.error("Frame annotation failed", topic=task.job.topic, error=str(e))
+            self.finish_job(task.job, False)
+            return
+        self.upload_stage.put(UploadTask(task.job, image_bytes, task.key))
+
+    def run_upload_stage(self, task: UploadTask):
+        """Upload stage: PUT to the topic's bucket; the last frame completes the batch."""
+        job = task.job
+        if job.done:
+            return
+        try:
+            # Upload to topic-specific S3 bucket
+            self.upload_frame(task.image_bytes, task.key, job.bucket)
+        except Exception as e:
+            logger.error("Frame upload failed", topic=job.topic, bucket=job.bucket, error=str(e))
+            self.finish_job(job, False)
+            return
+        if job.frame_done():
+            self.finish_job(job, True)
+
+    def finish_job(self, job: BatchJob, success: bool):
+        """Resolve a batch job, release its duplicates and record its stats (first outcome wins)."""
+        if not job.resolve(success):
+            return
+        if self.dedup_index:
+            self.resolve_duplicates(job, success)
+        if not success:
+            return
+        
+        batch_size = len(job.batch)
+        processing_time = time.time() - job.start_time
+        
+        # Update stats thread-safely
+        with self.stats_lock:
+            self.batches_processed += 1
+            self.frames_processed += batch_size
+            self.frames_per_topic[job.topic] += batch_size
+            current_batches = self.batches_processed
+        
+        logger.info(
+            "Batch processed successfully (pipelined)",
+            topic=job.topic,
+            stream_id=job.stream_id,
+            batch_size=batch_size,
+            target_bucket=job.bucket,
+            total_detections=job.total_detections,
+            inference_time_ms=job.inference_time_ms,
+            processing_time_seconds=processing_time,
+            batches_processed=current_batches,
+        )
 
     def should_process_batch(self, topic: str) -> bool:
         """Check if batch for a specific topic should be processed."""
@@ -456,26 +1432,62 @@ class FrameProcessor:
         
         return False
 
-    def submit_batch_for_processing(self, topic: str):
-        """Submit a batch for parallel processing if not already pending."""
-        if self.pending_batches[topic]:
-            # Already processing this topic, skip
+    def _topic_partitions(self, topic: str) -> list:
+        """Partitions of a topic currently assigned to this consumer."""
+        return [tp for tp in self.consumer.assignment() if tp.topic == topic]
+
+    def pause_topic(self, topic: str):
+        """Stop fetching a topic while its in-flight pipeline is full."""
+        if topic in self.paused_topics:
             return
+        self.consumer.pause(self._topic_partitions(topic))
+        self.paused_topics.add(topic)
+        logger.info(
+            "Paused topic (in-flight batches at limit)",
+            topic=topic,
+            inflight_batches=self.inflight_batches[topic],
+            buffered_frames=len(self.batches[topic]),
+        )
+
+    def resume_topic(self, topic: str):
+        """Resume fetching a paused topic once it has room for more frames."""
+        if topic not in self.paused_topics:
+            return
+        self.consumer.resume(self._topic_partitions(topic))
+        self.paused_topics.discard(topic)
+        logger.info("Resumed topic", topic=topic, inflight_batches=self.inflight_batches[topic])
+
+    def submit_batch_for_processing(self, topic: str):
+        """
+        Submit a topic's batch for processing if it has a free in-flight slot.
         
+        When all max_inflight_batches slots are busy the batch stays buffered
+        and the topic's partitions are paused until a slot frees up, so frames
+        are never dropped.
+        """
         batch = self.batches[topic]
         if not batch:
             return
         
-        # Mark as pending and clear the batch
-        self.pending_batches[topic] = True
+        if self.inflight_batches[topic] >= self.max_inflight_batches:
+            self.pause_topic(topic)
+            return
+        
+        # Take the batch and start filling the next one
+        self.inflight_batches[topic] += 1
         self.batches[topic] = []
         self.batch_start_times[topic] = None
         
         # Submit to thread pool
-        future = self.executor.submit(self.process_batch, batch, topic)
-        self.pending_futures.append((future, topic))
+        future = self.submit_batch_job(batch, topic)
+        self.pending_futures.append((future, topic, batch))
         
-        logger.debug("Submitted batch for parallel processing", topic=topic, batch_size=len(batch))
+        logger.debug(
+            "Submitted batch for parallel processing",
+            topic=topic,
+            batch_size=len(batch),
+            inflight_batches=self.inflight_batches[topic],
+        )
 
     def check_and_submit_timeouts(self):
         """Check all topic batches for timeouts and submit for processing if needed."""
@@ -484,24 +1496,109 @@ class FrameProcessor:
                 self.submit_batch_for_processing(topic)
 
     def cleanup_completed_futures(self):
-        """Clean up completed futures and commit offsets."""
+        """Clean up completed futures, record their offsets as processed and commit when due."""
         completed = []
         still_pending = []
         
-        for future, topic in self.pending_futures:
-            if future.done():
-                completed.append((future, topic))
+        for entry in self.pending_futures:
+            if entry[0].done():
+                completed.append(entry)
             else:
-                still_pending.append((future, topic))
+                still_pending.append(entry)
         
         self.pending_futures = still_pending
         
-        # If any futures completed, commit offsets
-        if completed:
-            try:
-                self.consumer.commit(asynchronous=False)
-            except Exception as e:
-                logger.error("Failed to commit offsets", error=str(e))
+        # Failed batches are logged by their stage and not retried, so their
+        # frames count as processed too (same delivery semantics as before)
+        for _, _, batch in completed:
+            self.mark_batch_done(batch)
+        
+        # Free in-flight slots; refill them and resume topics that have room again
+        for _, topic, _ in completed:
+            self.inflight_batches[topic] -= 1
+        for topic in {topic for _, topic, _ in completed}:
+            if self.should_process_batch(topic):
+                self.submit_batch_for_processing(topic)
+            if (
+                self.inflight_batches[topic] < self.max_inflight_batches
+                and len(self.batches[topic]) < settings.batch_size
+            ):
+                self.resume_topic(topic)
+        
+        self.maybe_commit_offsets()
+
+    def start_pipeline(self):
+        """Create the annotate backend and start the stage workers."""
+        if settings.annotate_backend == "process":
+            self.annotator = SharedMemoryAnnotator(settings.annotate_workers)
+        if self.dedup_index:
+            self.copy_executor = ThreadPoolExecutor(
+                max_workers=settings.s3_upload_workers,
+                thread_name_prefix="s3-copier",
+            )
+        # One annotate thread per process (and shared memory slot) keeps every process busy
+        self.infer_stage = PipelineStage(
+            "infer", self.run_infer_stage, settings.infer_stage_workers, settings.pipeline_queue_size
+        )
+        self.annotate_stage = PipelineStage(
+            "annotate", self.run_annotate_stage, settings.annotate_workers, settings.pipeline_queue_size
+        )
+        self.upload_stage = PipelineStage(
+            "upload", self.run_upload_stage, settings.s3_upload_workers, settings.pipeline_queue_size
+        )
+        for stage in (self.infer_stage, self.annotate_stage, self.upload_stage):
+            stage.start()
+
+    def stop_pipeline(self):
+        """Drain the stages front to back, then shut down the annotate processes."""
+        for stage in (self.infer_stage, self.annotate_stage, self.upload_stage):
+            if stage:
+                stage.stop()
+        if self.copy_executor:
+            self.copy_executor.shutdown(wait=True)
+            self.copy_executor = None
+        if self.annotator:
+            self.annotator.shutdown()
+            self.annotator = None
+        logger.info("Pipeline shutdown complete")
+
+    def handle_message(self, msg):
+        """Parse a polled message into its topic's batch and submit the batch when ready."""
+        if msg.error():
+            if msg.error().code() != KafkaError._PARTITION_EOF:
+                logger.error("Kafka error", error=msg.error())
+            return
+        
+        # Get the topic this message came from
+        topic = msg.topic()
+        
+        self.offset_tracker.track(topic, msg.partition(), msg.offset())
+        
+        # Parse message (binary or legacy JSON envelope)
+        try:
+            frame_msg = parse_frame_message(msg.value(), msg.headers())
+            frame_msg["_topic"] = topic
+            frame_msg["_partition"] = msg.partition()
+            frame_msg["_offset"] = msg.offset()
+        except ValueError as e:
+            logger.warning("Invalid message format", topic=topic, error=str(e))
+            self.offset_tracker.mark_done(topic, msg.partition(), msg.offset())
+            return
+        
+        # A copy of a frame already seen on another topic is not inferred again:
+        # it waits for the original's result and is completed by fan-out
+        if self.dedup_index and self.register_frame(frame_msg):
+            return
+        
+        # Add to topic-specific batch; frames are buffered (never dropped)
+        # while the topic's in-flight slots are busy
+        if not self.batches[topic]:
+            self.batch_start_times[topic] = time.time()
+        self.batches[topic].append(frame_msg)
+        
+        # Submit batch if ready (pauses the topic if no slot is free)
+        if self.should_process_batch(topic):
+            self.submit_batch_for_processing(topic)
 
     def start(self):
         """Start the consumer loop with PARALLEL batch processing."""
@@ -509,17 +1606,23 @@ class FrameProcessor:
         self.consumer = self._init_kafka_consumer()
         self.http_client = self._init_http_client()
         self.s3_client = self._init_s3_client()
+        start_http_server(settings.metrics_port)
         
-        # Create ThreadPoolExecutor with one worker per topic for true parallelism
-        self.executor = ThreadPoolExecutor(max_workers=len(self.topics), thread_name_prefix="batch-processor")
+        self.start_pipeline()
         
         logger.info(
             "Starting frame processor (PARALLEL mode)",
             kafka_topics=self.topics,
             topic_bucket_mapping=self.topic_bucket_mapping,
             inference_url=settings.inference_service_url,
+            inference_transport=settings.inference_transport,
             batch_size=settings.batch_size,
-            parallel_workers=len(self.topics),
+            max_inflight_batches=self.max_inflight_batches,
+            infer_stage_workers=settings.infer_stage_workers,
+            annotate_backend=settings.annotate_backend,
+            annotate_workers=settings.annotate_workers,
+            s3_upload_workers=settings.s3_upload_workers,
+            pipeline_queue_size=settings.pipeline_queue_size,
         )
         
         while self.running:
@@ -535,32 +1638,7 @@ class FrameProcessor:
                     self.check_and_submit_timeouts()
                     continue
                 
-                if msg.error():
-                    if msg.error().code() == KafkaError._PARTITION_EOF:
-                        continue
-                    logger.error("Kafka error", error=msg.error())
-                    continue
-                
-                # Get the topic this message came from
-                topic = msg.topic()
-                
-                # Parse message
-                try:
-                    frame_msg = json.loads(msg.value().decode("utf-8"))
-                    frame_msg["_topic"] = topic
-                except json.JSONDecodeError as e:
-                    logger.warning("Invalid message format", topic=topic, error=str(e))
-                    continue
-                
-                # Add to topic-specific batch (only if not currently processing)
-                if not self.pending_batches[topic]:
-                    if not self.batches[topic]:
-                        self.batch_start_times[topic] = time.time()
-                    self.batches[topic].append(frame_msg)
-                    
-                    # Submit batch if ready
-                    if self.should_process_batch(topic):
-                        self.submit_batch_for_processing(topic)
+                self.handle_message(msg)
                 
             except KeyboardInterrupt:
                 logger.info("Received interrupt, stopping")
@@ -579,9 +1657,10 @@ class FrameProcessor:
         # Wait for pending futures to complete
         if self.pending_futures:
             logger.info("Waiting for pending batch processing to complete", pending_count=len(self.pending_futures))
-            for future, topic in self.pending_futures:
+            for future, topic, batch in self.pending_futures:
                 try:
                     future.result(timeout=30)
+                    self.mark_batch_done(batch)
                 except Exception as e:
                     logger.error("Pending batch failed", topic=topic, error=str(e))
         
@@ -591,20 +1670,16 @@ class FrameProcessor:
                 logger.info("Processing remaining batch", topic=topic, batch_size=len(self.batches[topic]))
                 try:
                     self.process_batch(self.batches[topic], topic)
+                    self.mark_batch_done(self.batches[topic])
                 except Exception as e:
                     logger.error("Failed to process remaining batch", topic=topic, error=str(e))
         
-        # Shutdown thread pool
-        if self.executor:
-            self.executor.shutdown(wait=True)
-            logger.info("Thread pool shutdown complete")
+        # Shutdown pipeline stages
+        self.stop_pipeline()
         
-        # Final offset commit
+        # Final offset commit (processed positions only)
         if self.consumer:
-            try:
-                self.consumer.commit(asynchronous=False)
-            except Exception:
-                pass
+            self.commit_offsets(asynchronous=False)
             self.consumer.close()
             logger.info("Kafka consumer closed")
         
@@ -619,7 +1694,338 @@ class FrameProcessor:
         )
 
 
+async def gather_all(*aws) -> list:
+    """
+    asyncio.gather that lets every awaitable finish before raising the first
+    failure, so no sibling upload or call is left running unobserved.
+    """
+    results = await asyncio.gather(*aws, return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results
+
+
+class AsyncFrameProcessor(FrameProcessor):
+    """
+    asyncio mode: one event loop drives the inference calls (httpx.AsyncClient)
+    and S3 PUTs (aiobotocore) of every in-flight batch, so concurrency is bounded
+    by connection pools instead of thread counts. Kafka poll runs on a single
+    bridge thread; annotation stays on the annotate backend's workers.
+    
+    Batching, backpressure (partition pausing) and offset commits are inherited;
+    the in-flight limit is its own (async_max_inflight_batches), by default
+    enough batches per topic to keep the inference connection pool busy.
+    Offset state is only touched on the loop: rebalance revokes, which arrive
+    on the poll bridge thread, are handed to it.
+    """
+
+    def __init__(self):
+        super().__init__()
+        # Each in-flight batch holds one connection per chunk of 25 frames
+        # (the inference service's request limit)
+        chunks_per_batch = -(-settings.batch_size // 25)
+        self.max_inflight_batches = settings.async_max_inflight_batches or max(
+            1, settings.inference_max_connections // (chunks_per_batch * len(self.topics))
+        )
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.async_http_client: Optional[httpx.AsyncClient] = None
+        self.async_s3_client = None
+        self.upload_semaphore: Optional[asyncio.Semaphore] = None
+        self.poll_executor: Optional[ThreadPoolExecutor] = None
+        self.annotate_executor: Optional[ThreadPoolExecutor] = None
+        self.copy_tasks: set = set()
+
+    def submit_batch_job(self, batch: List[dict], topic: str) -> asyncio.Task:
+        """Schedule a batch on the event loop; the task resolves to True/False."""
+        return asyncio.ensure_future(self.process_batch_async(batch, topic))
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=1, max=10),
+    )
+    async def call_inference_service_chunk_async(
+        self,
+        chunk: List[dict],
+        stream_id: str,
+    ) -> Union[InferenceResponse, ColumnarInferenceResponse]:
+        """Call inference service with a single chunk of frames (max 25)."""
+        path, request = self.inference_request(chunk, stream_id)
+        return self.parse_inference_response(await self.async_http_client.post(path, **request))
+
+    async def call_inference_service_async(self, batch: List[dict]) -> List[tuple]:
+        """Call inference service for all chunks of a batch concurrently. Returns (chunk, response) tuples."""
+        stream_id = batch[0]["stream_id"]
+        max_chunk_size = 25  # Inference service limit
+        
+        chunks = [batch[i:i + max_chunk_size] for i in range(0, len(batch), max_chunk_size)]
+        responses = await gather_all(
+            *(self.call_inference_service_chunk_async(chunk, stream_id) for chunk in chunks)
+        )
+        return list(zip(chunks, responses))
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=1, max=10),
+    )
+    async def upload_to_s3_async(self, image_bytes: bytes, key: str, bucket: str):
+        """Upload image to S3 with retry."""
+        await self.async_s3_client.put_object(
+            Bucket=bucket,
+            Key=key,
+            Body=image_bytes,
+            ContentType="image/jpeg",
+        )
+        logger.debug("Uploaded to S3", bucket=bucket, key=key)
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=1, max=10),
+    )
+    async def copy_in_s3_async(self, source_bucket: str, key: str, bucket: str):
+        """Server-side copy of an annotated frame to another bucket, with retry."""
+        await self.async_s3_client.copy_object(
+            Bucket=bucket,
+            Key=key,
+            CopySource={"Bucket": source_bucket, "Key": key},
+        )
+        logger.debug("Copied in S3", source_bucket=source_bucket, bucket=bucket, key=key)
+
+    async def copy_duplicate_async(self, frame_msg: dict, source_bucket: str, key: str, bucket: str):
+        """Fan a processed frame out to a duplicate's bucket; the duplicate is done either way."""
+        try:
+            async with self.upload_semaphore:
+                with upload_metrics(bucket):
+                    await self.copy_in_s3_async(source_bucket, key, bucket)
+        except Exception as e:
+            logger.error("Duplicate frame copy failed", topic=frame_msg["_topic"], bucket=bucket, error=str(e))
+        finally:
+            self.mark_frame_done(frame_msg)
+
+    def schedule_copy(self, frame_msg: dict, source_bucket: str, key: str, bucket: str):
+        """Run a duplicate's copy as a task on the loop."""
+        task = asyncio.ensure_future(self.copy_duplicate_async(frame_msg, source_bucket, key, bucket))
+        self.copy_tasks.add(task)
+        task.add_done_callback(self.copy_tasks.discard)
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=0.5, min=0.5, max=2),
+    )
+    async def fetch_from_s3_async(self, bucket: str, key: str) -> bytes:
+        """Download an object with retry (the producer uploads full-res copies asynchronously)."""
+        response = await self.async_s3_client.get_object(Bucket=bucket, Key=key)
+        async with response["Body"] as body:
+            return await body.read()
+
+    async def render_source_async(self, task: AnnotateTask) -> Tuple[bytes, DetectionArrays]:
+        """render_source with the full-resolution copy fetched through the async S3 client."""
+        source = self.full_res_source(task.frame_msg)
+        if source is None:
+            return task.frame_bytes, task.detections
+        try:
+            frame_bytes = await self.fetch_from_s3_async(*source)
+        except Exception as e:
+            FULL_RES_RENDERS.labels(result="fallback").inc()
+            logger.warning("Full-resolution frame unavailable, drawing on sent frame", key=source[1], error=str(e))
+            return task.frame_bytes, task.detections
+        FULL_RES_RENDERS.labels(result="full_res").inc()
+        return frame_bytes, self.full_res_detections(task.frame_msg, task.detections)
+
+    async def annotate_and_upload(self, task: AnnotateTask):
+        """Annotate one frame off the loop, then upload it (at most s3_upload_workers PUTs at once)."""
+        loop = asyncio.get_running_loop()
+        frame_bytes, detections = await self.render_source_async(task)
+        image_bytes = await loop.run_in_executor(
+            self.annotate_executor, self.annotate, frame_bytes, detections
+        )
+        async with self.upload_semaphore:
+            with upload_metrics(task.job.bucket):
+                await self.upload_to_s3_async(image_bytes, task.key, task.job.bucket)
+
+    async def process_batch_async(self, batch: List[dict], topic: str) -> bool:
+        """
+        Process a batch of frames: inference + post-processing + S3 upload.
+        Returns True on success, False on failure.
+        """
+        job = BatchJob(batch, topic, self.topic_bucket_mapping.get(topic, settings.s3_bucket))
+        
+        logger.info(
+            "Processing batch (async)",
+            topic=topic,
+            stream_id=job.stream_id,
+            batch_size=len(batch),
+            target_bucket=job.bucket,
+        )
+        
+        try:
+            chunk_results = await self.call_inference_service_async(batch)
+            tasks = self.build_annotate_tasks(job, chunk_results)
+            await gather_all(*(self.annotate_and_upload(task) for task in tasks))
+        except httpx.HTTPStatusError as e:
+            logger.error(
+                "Inference service error",
+                topic=topic,
+                status_code=e.response.status_code,
+                detail=e.response.text,
+            )
+            self.finish_job(job, False)
+            return False
+        except Exception as e:
+            logger.error("Batch processing failed", topic=topic, error=str(e))
+            self.finish_job(job, False)
+            return False
+        
+        self.finish_job(job, True)
+        return True
+
+    def _on_revoke(self, consumer, partitions):
+        """
+        Revoke callback. From the poll bridge thread, run it on the loop (which
+        owns offset state) and wait, so the commit still precedes the
+        rebalance; consumer.close() on the loop calls it there directly.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run_coroutine_threadsafe(self._on_revoke_async(consumer, partitions), self.loop).result()
+            return
+        super()._on_revoke(consumer, partitions)
+
+    async def _on_revoke_async(self, consumer, partitions):
+        super()._on_revoke(consumer, partitions)
+
+    def request_stop(self):
+        """Signal handler: leave the poll loop and shut down gracefully."""
+        logger.info("Shutdown signal received")
+        self.running = False
+
+    async def run(self):
+        """Run the consumer loop on the event loop until stopped."""
+        from aiobotocore.config import AioConfig
+        from aiobotocore.session import get_session
+        
+        loop = asyncio.get_running_loop()
+        self.loop = loop
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.request_stop)
+        
+        self.running = True
+        self.consumer = self._init_kafka_consumer()
+        start_http_server(settings.metrics_port)
+        
+        self.poll_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kafka-poll")
+        self.annotate_executor = ThreadPoolExecutor(
+            max_workers=settings.annotate_workers,
+            thread_name_prefix="annotate",
+        )
+        if settings.annotate_backend == "process":
+            self.annotator = SharedMemoryAnnotator(settings.annotate_workers)
+        self.upload_semaphore = asyncio.Semaphore(settings.s3_upload_workers)
+        self.async_http_client = httpx.AsyncClient(
+            base_url=settings.inference_service_url,
+            timeout=settings.inference_timeout,
+            limits=httpx.Limits(
+                max_connections=settings.inference_max_connections,
+                max_keepalive_connections=settings.inference_max_connections,
+            ),
+        )
+        s3_config = AioConfig(
+            region_name=settings.aws_region,
+            retries={"max_attempts": 3, "mode": "adaptive"},
+            max_pool_connections=settings.s3_upload_workers,
+        )
+        
+        async with get_session().create_client("s3", config=s3_config) as s3_client:
+            self.async_s3_client = s3_client
+            
+            logger.info(
+                "Starting frame processor (asyncio mode)",
+                kafka_topics=self.topics,
+                topic_bucket_mapping=self.topic_bucket_mapping,
+                inference_url=settings.inference_service_url,
+                inference_transport=settings.inference_transport,
+                batch_size=settings.batch_size,
+                max_inflight_batches=self.max_inflight_batches,
+                inference_max_connections=settings.inference_max_connections,
+                annotate_backend=settings.annotate_backend,
+                annotate_workers=settings.annotate_workers,
+                s3_upload_workers=settings.s3_upload_workers,
+            )
+            
+            while self.running:
+                try:
+                    # Clean up completed batch tasks (frees slots, commits offsets)
+                    self.cleanup_completed_futures()
+                    
+                    # Poll on the bridge thread so the loop keeps serving in-flight calls
+                    msg = await loop.run_in_executor(self.poll_executor, self.consumer.poll, 0.5)
+                    
+                    if msg is None:
+                        # No message, check if any batches should be flushed due to timeout
+                        self.check_and_submit_timeouts()
+                        continue
+                    
+                    self.handle_message(msg)
+                    
+                except Exception as e:
+                    logger.error("Error in consumer loop", error=str(e))
+                    await asyncio.sleep(1)
+            
+            await self.stop_async()
+
+    async def stop_async(self):
+        """Finish in-flight and buffered batches, commit, and release clients."""
+        logger.info("Stopping frame processor...")
+        
+        # Wait for pending batch tasks to complete
+        if self.pending_futures:
+            logger.info("Waiting for pending batch processing to complete", pending_count=len(self.pending_futures))
+            await asyncio.wait([task for task, _, _ in self.pending_futures], timeout=30)
+            for task, topic, batch in self.pending_futures:
+                if task.done():
+                    self.mark_batch_done(batch)
+                else:
+                    logger.error("Pending batch failed", topic=topic, error="timed out")
+        
+        # Process remaining batches for all topics
+        for topic in self.topics:
+            if self.batches[topic]:
+                logger.info("Processing remaining batch", topic=topic, batch_size=len(self.batches[topic]))
+                await self.process_batch_async(self.batches[topic], topic)
+                self.mark_batch_done(self.batches[topic])
+        
+        # Let duplicate fan-out copies land before the final commit
+        if self.copy_tasks:
+            await asyncio.wait(list(self.copy_tasks), timeout=30)
+        
+        self.poll_executor.shutdown(wait=True)
+        self.annotate_executor.shutdown(wait=True)
+        if self.annotator:
+            self.annotator.shutdown()
+            self.annotator = None
+        
+        # Final offset commit (processed positions only)
+        if self.consumer:
+            self.commit_offsets(asynchronous=False)
+            self.consumer.close()
+            logger.info("Kafka consumer closed")
+        
+        await self.async_http_client.aclose()
+        
+        logger.info(
+            "Frame processor stopped",
+            frames_processed=self.frames_processed,
+            batches_processed=self.batches_processed,
+            frames_per_topic=self.frames_per_topic,
+        )
+
+
 def main():
+    if settings.consumer_mode == "asyncio":
+        asyncio.run(AsyncFrameProcessor().run())
+        return
+    
     processor = FrameProcessor()
     
     # Handle graceful shutdown
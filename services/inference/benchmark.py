@@ -0,0 +1,461 @@
+"""
+Inference Benchmarks: Offline latency and accuracy comparisons for the inference service.
+
+Detections from the PyTorch .pt model are used as the reference; other
+variants are scored against them (mAP@0.5), so "drift" is the accuracy lost
+relative to the production baseline rather than against human labels.
+
+Usage:
+    python benchmark.py backends --video ../../test-data/sample.mp4
+    python benchmark.py backends --backend onnx --frames 100
+    python benchmark.py quantization --reference-model yolov8m.pt --output quantization_report.md
+    python benchmark.py decode --iterations 200
+    python benchmark.py tracking --video ../../test-data/sample.mp4 --intervals 3 5 10
+"""
+
+import argparse
+import io
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+from ultralytics import YOLO
+
+# services/common in a checkout; the image copies synthetic.py next to this file
+sys.path.append(str(Path(__file__).resolve().parent.parent / "common"))
+
+from export_model import quantize_model, sample_frames
+from main import (
+    MODEL_BACKENDS,
+    TrackingSession,
+    build_detections,
+    decode_frame,
+    decode_frame_for_model,
+    export_model,
+    settings,
+    tracking_grays,
+)
+from synthetic import synthetic_jpeg
+
+# Per-frame detections: boxes (N, 4) xyxy, scores (N,), class ids (N,)
+Detections = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def predict_all(
+    model: YOLO,
+    frames: List[np.ndarray],
+    batch_size: int,
+    imgsz: int,
+    conf: float,
+) -> Tuple[List[Detections], float]:
+    """Run the model over all frames in batches. Returns detections and ms per frame."""
+    # Warm up outside the timed region
+    model.predict(frames[:batch_size], imgsz=imgsz, conf=conf, verbose=False)
+
+    detections = []
+    start_time = time.perf_counter()
+    for i in range(0, len(frames), batch_size):
+        results = model.predict(frames[i:i + batch_size], imgsz=imgsz, conf=conf, verbose=False)
+        for result in results:
+            detections.append((
+                result.boxes.xyxy.cpu().numpy(),
+                result.boxes.conf.cpu().numpy(),
+                result.boxes.cls.cpu().numpy().astype(int),
+            ))
+    elapsed = time.perf_counter() - start_time
+
+    return detections, elapsed * 1000 / len(frames)
+
+
+def box_iou(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU between two sets of xyxy boxes."""
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(boxes_a[:, 2:] - boxes_a[:, :2], axis=1)
+    area_b = np.prod(boxes_b[:, 2:] - boxes_b[:, :2], axis=1)
+    return intersection / np.maximum(area_a[:, None] + area_b[None, :] - intersection, 1e-9)
+
+
+def match_class(
+    reference: List[Detections],
+    candidate: List[Detections],
+    class_id: int,
+    iou_threshold: float,
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    Greedily match candidate boxes of one class to reference boxes per frame.
+
+    Returns candidate scores, a true-positive flag per candidate box and the
+    number of reference boxes for the class.
+    """
+    scores = []
+    hits = []
+    num_reference = 0
+
+    for (ref_boxes, _, ref_classes), (boxes, confs, classes) in zip(reference, candidate):
+        ref_boxes = ref_boxes[ref_classes == class_id]
+        mask = classes == class_id
+        boxes, confs = boxes[mask], confs[mask]
+        num_reference += len(ref_boxes)
+
+        order = np.argsort(-confs)
+        used = np.zeros(len(ref_boxes), dtype=bool)
+        ious = box_iou(boxes[order], ref_boxes) if len(boxes) and len(ref_boxes) else None
+
+        for rank, box_index in enumerate(order):
+            hit = False
+            if ious is not None:
+                free = np.where((ious[rank] >= iou_threshold) & ~used)[0]
+                if len(free):
+                    used[free[np.argmax(ious[rank][free])]] = True
+                    hit = True
+            scores.append(confs[box_index])
+            hits.append(hit)
+
+    return np.array(scores, dtype=float), np.array(hits, dtype=bool), num_reference
+
+
+def average_precision(scores: np.ndarray, hits: np.ndarray, num_reference: int) -> float:
+    """All-point interpolated average precision."""
+    if num_reference == 0:
+        return float("nan")
+    if len(scores) == 0:
+        return 0.0
+
+    hits = hits[np.argsort(-scores)]
+    tp = np.cumsum(hits)
+    fp = np.cumsum(~hits)
+    recall = np.concatenate(([0.0], tp / num_reference, [1.0]))
+    precision = np.concatenate(([1.0], tp / np.maximum(tp + fp, 1e-9), [0.0]))
+    precision = np.flip(np.maximum.accumulate(np.flip(precision)))
+    steps = np.where(recall[1:] != recall[:-1])[0]
+    return float(np.sum((recall[steps + 1] - recall[steps]) * precision[steps + 1]))
+
+
+def mean_average_precision(
+    reference: List[Detections],
+    candidate: List[Detections],
+    iou_threshold: float = 0.5,
+) -> float:
+    """mAP of candidate detections scored against reference detections."""
+    class_ids = sorted({int(c) for _, _, classes in reference for c in classes})
+    if not class_ids:
+        return float("nan")
+    aps = [
+        average_precision(*match_class(reference, candidate, class_id, iou_threshold))
+        for class_id in class_ids
+    ]
+    return float(np.nanmean(aps))
+
+
+def bench_backends(args):
+    """Compare latency and mAP drift of exported backends against PyTorch."""
+    frames = sample_frames(args.video, args.frames, args.stride)
+    print(f"Benchmarking {len(frames)} frames from {args.video} (imgsz={args.imgsz}, batch={args.batch_size})")
+
+    reference_model = YOLO(args.model)
+    reference, reference_ms = predict_all(
+        reference_model, frames, args.batch_size, args.imgsz, args.conf
+    )
+    rows = [("pytorch", reference_ms, 1.0)]
+
+    for backend in args.backend or [name for name, fmt in MODEL_BACKENDS.items() if fmt]:
+        artifact = export_model(args.model, backend, args.cache_dir, args.imgsz)
+        model = YOLO(str(artifact), task="detect")
+        detections, ms_per_frame = predict_all(model, frames, args.batch_size, args.imgsz, args.conf)
+        rows.append((backend, ms_per_frame, mean_average_precision(reference, detections)))
+
+    print(f"\n{'backend':<12}{'ms/frame':>10}{'speedup':>10}{'mAP50 vs pt':>14}{'drift':>9}")
+    for backend, ms_per_frame, map50 in rows:
+        print(
+            f"{backend:<12}{ms_per_frame:>10.1f}{reference_ms / ms_per_frame:>9.2f}x"
+            f"{map50:>14.3f}{1 - map50:>9.3f}"
+        )
+
+
+def per_class_precision(
+    reference: List[Detections],
+    candidate: List[Detections],
+    class_ids: List[int],
+    iou_threshold: float = 0.5,
+) -> dict:
+    """Precision of candidate detections per class, matched against reference detections."""
+    precision = {}
+    for class_id in class_ids:
+        _, hits, _ = match_class(reference, candidate, class_id, iou_threshold)
+        precision[class_id] = float(hits.mean()) if len(hits) else float("nan")
+    return precision
+
+
+def bench_quantization(args):
+    """Write a Markdown report comparing the INT8 model against the FP32 .pt baseline."""
+    if args.reference_model == args.model:
+        # Scoring FP32 against its own detections would always give precision 1.0
+        raise SystemExit("--reference-model must be a different (larger) model than --model")
+    frames = sample_frames(args.video, args.frames, args.stride)
+
+    baseline_model = YOLO(args.model)
+    baseline, baseline_ms = predict_all(baseline_model, frames, args.batch_size, args.imgsz, args.conf)
+
+    # Pseudo-labels from a larger model, so FP32 and INT8 are both scored
+    reference_model = YOLO(args.reference_model)
+    reference, _ = predict_all(reference_model, frames, args.batch_size, args.imgsz, args.conf)
+
+    int8_path = quantize_model(
+        args.model,
+        args.cache_dir,
+        args.imgsz,
+        args.calibration_video or args.video,
+        args.calibration_frames,
+        args.calibration_stride,
+    )
+    int8_model = YOLO(str(int8_path), task="detect")
+    int8, int8_ms = predict_all(int8_model, frames, args.batch_size, args.imgsz, args.conf)
+
+    class_ids = sorted({int(c) for _, _, classes in reference for c in classes})
+    baseline_precision = per_class_precision(reference, baseline, class_ids)
+    int8_precision = per_class_precision(reference, int8, class_ids)
+    names = baseline_model.names
+
+    lines = [
+        "# INT8 Quantization Report",
+        "",
+        f"- Baseline: `{args.model}` (PyTorch FP32)",
+        f"- Quantized: `{int8_path.name}` (ONNX Runtime, static INT8 QDQ)",
+        f"- Evaluation: {len(frames)} frames from `{args.video}` (every {args.stride}th frame)",
+        f"- Reference labels: `{args.reference_model}`, IoU >= 0.5, conf >= {args.conf}",
+        "",
+        "## Throughput",
+        "",
+        "| Model | ms/frame | frames/s | Gain |",
+        "|-------|---------:|---------:|-----:|",
+        f"| FP32 (PyTorch) | {baseline_ms:.1f} | {1000 / baseline_ms:.1f} | 1.00x |",
+        f"| INT8 (ONNX Runtime) | {int8_ms:.1f} | {1000 / int8_ms:.1f} | {baseline_ms / int8_ms:.2f}x |",
+        "",
+        "## Accuracy",
+        "",
+        f"- mAP@0.5 FP32: {mean_average_precision(reference, baseline):.3f}",
+        f"- mAP@0.5 INT8: {mean_average_precision(reference, int8):.3f}",
+        "",
+        "| Class | Precision FP32 | Precision INT8 | Delta |",
+        "|-------|---------------:|---------------:|------:|",
+    ]
+    for class_id in class_ids:
+        fp32_value, int8_value = baseline_precision[class_id], int8_precision[class_id]
+        lines.append(
+            f"| {names[class_id]} | {fp32_value:.3f} | {int8_value:.3f} | {int8_value - fp32_value:+.3f} |"
+        )
+
+    report = "\n".join(lines) + "\n"
+    with open(args.output, "w") as f:
+        f.write(report)
+    print(report)
+    print(f"Report written to {args.output}")
+
+
+def decode_pil(image_bytes: bytes) -> np.ndarray:
+    """Previous decode path: PIL decode, NumPy copy, RGB->BGR conversion."""
+    image = Image.open(io.BytesIO(image_bytes))
+    return cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+
+
+def time_per_call(func, arg, iterations: int) -> float:
+    """Average milliseconds per call."""
+    func(arg)
+    start_time = time.perf_counter()
+    for _ in range(iterations):
+        func(arg)
+    return (time.perf_counter() - start_time) * 1000 / iterations
+
+
+def bench_decode(args):
+    """
+    Per-frame decode cost of PIL vs cv2.imdecode vs the reduced-resolution model
+    decode, and batch throughput of the decode pool.
+    """
+    print(f"{'resolution':<12}{'KB':>7}{'PIL ms':>9}{'cv2 ms':>9}{'saved':>8}{'reduced ms':>12}"
+          f"{'batch serial ms':>17}{'batch pool ms':>15}")
+    for label, width, height in (("720p", 1280, 720), ("1080p", 1920, 1080), ("2160p", 3840, 2160)):
+        image_bytes = synthetic_jpeg(width, height, args.quality)
+        pil_ms = time_per_call(decode_pil, image_bytes, args.iterations)
+        cv2_ms = time_per_call(decode_frame, image_bytes, args.iterations)
+        reduced_ms = time_per_call(decode_frame_for_model, image_bytes, args.iterations)
+
+        batch = [image_bytes] * args.batch_size
+        serial_ms = time_per_call(lambda frames: [decode_frame(f) for f in frames], batch, 5)
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            pool_ms = time_per_call(lambda frames: list(pool.map(decode_frame, frames)), batch, 5)
+
+        print(
+            f"{label:<12}{len(image_bytes) / 1024:>7.0f}{pil_ms:>9.2f}{cv2_ms:>9.2f}"
+            f"{(1 - cv2_ms / pil_ms) * 100:>7.0f}%{reduced_ms:>12.2f}{serial_ms:>17.1f}{pool_ms:>15.1f}"
+        )
+
+
+def recall_precision(reference: List[Detections], candidate: List[Detections]) -> Tuple[float, float]:
+    """Share of reference boxes matched (IoU >= 0.5, same class) and share of candidate boxes that match."""
+    class_ids = sorted({int(c) for _, _, classes in reference + candidate for c in classes})
+    matched = predicted = num_reference = 0
+    for class_id in class_ids:
+        _, hits, class_reference = match_class(reference, candidate, class_id, 0.5)
+        matched += int(hits.sum())
+        predicted += len(hits)
+        num_reference += class_reference
+    return matched / max(num_reference, 1), matched / max(predicted, 1)
+
+
+def run_tracking(
+    model: YOLO,
+    frames: List[np.ndarray],
+    max_interval: int,
+    args,
+) -> Tuple[List[Detections], int, float]:
+    """
+    Replay frames through a TrackingSession in consumer-sized batches, as the service does.
+    
+    Returns detections per frame, the number of keyframes and CPU ms per frame.
+    """
+    session = TrackingSession(max_interval, args.min_interval, args.scene_change_threshold)
+    detections = []
+    keyframes = 0
+    start_cpu = time.process_time()
+    
+    for i in range(0, len(frames), args.stream_batch):
+        batch = frames[i:i + args.stream_batch]
+        grays = tracking_grays(batch)
+        shapes = [frame.shape[:2] for frame in batch]
+        flags = session.plan(grays, shapes)
+        keyframe_frames = [frame for frame, keyframe in zip(batch, flags) if keyframe]
+        keyframe_outputs = []
+        for j in range(0, len(keyframe_frames), args.batch_size):
+            results = model.predict(
+                keyframe_frames[j:j + args.batch_size], imgsz=args.imgsz, conf=args.conf, verbose=False
+            )
+            keyframe_outputs.extend((build_detections(result), 0.0) for result in results)
+        
+        for frame_detections, _, _ in session.propagate(grays, shapes, flags, keyframe_outputs):
+            detections.append((frame_detections.boxes, frame_detections.confidences, frame_detections.class_ids))
+        keyframes += sum(flags)
+    
+    return detections, keyframes, (time.process_time() - start_cpu) * 1000 / len(frames)
+
+
+def bench_tracking(args):
+    """
+    Detection recall and CPU per stream of tracking mode against always-detect.
+    
+    Frames are consecutive at --stride (3 turns a 30 fps video into the 10 fps
+    a producer sends); always-detect output is the reference. CPU is process
+    time, so it includes every thread the model runtime uses.
+    """
+    frames = sample_frames(args.video, args.frames, args.stride)
+    model = YOLO(args.model)
+    model.predict(frames[:args.batch_size], imgsz=args.imgsz, conf=args.conf, verbose=False)
+    
+    reference = []
+    start_cpu = time.process_time()
+    for i in range(0, len(frames), args.batch_size):
+        results = model.predict(frames[i:i + args.batch_size], imgsz=args.imgsz, conf=args.conf, verbose=False)
+        for result in results:
+            detections = build_detections(result)
+            reference.append((detections.boxes, detections.confidences, detections.class_ids))
+    reference_cpu_ms = (time.process_time() - start_cpu) * 1000 / len(frames)
+    
+    print(
+        f"{len(frames)} frames from {args.video} (every {args.stride}th), "
+        f"batches of {args.stream_batch}, CPU cores per stream at {args.fps} fps"
+    )
+    print(f"{'mode':<16}{'keyframes':>11}{'recall':>9}{'precision':>11}{'CPU ms/frame':>14}{'cores':>8}{'saved':>8}")
+    print(
+        f"{'always-detect':<16}{len(frames):>11}{1.0:>9.3f}{1.0:>11.3f}"
+        f"{reference_cpu_ms:>14.1f}{reference_cpu_ms * args.fps / 1000:>8.2f}{0:>7.0f}%"
+    )
+    for max_interval in args.intervals:
+        detections, keyframes, cpu_ms = run_tracking(model, frames, max_interval, args)
+        recall, precision = recall_precision(reference, detections)
+        print(
+            f"{f'track N<={max_interval}':<16}{keyframes:>11}{recall:>9.3f}{precision:>11.3f}"
+            f"{cpu_ms:>14.1f}{cpu_ms * args.fps / 1000:>8.2f}{(1 - cpu_ms / reference_cpu_ms) * 100:>7.0f}%"
+        )
+
+
+def add_common_arguments(parser: argparse.ArgumentParser):
+    """Arguments shared by the model benchmarks."""
+    parser.add_argument("--video", type=str, default="../../test-data/sample.mp4", help="Source video")
+    parser.add_argument("--frames", type=int, default=200, help="Number of frames to sample")
+    parser.add_argument("--stride", type=int, default=3, help="Sample every Nth frame")
+    parser.add_argument("--model", type=str, default=settings.model_name, help="Reference .pt weights")
+    parser.add_argument("--imgsz", type=int, default=settings.model_imgsz, help="Model input size")
+    parser.add_argument("--batch-size", type=int, default=settings.predict_batch_size, help="Frames per forward pass")
+    parser.add_argument("--conf", type=float, default=settings.confidence_threshold, help="Confidence threshold")
+    parser.add_argument("--cache-dir", type=str, default=settings.model_cache_dir, help="Exported model cache")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inference service benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    backends = subparsers.add_parser("backends", help="Compare PyTorch, ONNX Runtime and OpenVINO")
+    add_common_arguments(backends)
+    backends.add_argument(
+        "--backend",
+        type=str,
+        action="append",
+        choices=[name for name, fmt in MODEL_BACKENDS.items() if fmt],
+        help="Backend(s) to compare against PyTorch (default: all)",
+    )
+    backends.set_defaults(func=bench_backends)
+
+    quantization = subparsers.add_parser("quantization", help="INT8 vs FP32 accuracy/latency report")
+    add_common_arguments(quantization)
+    quantization.add_argument(
+        "--reference-model",
+        type=str,
+        default="yolov8m.pt",
+        help="Larger model whose detections are the reference labels (must differ from --model)",
+    )
+    quantization.add_argument("--calibration-video", type=str, default=None, help="Defaults to --video")
+    quantization.add_argument("--calibration-frames", type=int, default=128, help="Calibration frame count")
+    quantization.add_argument("--calibration-stride", type=int, default=5, help="Calibration sampling stride")
+    quantization.add_argument("--output", type=str, default="quantization_report.md", help="Report path")
+    quantization.set_defaults(func=bench_quantization)
+
+    decode = subparsers.add_parser("decode", help="JPEG decode micro-benchmark at 720p, 1080p and 4K")
+    decode.add_argument("--iterations", type=int, default=100, help="Decodes per measurement")
+    decode.add_argument("--quality", type=int, default=85, help="JPEG quality of the synthetic frames")
+    decode.add_argument("--batch-size", type=int, default=25, help="Frames per batch for the pool test")
+    decode.add_argument("--workers", type=int, default=settings.decode_workers, help="Decode pool size")
+    decode.set_defaults(func=bench_decode)
+    
+    tracking = subparsers.add_parser("tracking", help="Tracking mode recall and CPU vs always-detect")
+    add_common_arguments(tracking)
+    tracking.add_argument(
+        "--intervals",
+        type=int,
+        nargs="+",
+        default=[3, settings.tracking_max_interval, 10],
+        help="Max keyframe intervals (N) to compare",
+    )
+    tracking.add_argument("--min-interval", type=int, default=settings.tracking_min_interval, help="Min N")
+    tracking.add_argument(
+        "--scene-change-threshold",
+        type=float,
+        default=settings.tracking_scene_change_threshold,
+        help="Mean abs gray diff that forces a keyframe",
+    )
+    tracking.add_argument("--stream-batch", type=int, default=25, help="Frames per request, as sent by the consumer")
+    tracking.add_argument("--fps", type=float, default=10.0, help="Stream frame rate for the cores column")
+    tracking.set_defaults(func=bench_tracking)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
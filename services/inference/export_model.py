@@ -0,0 +1,172 @@
+"""
+Model Export: One-off conversion of the YOLO .pt weights to CPU runtime formats.
+
+Artifacts are cached in INFERENCE_MODEL_CACHE_DIR and reused by the inference
+service when INFERENCE_MODEL_BACKEND is set to onnx or openvino.
+
+INT8: --int8 runs ONNX Runtime static post-training quantization on top of the
+FP32 ONNX export, calibrated on frames sampled from a local video. The detect
+head is kept in FP32 since quantizing the box regression costs the most mAP.
+
+Usage:
+    python export_model.py --backend onnx
+    python export_model.py --backend openvino --imgsz 640
+    python export_model.py --backend onnx --int8 --calibration-video ../../test-data/sample.mp4
+"""
+
+import argparse
+from pathlib import Path
+from typing import List
+
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+from main import MODEL_BACKENDS, export_model, logger, model_artifact_path, settings
+
+
+def sample_frames(video_path: str, num_frames: int, stride: int) -> List[np.ndarray]:
+    """Read every stride-th frame from a video, up to num_frames frames."""
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Failed to open video: {video_path}")
+
+    frames = []
+    index = 0
+    while len(frames) < num_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if index % stride == 0:
+            frames.append(frame)
+        index += 1
+
+    cap.release()
+    if not frames:
+        raise RuntimeError(f"No frames read from video: {video_path}")
+    return frames
+
+
+def letterbox_tensor(frame: np.ndarray, imgsz: int) -> np.ndarray:
+    """Letterbox a BGR frame to imgsz x imgsz the way Ultralytics does; returns a 1x3xHxW float tensor."""
+    height, width = frame.shape[:2]
+    scale = min(imgsz / height, imgsz / width)
+    new_width, new_height = round(width * scale), round(height * scale)
+    resized = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    top = (imgsz - new_height) // 2
+    left = (imgsz - new_width) // 2
+    canvas[top:top + new_height, left:left + new_width] = resized
+
+    rgb = cv2.cvtColor(canvas, cv2.COLOR_BGR2RGB)
+    return np.ascontiguousarray(rgb.transpose(2, 0, 1)[None], dtype=np.float32) / 255.0
+
+
+def quantize_model(
+    model_name: str,
+    cache_dir: str,
+    imgsz: int,
+    calibration_video: str,
+    calibration_frames: int,
+    calibration_stride: int,
+) -> Path:
+    """Create a static INT8 (QDQ) ONNX model calibrated on frames from a local video."""
+    import onnx
+    from onnxruntime.quantization import (
+        CalibrationDataReader,
+        QuantFormat,
+        QuantType,
+        quantize_static,
+    )
+
+    target = model_artifact_path(model_name, "onnx", cache_dir, imgsz, "int8")
+    if target.exists():
+        return target
+
+    fp32_path = export_model(model_name, "onnx", cache_dir, imgsz)
+    fp32_model = onnx.load(str(fp32_path))
+    input_name = fp32_model.graph.input[0].name
+
+    # Keep the detect head (last module, e.g. "/model.22/") in FP32
+    head_prefix = f"/model.{len(YOLO(model_name).model.model) - 1}/"
+    excluded = [node.name for node in fp32_model.graph.node if node.name.startswith(head_prefix)]
+
+    frames = sample_frames(calibration_video, calibration_frames, calibration_stride)
+
+    class VideoCalibrationReader(CalibrationDataReader):
+        def __init__(self):
+            self.tensors = iter(letterbox_tensor(frame, imgsz) for frame in frames)
+
+        def get_next(self):
+            tensor = next(self.tensors, None)
+            return None if tensor is None else {input_name: tensor}
+
+    logger.info(
+        "Quantizing model to INT8",
+        source=str(fp32_path),
+        calibration_video=calibration_video,
+        calibration_frames=len(frames),
+        excluded_nodes=len(excluded),
+    )
+    quantize_static(
+        str(fp32_path),
+        str(target),
+        VideoCalibrationReader(),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+        nodes_to_exclude=excluded,
+    )
+    logger.info("Model quantized", artifact=str(target))
+    return target
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export YOLO model for CPU inference backends")
+    parser.add_argument(
+        "--backend",
+        type=str,
+        action="append",
+        choices=[name for name, fmt in MODEL_BACKENDS.items() if fmt],
+        help="Backend(s) to export for (repeatable)",
+    )
+    parser.add_argument("--model", type=str, default=settings.model_name, help="Source .pt weights")
+    parser.add_argument("--imgsz", type=int, default=settings.model_imgsz, help="Model input size")
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=settings.model_cache_dir,
+        help="Directory for exported artifacts",
+    )
+    parser.add_argument("--int8", action="store_true", help="Also build the INT8 quantized ONNX model")
+    parser.add_argument(
+        "--calibration-video",
+        type=str,
+        default="../../test-data/sample.mp4",
+        help="Local video to sample INT8 calibration frames from",
+    )
+    parser.add_argument("--calibration-frames", type=int, default=128, help="Calibration frame count")
+    parser.add_argument("--calibration-stride", type=int, default=5, help="Sample every Nth frame")
+
+    args = parser.parse_args()
+
+    for backend in args.backend or [settings.model_backend]:
+        artifact = export_model(args.model, backend, args.cache_dir, args.imgsz)
+        logger.info("Model artifact ready", backend=backend, artifact=str(artifact))
+
+    if args.int8:
+        artifact = quantize_model(
+            args.model,
+            args.cache_dir,
+            args.imgsz,
+            args.calibration_video,
+            args.calibration_frames,
+            args.calibration_stride,
+        )
+        logger.info("Model artifact ready", backend="onnx", precision="int8", artifact=str(artifact))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,28 +2,60 @@
 Inference Service: FastAPI-based object detection using YOLOv8.
 
 Endpoints:
-    POST /predict - Run inference on a batch of frames
+    POST /predict - Run inference on a batch of frames (base64 JPEG in JSON)
+    POST /predict/raw - Same, with raw JPEG multipart parts and a JSON metadata part
+    Both accept ?response_format=columnar for packed per-batch detection arrays.
     GET /health - Health check
     GET /metrics - Prometheus metrics
+
+Backends (INFERENCE_MODEL_BACKEND):
+    pytorch  - Ultralytics .pt weights run through PyTorch (default)
+    onnx     - Exported ONNX model run through ONNX Runtime on CPU
+    openvino - Exported OpenVINO IR model run through the OpenVINO runtime
+    Exported artifacts are produced offline with export_model.py and cached
+    in INFERENCE_MODEL_CACHE_DIR. INFERENCE_MODEL_PRECISION=int8 selects a
+    post-training quantized ONNX model (export_model.py --int8).
+
+Result cache (INFERENCE_RESULT_CACHE_*):
+    Detections are cached per frame content (LRU + TTL, bounded by entries and
+    bytes). exact mode keys on a hash of the JPEG bytes and is checked before
+    decode; perceptual mode keys on a difference hash of the decoded frame so
+    near-identical frames from static cameras also hit.
+
+Tracking mode (INFERENCE_TRACKING_*):
+    Per stream_id sessions run the detector only on keyframes (every N frames,
+    or when the scene changes) and propagate boxes to the frames in between
+    with pyramidal Lucas-Kanade optical flow. N adapts to the observed motion.
+    Each frame result reports source=detected or source=tracked. The result
+    cache is not used in this mode.
 """
 
+import asyncio
 import base64
-import io
+import binascii
+import hashlib
+import json
 import logging
+import queue
+import shutil
 import sys
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
-from typing import List, Optional
+from pathlib import Path
+from typing import Dict, List, Literal, NamedTuple, Optional, Union
 
 import cv2
 import numpy as np
 import structlog
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.responses import JSONResponse
-from PIL import Image
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
-from pydantic import BaseModel, Field
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from pydantic import BaseModel, Field, ValidationError
 from pydantic_settings import BaseSettings
+from starlette.datastructures import UploadFile
 from starlette.responses import Response
 from ultralytics import YOLO
 
@@ -54,9 +86,31 @@ logger = structlog.get_logger(__name__)
 # Settings
 class Settings(BaseSettings):
     model_name: str = "yolov8n.pt"  # Nano model for CPU
+    model_backend: str = "pytorch"  # pytorch, onnx or openvino
+    model_cache_dir: str = "models"  # Exported ONNX/OpenVINO artifacts
+    model_imgsz: int = 640  # Model input size (letterbox target)
+    model_precision: str = "fp32"  # fp32, or int8 (onnx backend only)
     confidence_threshold: float = 0.5
     max_batch_size: int = 25
+    predict_batch_size: int = 8  # Frames per model forward pass
     model_device: str = "cpu"
+    inference_workers: int = 1  # Concurrent blocking inference calls (one model instance each)
+    decode_workers: int = 4  # Threads decoding JPEG frames of a batch in parallel
+    reduced_decode: bool = True  # DCT-domain downscaled decode for frames larger than model_imgsz
+    inference_max_queue: int = 8  # Calls allowed to wait for a worker before 503
+    microbatch_enabled: bool = True  # Merge frames from concurrent requests
+    microbatch_max_delay_ms: float = 10.0  # Max time a frame waits for batch-mates
+    result_cache_enabled: bool = True  # Serve repeated frames from cached detections
+    result_cache_mode: str = "exact"  # exact (JPEG bytes hash) or perceptual (dHash of decoded frame)
+    result_cache_max_entries: int = 4096
+    result_cache_max_bytes: int = 64 * 1024 * 1024  # Bound on memory held by cached detections
+    result_cache_ttl_seconds: float = 300.0
+    result_cache_hash_size: int = 16  # Perceptual mode: dHash grid (hash_size^2 bits)
+    tracking_enabled: bool = False  # Detect on keyframes only, track boxes in between
+    tracking_max_interval: int = 5  # Upper bound for N (frames per keyframe) on slow scenes
+    tracking_min_interval: int = 1  # Lower bound for N on fast motion (1 = always detect)
+    tracking_scene_change_threshold: float = 0.12  # Mean abs gray diff vs last keyframe (0-1)
+    tracking_session_ttl_seconds: float = 120.0  # Idle streams drop their session
 
     class Config:
         env_prefix = "INFERENCE_"
@@ -79,6 +133,83 @@ FRAMES_PROCESSED = Counter(
     "frames_processed_total",
     "Total number of frames processed"
 )
+MODEL_BATCH_SIZE = Histogram(
+    "model_batch_size",
+    "Number of frames per model forward pass",
+    buckets=[1, 2, 4, 8, 16, 25, 32, 64]
+)
+MODEL_FORWARD_LATENCY = Histogram(
+    "model_forward_latency_seconds",
+    "Wall time of a single batched model forward pass",
+    buckets=[0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]
+)
+INFERENCE_QUEUE_DEPTH = Gauge(
+    "inference_queue_depth",
+    "Inference calls waiting for an executor worker"
+)
+INFERENCE_QUEUE_WAIT = Histogram(
+    "inference_queue_wait_seconds",
+    "Time inference calls (micro-batched: frames) spend waiting for an executor worker",
+    buckets=[0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+)
+INFERENCE_REJECTED = Counter(
+    "inference_rejected_total",
+    "Inference calls rejected because the queue was full"
+)
+FRAME_DECODE_LATENCY = Histogram(
+    "frame_decode_latency_seconds",
+    "JPEG decode time per frame",
+    buckets=[0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1]
+)
+FRAMES_DECODED = Counter(
+    "frames_decoded_total",
+    "Frames decoded, by DCT-domain downscale factor",
+    ["scale"]
+)
+MICROBATCH_QUEUE_FRAMES = Gauge(
+    "microbatch_queue_frames",
+    "Frames waiting in the micro-batching queue"
+)
+MICROBATCH_REQUESTS = Histogram(
+    "microbatch_requests_per_batch",
+    "Number of distinct requests merged into one micro-batch",
+    buckets=[1, 2, 3, 4, 6, 8, 12, 16]
+)
+RESULT_CACHE_LOOKUPS = Counter(
+    "result_cache_lookups_total",
+    "Per-frame result cache lookups",
+    ["result"]
+)
+RESULT_CACHE_HIT_RATIO = Gauge(
+    "result_cache_hit_ratio",
+    "Share of result cache lookups served from the cache since startup"
+)
+RESULT_CACHE_ENTRIES = Gauge(
+    "result_cache_entries",
+    "Frames currently held in the result cache"
+)
+RESULT_CACHE_BYTES = Gauge(
+    "result_cache_bytes",
+    "Approximate memory held by the result cache"
+)
+TRACKING_FRAMES = Counter(
+    "tracking_frames_total",
+    "Frames answered in tracking mode, by source (detected or tracked)",
+    ["source"]
+)
+TRACKING_STALE_FRAMES = Counter(
+    "tracking_stale_frames_total",
+    "Tracking-mode frames at or behind their session's last frame_number (detected outright)"
+)
+TRACKING_KEYFRAME_INTERVAL = Histogram(
+    "tracking_keyframe_interval",
+    "Adaptive keyframe interval (N) of a stream after each batch",
+    buckets=[1, 2, 3, 4, 5, 6, 8, 10, 15, 20]
+)
+TRACKING_SESSIONS = Gauge(
+    "tracking_sessions",
+    "Streams with live tracking session state"
+)
 DETECTIONS_TOTAL = Counter(
     "detections_total",
     "Total number of objects detected",
@@ -100,6 +231,18 @@ class BatchInferenceRequest(BaseModel):
     frames: List[FrameInput] = Field(..., min_length=1, max_length=25)
 
 
+class RawFrameMetadata(BaseModel):
+    """Per-frame metadata for /predict/raw; the JPEG travels as a separate part."""
+    frame_number: int
+    timestamp: Optional[str] = None
+
+
+class RawBatchMetadata(BaseModel):
+    """Metadata part of a /predict/raw multipart request."""
+    stream_id: str
+    frames: List[RawFrameMetadata] = Field(..., min_length=1, max_length=25)
+
+
 class BoundingBox(BaseModel):
     """Single bounding box detection."""
     x1: float
@@ -116,6 +259,7 @@ class FrameResult(BaseModel):
     frame_number: int
     detections: List[BoundingBox]
     inference_time_ms: float
+    source: Literal["detected", "tracked"] = "detected"
 
 
 class BatchInferenceResponse(BaseModel):
@@ -127,28 +271,614 @@ class BatchInferenceResponse(BaseModel):
     total_inference_time_ms: float
 
 
-# Global model instance
+class DetectionArrays(NamedTuple):
+    """Detections for one frame as packed arrays (internal and columnar representation)."""
+    boxes: np.ndarray  # (N, 4) float32 xyxy
+    confidences: np.ndarray  # (N,) float32
+    class_ids: np.ndarray  # (N,) int32
+
+
+EMPTY_DETECTIONS = DetectionArrays(
+    boxes=np.zeros((0, 4), dtype=np.float32),
+    confidences=np.zeros(0, dtype=np.float32),
+    class_ids=np.zeros(0, dtype=np.int32),
+)
+
+# Version tag of the columnar response layout
+COLUMNAR_FORMAT = "columnar-v1"
+
+
+# Model backends: backend name -> Ultralytics export format (None = native .pt)
+MODEL_BACKENDS = {
+    "pytorch": None,
+    "onnx": "onnx",
+    "openvino": "openvino",
+}
+
+
+MODEL_PRECISIONS = ("fp32", "int8")
+
+
+def model_artifact_path(
+    model_name: str,
+    backend: str,
+    cache_dir: str,
+    imgsz: int,
+    precision: str = "fp32",
+) -> Path:
+    """Return the cached artifact path for an exported backend model."""
+    if backend not in MODEL_BACKENDS:
+        raise ValueError(f"Unknown model backend: {backend}")
+    if precision not in MODEL_PRECISIONS:
+        raise ValueError(f"Unknown model precision: {precision}")
+    
+    stem = Path(model_name).stem
+    if precision == "int8":
+        if backend != "onnx":
+            raise ValueError("INT8 precision is only supported with the onnx backend")
+        return Path(cache_dir) / f"{stem}_{imgsz}_int8.onnx"
+    if backend == "onnx":
+        return Path(cache_dir) / f"{stem}_{imgsz}.onnx"
+    if backend == "openvino":
+        # Ultralytics detects OpenVINO models by the _openvino_model suffix
+        return Path(cache_dir) / f"{stem}_{imgsz}_openvino_model"
+    return Path(model_name)
+
+
+def export_model(model_name: str, backend: str, cache_dir: str, imgsz: int) -> Path:
+    """
+    Export a .pt model to the given backend format, reusing a cached artifact.
+    
+    This is an offline step (see export_model.py); exported models use a
+    dynamic batch dimension so they work with batched predict calls.
+    """
+    target = model_artifact_path(model_name, backend, cache_dir, imgsz)
+    if MODEL_BACKENDS[backend] is None or target.exists():
+        return target
+    
+    logger.info("Exporting model", model_name=model_name, backend=backend, imgsz=imgsz)
+    exported = YOLO(model_name).export(
+        format=MODEL_BACKENDS[backend],
+        imgsz=imgsz,
+        dynamic=True,
+    )
+    
+    target.parent.mkdir(parents=True, exist_ok=True)
+    shutil.move(str(exported), str(target))
+    logger.info("Model exported", artifact=str(target))
+    return target
+
+
+def load_model(settings: Settings) -> YOLO:
+    """Load the configured model through its backend runtime."""
+    if settings.model_backend == "pytorch" and settings.model_precision == "fp32":
+        loaded = YOLO(settings.model_name)
+        loaded.to(settings.model_device)
+        return loaded
+    
+    artifact = model_artifact_path(
+        settings.model_name,
+        settings.model_backend,
+        settings.model_cache_dir,
+        settings.model_imgsz,
+        settings.model_precision,
+    )
+    if not artifact.exists():
+        int8_flag = " --int8" if settings.model_precision == "int8" else ""
+        raise RuntimeError(
+            f"Exported model not found at {artifact}; "
+            f"run: python export_model.py --backend {settings.model_backend}{int8_flag}"
+        )
+    return YOLO(str(artifact), task="detect")
+
+
+class MicroBatcher:
+    """
+    Merges frames from concurrent requests into shared model forward passes.
+    
+    Frames are queued with a per-frame future. A dispatcher task collects up to
+    predict_batch_size frames, waiting at most microbatch_max_delay_ms after the
+    first one, and runs them through run_inference_batch on the inference
+    executor. Each caller only awaits the futures of its own frames.
+    
+    Admission mirrors run_in_inference_executor, counted in frames: besides
+    the batches running on the max_concurrency workers, up to max_queue
+    batches' worth of frames may wait; beyond that submit() rejects with 503.
+    A request is always admitted when nothing is pending, however many
+    frames it has.
+    """
+
+    def __init__(self, max_batch_size: int, max_delay_seconds: float, max_concurrency: int, max_queue: int):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_delay_seconds = max_delay_seconds
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.slots = asyncio.Semaphore(max(1, max_concurrency))
+        self.max_pending_frames = (max(1, max_concurrency) + max_queue) * self.max_batch_size
+        self.pending_frames = 0  # Queued or in a running batch
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the dispatcher task on the running event loop."""
+        self.task = asyncio.create_task(self._dispatch_loop())
+
+    async def stop(self):
+        """Cancel the dispatcher task."""
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, frames: List[np.ndarray]) -> List[tuple[DetectionArrays, float]]:
+        """Queue frames for batched inference and wait for their results (503 when full)."""
+        if self.pending_frames and self.pending_frames + len(frames) > self.max_pending_frames:
+            INFERENCE_REJECTED.inc()
+            raise HTTPException(status_code=503, detail="Inference queue is full")
+        
+        loop = asyncio.get_running_loop()
+        request_token = object()
+        submit_time = time.time()
+        futures = []
+        self.pending_frames += len(frames)
+        for frame in frames:
+            future = loop.create_future()
+            futures.append(future)
+            self.queue.put_nowait((frame, future, request_token, submit_time))
+            MICROBATCH_QUEUE_FRAMES.inc()
+        
+        return list(await asyncio.gather(*futures))
+
+    async def _collect_batch(self) -> list:
+        """Wait for a first frame, then gather batch-mates until full or the delay expires."""
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_delay_seconds
+        
+        while len(batch) < self.max_batch_size:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        
+        MICROBATCH_QUEUE_FRAMES.dec(len(batch))
+        return batch
+
+    async def _dispatch_loop(self):
+        """Collect batches while a worker slot is free; frames accumulate while all are busy."""
+        while True:
+            await self.slots.acquire()
+            try:
+                batch = await self._collect_batch()
+            except BaseException:
+                self.slots.release()
+                raise
+            asyncio.create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch: list):
+        """Run one merged batch and resolve each frame's future."""
+        try:
+            # Skip frames whose callers have gone away
+            live = [item for item in batch if not item[1].done()]
+            if not live:
+                return
+            MICROBATCH_REQUESTS.observe(len({id(item[2]) for item in live}))
+            dispatch_time = time.time()
+            for *_, submit_time in live:
+                INFERENCE_QUEUE_WAIT.observe(dispatch_time - submit_time)
+            
+            try:
+                outputs = await run_in_inference_executor(
+                    run_inference_batch, [frame for frame, *_ in live]
+                )
+            except Exception as e:
+                for _, future, *_ in live:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            
+            for (_, future, *_), output in zip(live, outputs):
+                if not future.done():
+                    future.set_result(output)
+        finally:
+            self.pending_frames -= len(batch)
+            self.slots.release()
+
+
+class ResultCache:
+    """
+    LRU cache of per-frame detections keyed by frame content, with a TTL.
+    
+    Bounded by entry count and by approximate bytes held (detection arrays plus
+    per-entry overhead); least recently used entries are evicted first. Only
+    touched from the event loop, so it needs no lock.
+    """
+
+    ENTRY_OVERHEAD_BYTES = 256
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.entries: "OrderedDict[str, tuple[float, DetectionArrays, int]]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, keys: Dict[int, str]) -> Dict[int, DetectionArrays]:
+        """Cached detections for the frame indices whose key is present and fresh."""
+        now = time.time()
+        found = {}
+        for index, key in keys.items():
+            entry = self.entries.get(key)
+            if entry and now - entry[0] > self.ttl_seconds:
+                self._remove(key)
+                entry = None
+            if entry:
+                self.entries.move_to_end(key)
+                found[index] = entry[1]
+        
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        RESULT_CACHE_LOOKUPS.labels(result="hit").inc(len(found))
+        RESULT_CACHE_LOOKUPS.labels(result="miss").inc(len(keys) - len(found))
+        if self.hits + self.misses:
+            RESULT_CACHE_HIT_RATIO.set(self.hits / (self.hits + self.misses))
+        return found
+
+    def store(self, results: Dict[str, DetectionArrays]):
+        """Insert fresh results, evicting least recently used entries past the bounds."""
+        now = time.time()
+        for key, detections in results.items():
+            if key in self.entries:
+                self._remove(key)
+            size = (
+                detections.boxes.nbytes + detections.confidences.nbytes
+                + detections.class_ids.nbytes + len(key) + self.ENTRY_OVERHEAD_BYTES
+            )
+            self.entries[key] = (now, detections, size)
+            self.bytes += size
+        
+        while self.entries and (len(self.entries) > self.max_entries or self.bytes > self.max_bytes):
+            self._remove(next(iter(self.entries)))
+        RESULT_CACHE_ENTRIES.set(len(self.entries))
+        RESULT_CACHE_BYTES.set(self.bytes)
+
+    def _remove(self, key: str):
+        _, _, size = self.entries.pop(key)
+        self.bytes -= size
+
+
+# Tracking mode: optical flow runs on grayscale frames downscaled to this width
+TRACKING_WIDTH = 320
+# Median box motion per frame (fraction of the frame diagonal) above which N
+# is halved, and below which it grows by one
+TRACKING_MOTION_HIGH = 0.02
+TRACKING_MOTION_LOW = 0.005
+# Share of boxes the tracker lost within a batch that also halves N
+TRACKING_MAX_LOST = 0.3
+# Points a box needs after the forward-backward check to stay tracked
+TRACKING_MIN_POINTS = 3
+TRACKING_MAX_FB_ERROR = 1.0  # pixels
+LK_PARAMS = dict(
+    winSize=(15, 15),
+    maxLevel=2,
+    criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03),
+)
+
+
+def tracking_gray(frame: np.ndarray) -> np.ndarray:
+    """Grayscale frame downscaled to TRACKING_WIDTH for optical flow and scene-change checks."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    height, width = gray.shape
+    if width <= TRACKING_WIDTH:
+        return gray
+    size = (TRACKING_WIDTH, max(1, round(height * TRACKING_WIDTH / width)))
+    return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+
+
+def tracking_grays(frames: List[np.ndarray]) -> List[np.ndarray]:
+    """tracking_gray for a batch; runs on the decode pool."""
+    return [tracking_gray(frame) for frame in frames]
+
+
+def scene_change(reference: np.ndarray, gray: np.ndarray) -> float:
+    """Mean absolute difference of two tracking frames, from 0 (identical) to 1."""
+    return float(cv2.absdiff(reference, gray).mean()) / 255
+
+
+def box_points(gray: np.ndarray, box: np.ndarray) -> np.ndarray:
+    """Corner features inside a box (tracking-frame coordinates), or a 3x3 grid on flat regions."""
+    height, width = gray.shape
+    x1, y1 = max(int(box[0]), 0), max(int(box[1]), 0)
+    x2, y2 = min(int(np.ceil(box[2])), width), min(int(np.ceil(box[3])), height)
+    if x2 - x1 < 4 or y2 - y1 < 4:
+        return np.zeros((0, 2), dtype=np.float32)
+    
+    corners = cv2.goodFeaturesToTrack(gray[y1:y2, x1:x2], maxCorners=20, qualityLevel=0.01, minDistance=3)
+    if corners is not None and len(corners) >= TRACKING_MIN_POINTS:
+        return corners.reshape(-1, 2) + np.array([x1, y1], dtype=np.float32)
+    
+    xs = np.linspace(x1, x2, 5, dtype=np.float32)[1:-1]
+    ys = np.linspace(y1, y2, 5, dtype=np.float32)[1:-1]
+    return np.stack(np.meshgrid(xs, ys), axis=2).reshape(-1, 2)
+
+
+def track_boxes(
+    prev_gray: np.ndarray,
+    gray: np.ndarray,
+    boxes: np.ndarray,
+    factor: float,
+) -> tuple[np.ndarray, np.ndarray, List[float]]:
+    """
+    Propagate boxes (decoded-frame coordinates) from prev_gray to gray.
+    
+    Points inside each box are tracked with pyramidal Lucas-Kanade and kept
+    when they pass a forward-backward check; the box moves by their median
+    displacement and scales with the change in their spread. factor maps
+    tracking-frame to decoded-frame coordinates. Returns the moved boxes, a
+    mask of boxes still tracked and the motion of each as a fraction of the
+    frame diagonal.
+    """
+    scaled = boxes / factor
+    points = [box_points(prev_gray, box) for box in scaled]
+    counts = [len(box) for box in points]
+    moved = boxes.copy()
+    kept = np.zeros(len(boxes), dtype=bool)
+    motions = []
+    if not sum(counts):
+        return moved, kept, motions
+    
+    start = np.concatenate(points).reshape(-1, 1, 2)
+    end, status, _ = cv2.calcOpticalFlowPyrLK(prev_gray, gray, start, None, **LK_PARAMS)
+    back, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, prev_gray, end, None, **LK_PARAMS)
+    start, end, back = start.reshape(-1, 2), end.reshape(-1, 2), back.reshape(-1, 2)
+    good = (
+        (status.ravel() == 1)
+        & (back_status.ravel() == 1)
+        & (np.linalg.norm(start - back, axis=1) < TRACKING_MAX_FB_ERROR)
+    )
+    
+    height, width = gray.shape
+    diagonal = float(np.hypot(width, height))
+    offset = 0
+    for i, count in enumerate(counts):
+        selected = slice(offset, offset + count)
+        offset += count
+        mask = good[selected]
+        if mask.sum() < TRACKING_MIN_POINTS:
+            continue
+        
+        before, after = start[selected][mask], end[selected][mask]
+        shift = np.median(after - before, axis=0)
+        spread_before = np.median(np.linalg.norm(before - before.mean(axis=0), axis=1))
+        spread_after = np.median(np.linalg.norm(after - after.mean(axis=0), axis=1))
+        scale = float(np.clip(spread_after / spread_before, 0.8, 1.25)) if spread_before > 1 else 1.0
+        
+        x1, y1, x2, y2 = scaled[i]
+        center_x, center_y = (x1 + x2) / 2 + shift[0], (y1 + y2) / 2 + shift[1]
+        half_width, half_height = (x2 - x1) * scale / 2, (y2 - y1) * scale / 2
+        box = np.clip(
+            [center_x - half_width, center_y - half_height, center_x + half_width, center_y + half_height],
+            0,
+            [width, height, width, height],
+        )
+        # Boxes pushed out of the frame are lost
+        if box[2] - box[0] < 2 or box[3] - box[1] < 2:
+            continue
+        
+        moved[i] = box * factor
+        kept[i] = True
+        motions.append(float(np.hypot(*shift)) / diagonal)
+    
+    return moved, kept, motions
+
+
+class TrackingSession:
+    """
+    Detect-every-N state of one stream for tracking mode.
+    
+    plan() picks the keyframes of a batch before the detector runs: the first
+    frame, every interval-th frame, and any frame that differs from the last
+    keyframe by more than the scene-change threshold. propagate() then walks
+    the batch in order, taking detector output on keyframes and tracking the
+    previous frame's boxes elsewhere, and adapts the interval to the motion it
+    saw (halved on fast motion or lost boxes, grown by one on slow scenes).
+    Both run under `lock`; last_frame_number is the newest frame applied, so
+    frames of a batch that arrives late are kept out of the session.
+    """
+
+    def __init__(self, max_interval: int, min_interval: int, scene_change_threshold: float):
+        self.max_interval = max(1, max_interval)
+        self.min_interval = min(max(1, min_interval), self.max_interval)
+        self.scene_change_threshold = scene_change_threshold
+        self.interval = self.max_interval
+        self.lock = asyncio.Lock()
+        self.last_used = time.time()
+        self.reset()
+
+    def reset(self):
+        """Drop frame state so the next frame is a keyframe (after a failed batch)."""
+        self.last_frame_number = -1
+        self.frame_shape: Optional[tuple] = None
+        self.keyframe_gray: Optional[np.ndarray] = None
+        self.prev_gray: Optional[np.ndarray] = None
+        self.detections = EMPTY_DETECTIONS
+        self.since_keyframe = 0
+
+    def plan(self, grays: List[np.ndarray], shapes: List[tuple]) -> List[bool]:
+        """Keyframe flag per frame, in stream order."""
+        flags = []
+        for gray, shape in zip(grays, shapes):
+            keyframe = (
+                self.keyframe_gray is None
+                or shape != self.frame_shape
+                or self.since_keyframe + 1 >= self.interval
+                or scene_change(self.keyframe_gray, gray) > self.scene_change_threshold
+            )
+            if keyframe:
+                self.frame_shape = shape
+                self.keyframe_gray = gray
+                self.since_keyframe = 0
+            else:
+                self.since_keyframe += 1
+            flags.append(keyframe)
+        return flags
+
+    def propagate(
+        self,
+        grays: List[np.ndarray],
+        shapes: List[tuple],
+        flags: List[bool],
+        keyframe_outputs: List[tuple[DetectionArrays, float]],
+    ) -> List[tuple[DetectionArrays, float, bool]]:
+        """
+        (detections, inference_time_ms, tracked) per frame, in stream order.
+        
+        Tracked frames report the optical flow time as their inference time.
+        """
+        outputs = []
+        keyframe_outputs = iter(keyframe_outputs)
+        motions = []
+        tracked_boxes = 0
+        lost_boxes = 0
+        
+        for gray, shape, keyframe in zip(grays, shapes, flags):
+            if keyframe:
+                detections, inference_time = next(keyframe_outputs)
+            else:
+                start_time = time.time()
+                boxes, kept, box_motions = track_boxes(
+                    self.prev_gray, gray, self.detections.boxes, shape[1] / gray.shape[1]
+                )
+                detections = DetectionArrays(
+                    boxes=boxes[kept],
+                    confidences=self.detections.confidences[kept],
+                    class_ids=self.detections.class_ids[kept],
+                )
+                inference_time = (time.time() - start_time) * 1000
+                motions.extend(box_motions)
+                tracked_boxes += len(kept)
+                lost_boxes += int((~kept).sum())
+            
+            outputs.append((detections, inference_time, not keyframe))
+            self.prev_gray = gray
+            self.detections = detections
+        
+        self.adapt(motions, lost_boxes / tracked_boxes if tracked_boxes else 0.0)
+        return outputs
+
+    def adapt(self, motions: List[float], lost_ratio: float):
+        """
+        Update the keyframe interval from a batch's box motion.
+        
+        Batches without tracked boxes (empty scenes, or N at 1) count as slow,
+        so N probes upwards again and the next batch measures the motion.
+        """
+        motion = float(np.median(motions)) if motions else 0.0
+        if lost_ratio > TRACKING_MAX_LOST or motion > TRACKING_MOTION_HIGH:
+            self.interval = max(self.min_interval, self.interval // 2)
+        elif motion < TRACKING_MOTION_LOW:
+            self.interval = min(self.max_interval, self.interval + 1)
+        TRACKING_KEYFRAME_INTERVAL.observe(self.interval)
+
+
+# Global model instance (also the first inference worker's)
 model: Optional[YOLO] = None
 
+# Ultralytics predictors and runtime sessions are not safe to share between
+# concurrent predict() calls, so each inference worker thread owns a model:
+# lifespan loads one per worker and the executor initializer hands them out
+worker_models = threading.local()
+unclaimed_models: "queue.SimpleQueue[YOLO]" = queue.SimpleQueue()
+
+micro_batcher: Optional[MicroBatcher] = None
+
+# Bounded executor for blocking inference work
+inference_executor: Optional[ThreadPoolExecutor] = None
+inference_pending = 0
+
+# Thread pool for parallel JPEG decode
+decode_executor: Optional[ThreadPoolExecutor] = None
+
+# Per-frame detection cache for repeated frames
+result_cache: Optional[ResultCache] = None
+
+# Tracking mode session state by stream_id
+tracking_sessions: Dict[str, TrackingSession] = {}
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler."""
-    global model
+    global model, inference_executor, decode_executor, micro_batcher, result_cache
     
-    logger.info("Loading YOLO model", model_name=settings.model_name)
+    logger.info(
+        "Loading YOLO model",
+        model_name=settings.model_name,
+        backend=settings.model_backend,
+        precision=settings.model_precision,
+        predict_batch_size=settings.predict_batch_size,
+    )
     start_time = time.time()
     
     try:
-        model = YOLO(settings.model_name)
-        model.to(settings.model_device)
+        model = load_model(settings)
+        unclaimed_models.put(model)
+        for _ in range(settings.inference_workers - 1):
+            unclaimed_models.put(load_model(settings))
         
-        # Warm up the model
-        dummy_input = np.zeros((640, 640, 3), dtype=np.uint8)
-        model.predict(dummy_input, verbose=False)
+        # Warm up every instance with a full sub-batch
+        dummy_input = np.zeros((settings.model_imgsz, settings.model_imgsz, 3), dtype=np.uint8)
+        for _ in range(settings.inference_workers):
+            instance = unclaimed_models.get()
+            instance.predict(
+                [dummy_input] * max(1, settings.predict_batch_size),
+                imgsz=settings.model_imgsz,
+                verbose=False,
+            )
+            unclaimed_models.put(instance)
         
         load_time = time.time() - start_time
-        logger.info("Model loaded successfully", load_time_seconds=load_time)
+        logger.info(
+            "Model loaded successfully",
+            load_time_seconds=load_time,
+            instances=settings.inference_workers,
+        )
+        
+        inference_executor = ThreadPoolExecutor(
+            max_workers=settings.inference_workers,
+            thread_name_prefix="inference",
+            initializer=claim_worker_model,
+        )
+        decode_executor = ThreadPoolExecutor(
+            max_workers=settings.decode_workers,
+            thread_name_prefix="decode",
+        )
+        
+        if settings.microbatch_enabled:
+            micro_batcher = MicroBatcher(
+                max_batch_size=settings.predict_batch_size,
+                max_delay_seconds=settings.microbatch_max_delay_ms / 1000,
+                max_concurrency=settings.inference_workers,
+                max_queue=settings.inference_max_queue,
+            )
+            micro_batcher.start()
+        
+        # Tracked frames depend on the stream's previous frame, so tracking
+        # mode answers every frame through its session instead of the cache
+        if settings.result_cache_enabled and not settings.tracking_enabled:
+            result_cache = ResultCache(
+                max_entries=settings.result_cache_max_entries,
+                max_bytes=settings.result_cache_max_bytes,
+                ttl_seconds=settings.result_cache_ttl_seconds,
+            )
         
     except Exception as e:
         logger.error("Failed to load model", error=str(e))
@@ -157,6 +887,12 @@ async def lifespan(app: FastAPI):
     yield
     
     logger.info("Shutting down inference service")
+    if micro_batcher:
+        await micro_batcher.stop()
+    if inference_executor:
+        inference_executor.shutdown(wait=True)
+    if decode_executor:
+        decode_executor.shutdown(wait=True)
 
 
 # FastAPI app
@@ -168,100 +904,536 @@ app = FastAPI(
 )
 
 
-def decode_frame(frame_data: str) -> np.ndarray:
-    """Decode base64 frame to numpy array."""
+def decode_frame(frame_data: Union[str, bytes]) -> np.ndarray:
+    """Decode a frame (base64 string or raw JPEG bytes) straight to a BGR numpy array."""
     try:
-        image_bytes = base64.b64decode(frame_data)
-        image = Image.open(io.BytesIO(image_bytes))
-        return cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+        image_bytes = base64.b64decode(frame_data) if isinstance(frame_data, str) else frame_data
+        frame = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
     except Exception as e:
         logger.error("Failed to decode frame", error=str(e))
         raise ValueError(f"Invalid frame data: {str(e)}")
+    
+    if frame is None:
+        logger.error("Failed to decode frame", error="not a decodable image")
+        raise ValueError("Invalid frame data: not a decodable image")
+    return frame
+
+
+# JPEG start-of-frame markers (baseline, progressive, lossless, ...; not DHT/JPG/DAC)
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+# DCT-domain reduced decode flags by downscale factor
+REDUCED_DECODE_FLAGS = {
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+def jpeg_dimensions(image_bytes: bytes) -> Optional[tuple[int, int]]:
+    """Read (width, height) from the JPEG start-of-frame header without decoding."""
+    if image_bytes[:2] != b"\xff\xd8":
+        return None
+    
+    i = 2
+    while i + 9 <= len(image_bytes):
+        if image_bytes[i] != 0xFF:
+            return None
+        marker = image_bytes[i + 1]
+        if marker == 0xFF:
+            # Fill byte before a marker
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # Standalone markers carry no length
+            i += 2
+            continue
+        if marker in JPEG_SOF_MARKERS:
+            height = int.from_bytes(image_bytes[i + 5:i + 7], "big")
+            width = int.from_bytes(image_bytes[i + 7:i + 9], "big")
+            return width, height
+        i += 2 + int.from_bytes(image_bytes[i + 2:i + 4], "big")
+    
+    return None
+
+
+def reduced_decode_factor(width: int, height: int, imgsz: int) -> int:
+    """Largest DCT downscale (1, 2, 4 or 8) that keeps the long edge at or above imgsz."""
+    long_edge = max(width, height)
+    for factor in (8, 4, 2):
+        if long_edge // factor >= imgsz:
+            return factor
+    return 1
+
+
+def decode_frame_for_model(frame_data: Union[str, bytes]) -> tuple[np.ndarray, Optional[tuple[float, float]]]:
+    """
+    Decode a frame for inference, at reduced resolution when it exceeds the model input.
+    
+    YOLO letterboxes to model_imgsz anyway, so frames larger than that are
+    decoded at 1/2, 1/4 or 1/8 scale in the DCT domain. Returns the frame and
+    the (x, y) factors mapping its coordinates back to the original frame, or
+    None when it was decoded at full resolution.
+    """
+    image_bytes = base64.b64decode(frame_data) if isinstance(frame_data, str) else frame_data
+    dimensions = jpeg_dimensions(image_bytes) if settings.reduced_decode else None
+    factor = reduced_decode_factor(*dimensions, settings.model_imgsz) if dimensions else 1
+    FRAMES_DECODED.labels(scale=f"1/{factor}").inc()
+    
+    if factor == 1:
+        return decode_frame(image_bytes), None
+    
+    frame = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), REDUCED_DECODE_FLAGS[factor])
+    if frame is None:
+        logger.error("Failed to decode frame", error="not a decodable image")
+        raise ValueError("Invalid frame data: not a decodable image")
+    
+    width, height = dimensions
+    return frame, (width / frame.shape[1], height / frame.shape[0])
 
 
-def run_inference(frame: np.ndarray) -> tuple[List[BoundingBox], float]:
-    """Run inference on a single frame."""
+def timed_decode_frame(frame_data: Union[str, bytes]) -> tuple[np.ndarray, Optional[tuple[float, float]]]:
+    """decode_frame_for_model with latency recorded; runs on the decode pool."""
     start_time = time.time()
+    try:
+        return decode_frame_for_model(frame_data)
+    finally:
+        FRAME_DECODE_LATENCY.observe(time.time() - start_time)
+
+
+def content_cache_key(frame_data: Union[str, bytes]) -> str:
+    """
+    Exact result cache key: hash of the JPEG bytes.
     
-    results = model.predict(
-        frame,
-        conf=settings.confidence_threshold,
-        verbose=False,
-    )[0]
+    Base64 frames are decoded first so /predict and /predict/raw share keys
+    for the same frame; text that is not valid base64 is hashed as is and
+    rejected later by the decoder.
+    """
+    if isinstance(frame_data, str):
+        try:
+            frame_data = base64.b64decode(frame_data)
+        except binascii.Error:
+            frame_data = frame_data.encode("utf-8")
+    return hashlib.blake2b(frame_data, digest_size=16).hexdigest()
+
+
+def perceptual_cache_key(frame: np.ndarray, scale: Optional[tuple[float, float]]) -> str:
+    """
+    Perceptual result cache key: difference hash of the decoded frame.
+    
+    Brightness gradients between neighbouring cells of a hash_size grid, so
+    re-encoded or sensor-noise variants of the same scene share a key. The
+    frame geometry is part of the key since cached boxes are in its coordinates.
+    """
+    size = settings.result_cache_hash_size
+    small = cv2.resize(frame, (size + 1, size), interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+    bits = np.packbits(gray[:, 1:] > gray[:, :-1])
+    height, width = frame.shape[:2]
+    scale_x, scale_y = scale or (1.0, 1.0)
+    return f"{width}x{height}@{scale_x:.4f},{scale_y:.4f}:{bits.tobytes().hex()}"
+
+
+def perceptual_cache_keys(
+    frames: List[np.ndarray],
+    scales: List[Optional[tuple[float, float]]],
+) -> List[str]:
+    """perceptual_cache_key for a batch; runs on the decode pool."""
+    return [perceptual_cache_key(frame, scale) for frame, scale in zip(frames, scales)]
+
+
+def scale_detections(detections: DetectionArrays, scale: tuple[float, float]) -> DetectionArrays:
+    """Map boxes from a reduced-resolution frame back to original-frame coordinates."""
+    scale_x, scale_y = scale
+    factors = np.array([scale_x, scale_y, scale_x, scale_y], dtype=np.float32)
+    return detections._replace(boxes=detections.boxes * factors)
+
+
+def build_detections(result) -> DetectionArrays:
+    """Convert a single Ultralytics result into packed detection arrays."""
+    boxes = result.boxes
+    detections = DetectionArrays(
+        boxes=boxes.xyxy.cpu().numpy().astype(np.float32),
+        confidences=boxes.conf.cpu().numpy().astype(np.float32),
+        class_ids=boxes.cls.cpu().numpy().astype(np.int32),
+    )
     
-    inference_time = (time.time() - start_time) * 1000  # Convert to ms
+    # Update metrics
+    for class_id, count in zip(*np.unique(detections.class_ids, return_counts=True)):
+        DETECTIONS_TOTAL.labels(class_name=result.names[int(class_id)]).inc(int(count))
     
-    detections = []
-    for box in results.boxes:
-        x1, y1, x2, y2 = box.xyxy[0].tolist()
-        confidence = float(box.conf[0])
-        class_id = int(box.cls[0])
-        class_name = results.names[class_id]
-        
-        detections.append(BoundingBox(
+    return detections
+
+
+def to_bounding_boxes(detections: DetectionArrays, names: dict) -> List[BoundingBox]:
+    """Expand packed detections into per-box models for the default JSON response."""
+    return [
+        BoundingBox(
             x1=x1,
             y1=y1,
             x2=x2,
             y2=y2,
             confidence=confidence,
             class_id=class_id,
-            class_name=class_name,
-        ))
+            class_name=names[class_id],
+        )
+        for (x1, y1, x2, y2), confidence, class_id in zip(
+            detections.boxes.tolist(),
+            detections.confidences.tolist(),
+            detections.class_ids.tolist(),
+        )
+    ]
+
+
+def claim_worker_model():
+    """Inference executor initializer: take this worker thread's own model instance."""
+    worker_models.model = unclaimed_models.get()
+
+
+def run_inference_batch(frames: List[np.ndarray]) -> List[tuple[DetectionArrays, float]]:
+    """
+    Run inference on frames, stacking up to predict_batch_size frames per forward pass.
+    
+    Returns (detections, inference_time_ms) per frame, where the time is the
+    sub-batch wall time amortized over the frames it contained.
+    """
+    outputs = []
+    sub_batch_size = max(1, settings.predict_batch_size)
+    # The worker's own instance; the global one outside the executor (benchmarks)
+    detector = getattr(worker_models, "model", model)
+    
+    for i in range(0, len(frames), sub_batch_size):
+        sub_batch = frames[i:i + sub_batch_size]
+        start_time = time.time()
+        
+        results = detector.predict(
+            sub_batch,
+            conf=settings.confidence_threshold,
+            imgsz=settings.model_imgsz,
+            verbose=False,
+        )
+        
+        forward_time = time.time() - start_time
+        MODEL_BATCH_SIZE.observe(len(sub_batch))
+        MODEL_FORWARD_LATENCY.observe(forward_time)
+        per_frame_ms = forward_time * 1000 / len(sub_batch)
         
-        # Update metrics
-        DETECTIONS_TOTAL.labels(class_name=class_name).inc()
+        for result in results:
+            outputs.append((build_detections(result), per_frame_ms))
     
-    return detections, inference_time
+    return outputs
 
 
-@app.post("/predict", response_model=BatchInferenceResponse)
-async def predict_batch(request: BatchInferenceRequest):
+async def decode_frames(
+    frame_inputs: list,
+    images: List[Union[str, bytes]],
+    indices: Optional[List[int]] = None,
+) -> tuple[List[np.ndarray], List[int], dict]:
     """
-    Run object detection on a batch of frames.
+    Decode the frames of a batch (or those at `indices`) concurrently on the decode pool (cv2 releases the GIL).
     
-    Accepts up to 25 frames encoded as base64 JPEG images.
-    Returns bounding box coordinates for detected objects.
+    Invalid frames are skipped. Returns decoded frames, their request indices
+    and the coordinate scale of each reduced-resolution frame by request index.
+    """
+    if indices is None:
+        indices = list(range(len(images)))
+    
+    loop = asyncio.get_running_loop()
+    decoded = await asyncio.gather(
+        *(loop.run_in_executor(decode_executor, timed_decode_frame, images[index]) for index in indices),
+        return_exceptions=True,
+    )
+    
+    frames = []
+    valid_indices = []
+    frame_scales = {}
+    for index, result in zip(indices, decoded):
+        frame_input = frame_inputs[index]
+        if isinstance(result, ValueError):
+            logger.warning(
+                "Skipping invalid frame",
+                frame_number=frame_input.frame_number,
+                error=str(result),
+            )
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            frame, scale = result
+            frames.append(frame)
+            valid_indices.append(index)
+            if scale:
+                frame_scales[index] = scale
+    
+    return frames, valid_indices, frame_scales
+
+
+def build_frame_results(
+    frame_inputs: list,
+    frame_outputs: dict,
+    frame_scales: dict,
+    cached_outputs: Optional[Dict[int, DetectionArrays]] = None,
+) -> List[tuple[int, DetectionArrays, float]]:
+    """
+    Collect (frame_number, detections, inference_time_ms) in request order.
+    
+    Frames without output get empty detections; boxes of reduced-resolution
+    frames are mapped back to original coordinates. Cache hits are already in
+    original coordinates, report zero inference time and count as processed.
+    """
+    frame_results = []
+    
+    for index, frame_input in enumerate(frame_inputs):
+        if cached_outputs and index in cached_outputs:
+            frame_results.append((frame_input.frame_number, cached_outputs[index], 0.0))
+            FRAMES_PROCESSED.inc()
+            continue
+        
+        detections, inference_time = frame_outputs.get(index, (EMPTY_DETECTIONS, 0))
+        if index in frame_scales:
+            detections = scale_detections(detections, frame_scales[index])
+        frame_results.append((frame_input.frame_number, detections, inference_time))
+        
+        if index in frame_outputs:
+            FRAMES_PROCESSED.inc()
+    
+    return frame_results
+
+
+def pack_array(array: np.ndarray, dtype: str) -> str:
+    """Base64 of an array's little-endian bytes."""
+    return base64.b64encode(np.ascontiguousarray(array, dtype=dtype).tobytes()).decode("ascii")
+
+
+def columnar_response(
+    stream_id: str,
+    frame_results: List[tuple[int, DetectionArrays, float]],
+    sources: List[str],
+    total_detections: int,
+    total_time: float,
+) -> Response:
+    """
+    Serialize batch results as packed columns (response_format=columnar).
+    
+    Detections of all frames are concatenated: boxes as an N x 4 float32
+    block, confidences as float32 and class ids as uint16, each base64
+    encoded, with detection_counts splitting them back into frames. Class
+    names for the ids present are sent once in class_names.
+    """
+    detections = [frame_detections for _, frame_detections, _ in frame_results]
+    class_ids = np.concatenate([d.class_ids for d in detections])
+    
+    body = {
+        "format": COLUMNAR_FORMAT,
+        "stream_id": stream_id,
+        "frame_numbers": [frame_number for frame_number, _, _ in frame_results],
+        "inference_time_ms": [inference_time for _, _, inference_time in frame_results],
+        "sources": sources,
+        "detection_counts": [len(d.confidences) for d in detections],
+        "class_names": {str(c): model.names[c] for c in np.unique(class_ids).tolist()},
+        "boxes": pack_array(np.concatenate([d.boxes for d in detections]), "<f4"),
+        "confidences": pack_array(np.concatenate([d.confidences for d in detections]), "<f4"),
+        "class_ids": pack_array(class_ids, "<u2"),
+        "total_frames": len(frame_results),
+        "total_detections": total_detections,
+        "total_inference_time_ms": total_time,
+    }
+    return Response(content=json.dumps(body), media_type="application/json")
+
+
+async def run_in_inference_executor(func, *args):
+    """
+    Run a blocking call on the bounded inference executor.
+    
+    Rejects with 503 when more than inference_max_queue calls are already
+    waiting, and records queue depth and time spent waiting for a worker.
+    """
+    global inference_pending
+    
+    if inference_pending >= settings.inference_workers + settings.inference_max_queue:
+        INFERENCE_REJECTED.inc()
+        raise HTTPException(status_code=503, detail="Inference queue is full")
+    
+    submit_time = time.time()
+    
+    def run():
+        INFERENCE_QUEUE_DEPTH.dec()
+        INFERENCE_QUEUE_WAIT.observe(time.time() - submit_time)
+        return func(*args)
+    
+    inference_pending += 1
+    INFERENCE_QUEUE_DEPTH.inc()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(inference_executor, run)
+    finally:
+        inference_pending -= 1
+
+
+async def detect_frames(frames: List[np.ndarray]) -> List[tuple[DetectionArrays, float]]:
+    """Run the detector on decoded frames, merged with concurrent requests when micro-batching."""
+    if not frames:
+        return []
+    if micro_batcher:
+        return await micro_batcher.submit(frames)
+    return await run_in_inference_executor(run_inference_batch, frames)
+
+
+def get_tracking_session(stream_id: str) -> TrackingSession:
+    """Session of a stream, created on first use; idle sessions past the TTL are dropped."""
+    now = time.time()
+    for key, session in list(tracking_sessions.items()):
+        if now - session.last_used > settings.tracking_session_ttl_seconds and not session.lock.locked():
+            del tracking_sessions[key]
+    
+    session = tracking_sessions.get(stream_id)
+    if session is None:
+        session = TrackingSession(
+            max_interval=settings.tracking_max_interval,
+            min_interval=settings.tracking_min_interval,
+            scene_change_threshold=settings.tracking_scene_change_threshold,
+        )
+        tracking_sessions[stream_id] = session
+    session.last_used = now
+    TRACKING_SESSIONS.set(len(tracking_sessions))
+    return session
+
+
+async def infer_tracked(
+    stream_id: str,
+    frames: List[np.ndarray],
+    frame_numbers: List[int],
+) -> List[tuple[DetectionArrays, float, bool]]:
+    """
+    Tracking-mode inference: the detector runs on keyframes only, boxes are tracked elsewhere.
+    
+    Frames are applied to the stream's session in frame_number order under its
+    lock; keyframes still go through the micro-batcher. Frames at or behind
+    the session's last frame_number (a batch of the stream that arrived after
+    a later one, or a repeated number) are detected outright and leave the
+    session alone, since flow only tracks forwards. Returns (detections,
+    inference_time_ms, tracked) in the order the frames were given.
+    """
+    order = sorted(range(len(frames)), key=frame_numbers.__getitem__)
+    session = get_tracking_session(stream_id)
+    loop = asyncio.get_running_loop()
+    
+    async with session.lock:
+        try:
+            fresh, stale = [], []
+            last_frame_number = session.last_frame_number
+            for index in order:
+                if frame_numbers[index] > last_frame_number:
+                    fresh.append(index)
+                    last_frame_number = frame_numbers[index]
+                else:
+                    stale.append(index)
+            
+            ordered = [frames[i] for i in fresh]
+            shapes = [frame.shape[:2] for frame in ordered]
+            grays = await loop.run_in_executor(decode_executor, tracking_grays, ordered) if fresh else []
+            flags = session.plan(grays, shapes)
+            keyframes = [frame for frame, keyframe in zip(ordered, flags) if keyframe]
+            detected = await detect_frames(keyframes + [frames[i] for i in stale])
+            results = []
+            if fresh:
+                results = await loop.run_in_executor(
+                    decode_executor, session.propagate, grays, shapes, flags, detected[:len(keyframes)]
+                )
+            session.last_frame_number = last_frame_number
+        except BaseException:
+            session.reset()
+            raise
+    
+    if stale:
+        TRACKING_STALE_FRAMES.inc(len(stale))
+        logger.warning(
+            "Out-of-order tracking frames detected outright",
+            stream_id=stream_id,
+            stale_frames=len(stale),
+            last_frame_number=session.last_frame_number,
+        )
+    tracked = sum(1 for _, _, is_tracked in results if is_tracked)
+    TRACKING_FRAMES.labels(source="tracked").inc(tracked)
+    TRACKING_FRAMES.labels(source="detected").inc(len(frames) - tracked)
+    
+    outputs = [None] * len(frames)
+    for position, result in zip(fresh, results):
+        outputs[position] = result
+    for position, (detections, inference_time) in zip(stale, detected[len(keyframes):]):
+        outputs[position] = (detections, inference_time, False)
+    return outputs
+
+
+async def infer_batch(
+    stream_id: str,
+    frame_inputs: list,
+    images: List[Union[str, bytes]],
+    response_format: str = "json",
+) -> Union[BatchInferenceResponse, Response]:
+    """
+    Shared /predict pipeline: decode, infer and build the batch response.
+    
+    frame_inputs carry frame_number per frame; images holds the matching
+    base64 strings or raw JPEG bytes in the same order.
     """
     start_time = time.time()
     
     try:
-        if len(request.frames) > settings.max_batch_size:
+        if len(frame_inputs) > settings.max_batch_size:
             raise HTTPException(
                 status_code=400,
                 detail=f"Batch size exceeds maximum of {settings.max_batch_size}"
             )
         
-        results = []
-        total_detections = 0
+        # Exact cache mode: byte-identical frames skip decode and inference entirely
+        cache_keys: Dict[int, str] = {}
+        cached_outputs: Dict[int, DetectionArrays] = {}
+        if result_cache and settings.result_cache_mode == "exact":
+            cache_keys = {index: content_cache_key(image) for index, image in enumerate(images)}
+            cached_outputs = result_cache.lookup(cache_keys)
         
-        for frame_input in request.frames:
-            try:
-                # Decode frame
-                frame = decode_frame(frame_input.frame_data)
-                
-                # Run inference
-                detections, inference_time = run_inference(frame)
-                
-                results.append(FrameResult(
-                    frame_number=frame_input.frame_number,
-                    detections=detections,
-                    inference_time_ms=inference_time,
-                ))
-                
-                total_detections += len(detections)
-                FRAMES_PROCESSED.inc()
-                
-            except ValueError as e:
-                logger.warning(
-                    "Skipping invalid frame",
-                    frame_number=frame_input.frame_number,
-                    error=str(e),
-                )
-                results.append(FrameResult(
-                    frame_number=frame_input.frame_number,
-                    detections=[],
-                    inference_time_ms=0,
-                ))
+        # Decode in parallel on the decode pool so the event loop stays free
+        frames, valid_indices, frame_scales = await decode_frames(
+            frame_inputs,
+            images,
+            [index for index in range(len(images)) if index not in cached_outputs],
+        )
+        
+        # Perceptual cache mode: near-identical frames skip inference
+        if result_cache and settings.result_cache_mode == "perceptual" and frames:
+            loop = asyncio.get_running_loop()
+            scales = [frame_scales.get(index) for index in valid_indices]
+            keys = await loop.run_in_executor(decode_executor, perceptual_cache_keys, frames, scales)
+            cache_keys = dict(zip(valid_indices, keys))
+            cached_outputs = result_cache.lookup(cache_keys)
+            frames = [frame for frame, index in zip(frames, valid_indices) if index not in cached_outputs]
+            valid_indices = [index for index in valid_indices if index not in cached_outputs]
+        
+        # Run inference, merged with concurrent requests when micro-batching;
+        # in tracking mode only the stream's keyframes reach the detector
+        tracked_indices = set()
+        if settings.tracking_enabled and frames:
+            tracked_outputs = await infer_tracked(
+                stream_id, frames, [frame_inputs[index].frame_number for index in valid_indices]
+            )
+            outputs = [(detections, inference_time) for detections, inference_time, _ in tracked_outputs]
+            tracked_indices = {
+                index for index, (_, _, tracked) in zip(valid_indices, tracked_outputs) if tracked
+            }
+        else:
+            outputs = await detect_frames(frames)
+        
+        frame_results = build_frame_results(
+            frame_inputs, dict(zip(valid_indices, outputs)), frame_scales, cached_outputs
+        )
+        if result_cache:
+            result_cache.store({
+                cache_keys[index]: frame_results[index][1]
+                for index in valid_indices
+                if index in cache_keys
+            })
+        total_detections = sum(len(d.confidences) for _, d, _ in frame_results)
+        sources = ["tracked" if index in tracked_indices else "detected" for index in range(len(frame_inputs))]
         
         total_time = (time.time() - start_time) * 1000
         
@@ -270,16 +1442,29 @@ async def predict_batch(request: BatchInferenceRequest):
         
         logger.info(
             "Batch inference completed",
-            stream_id=request.stream_id,
-            frames_processed=len(request.frames),
+            stream_id=stream_id,
+            frames_processed=len(frame_inputs),
             total_detections=total_detections,
+            cached_frames=len(cached_outputs),
+            tracked_frames=len(tracked_indices),
             total_time_ms=total_time,
         )
         
+        if response_format == "columnar":
+            return columnar_response(stream_id, frame_results, sources, total_detections, total_time)
+        
         return BatchInferenceResponse(
-            stream_id=request.stream_id,
-            results=results,
-            total_frames=len(request.frames),
+            stream_id=stream_id,
+            results=[
+                FrameResult(
+                    frame_number=frame_number,
+                    detections=to_bounding_boxes(detections, model.names),
+                    inference_time_ms=inference_time,
+                    source=source,
+                )
+                for (frame_number, detections, inference_time), source in zip(frame_results, sources)
+            ],
+            total_frames=len(frame_inputs),
             total_detections=total_detections,
             total_inference_time_ms=total_time,
         )
@@ -293,6 +1478,58 @@ async def predict_batch(request: BatchInferenceRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/predict", response_model=BatchInferenceResponse)
+async def predict_batch(
+    request: BatchInferenceRequest,
+    response_format: Literal["json", "columnar"] = "json",
+):
+    """
+    Run object detection on a batch of frames.
+    
+    Accepts up to 25 frames encoded as base64 JPEG images.
+    Returns bounding box coordinates for detected objects, or packed
+    per-batch columns with ?response_format=columnar.
+    """
+    return await infer_batch(
+        request.stream_id,
+        request.frames,
+        [frame_input.frame_data for frame_input in request.frames],
+        response_format,
+    )
+
+
+@app.post("/predict/raw", response_model=BatchInferenceResponse)
+async def predict_batch_raw(
+    request: Request,
+    response_format: Literal["json", "columnar"] = "json",
+):
+    """
+    Run object detection on a batch of raw JPEG frames.
+    
+    Expects multipart/form-data with a "metadata" field holding
+    {"stream_id": ..., "frames": [{"frame_number": ..., "timestamp": ...}]}
+    and one "frames" file part per frame, in the same order.
+    Returns the same response as /predict (including ?response_format=columnar).
+    """
+    try:
+        form = await request.form()
+        metadata = RawBatchMetadata.model_validate_json(form["metadata"])
+        parts = form.getlist("frames")
+        if len(parts) != len(metadata.frames):
+            raise ValueError(
+                f"Got {len(parts)} frame parts for {len(metadata.frames)} metadata entries"
+            )
+        for index, part in enumerate(parts):
+            if not isinstance(part, UploadFile):
+                raise ValueError(f"Frame part {index} is a form field, not a file")
+        images = [await part.read() for part in parts]
+    except (KeyError, ValueError, ValidationError) as e:
+        INFERENCE_REQUESTS.labels(status="error").inc()
+        raise HTTPException(status_code=400, detail=f"Invalid raw batch: {e}")
+    
+    return await infer_batch(metadata.stream_id, metadata.frames, images, response_format)
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
@@ -302,6 +1539,8 @@ async def health_check():
     return {
         "status": "healthy",
         "model": settings.model_name,
+        "backend": settings.model_backend,
+        "precision": settings.model_precision,
         "device": settings.model_device,
     }
 
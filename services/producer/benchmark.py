@@ -0,0 +1,103 @@
+"""
+Producer Benchmarks: Achievable publish rate of the producer's encode path.
+
+Runs FrameProducer's resize + JPEG encode on synthetic frames, so no RTSP
+source or Kafka is needed. Frames go through an encode pool the way
+--encode-workers does and are collected in submission order.
+
+Usage:
+    python benchmark.py encode
+    python benchmark.py encode --resolutions 1920x1080 3840x2160 --qualities 70 85 95 --workers 1 2 4
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+# services/common in a checkout
+sys.path.append(str(Path(__file__).resolve().parent.parent / "common"))
+
+from producer import FrameProducer
+from synthetic import synthetic_frame
+
+
+def parse_resolution(value: str) -> Tuple[int, int]:
+    """Parse WIDTHxHEIGHT."""
+    width, _, height = value.lower().partition("x")
+    return int(width), int(height)
+
+
+def encode_fps(producer: FrameProducer, workers: int, frames: List[np.ndarray]) -> Tuple[float, float]:
+    """Encode all frames on `workers` threads in order; returns (frames/s, mean KB per frame)."""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Warm up (thread start, libjpeg tables) outside the timed region
+        list(pool.map(producer._encode_for_publish, frames[:workers * 2]))
+        start_time = time.perf_counter()
+        encoded = list(pool.map(producer._encode_for_publish, frames))
+        elapsed = time.perf_counter() - start_time
+    kilobytes = sum(len(jpeg_bytes) for _, _, jpeg_bytes in encoded) / len(encoded) / 1024
+    return len(frames) / elapsed, kilobytes
+
+
+def bench_encode(args):
+    """Encode throughput per resolution and JPEG quality, for each encode worker count."""
+    print(f"resize long edge: {args.resize_long_edge or 'off'}, {args.frames} frames per measurement")
+    header = f"{'resolution':<12}{'quality':>8}{'KB/frame':>10}"
+    header += "".join(f"{f'{workers}w fps':>10}" for workers in args.workers)
+    print(header)
+
+    for width, height in (parse_resolution(value) for value in args.resolutions):
+        frames = [synthetic_frame(width, height, seed) for seed in range(4)]
+        frames = (frames * (args.frames // len(frames) + 1))[:args.frames]
+
+        for quality in args.qualities:
+            producer = FrameProducer(
+                rtsp_url="rtsp://benchmark",
+                kafka_bootstrap="",
+                kafka_topics=[],
+                jpeg_quality=quality,
+                resize_long_edge=args.resize_long_edge,
+            )
+            row = f"{f'{width}x{height}':<12}{quality:>8}"
+            kilobytes = 0.0
+            rates = []
+            for workers in args.workers:
+                fps, kilobytes = encode_fps(producer, workers, frames)
+                rates.append(fps)
+            print(row + f"{kilobytes:>10.0f}" + "".join(f"{fps:>10.1f}" for fps in rates))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Producer benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    encode = subparsers.add_parser("encode", help="Achievable fps vs JPEG quality, resolution and encode workers")
+    encode.add_argument(
+        "--resolutions",
+        type=str,
+        nargs="+",
+        default=["1280x720", "1920x1080", "3840x2160"],
+        help="Frame sizes as WIDTHxHEIGHT",
+    )
+    encode.add_argument("--qualities", type=int, nargs="+", default=[60, 75, 85, 95], help="JPEG qualities")
+    encode.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Encode worker counts")
+    encode.add_argument("--frames", type=int, default=60, help="Frames per measurement")
+    encode.add_argument(
+        "--resize-long-edge",
+        type=int,
+        default=0,
+        help="Downscale before encoding, as --resize-long-edge (0 = native resolution)",
+    )
+    encode.set_defaults(func=bench_encode)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
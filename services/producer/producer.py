@@ -3,26 +3,82 @@ Frame Producer: Captures frames from RTSP stream and publishes to Kafka.
 
 Supports publishing to multiple Kafka topics for dual-stream processing.
 
+Each stream is read by a capture thread that keeps only the newest decoded
+frame; the publisher wakes every 1/--frame-rate seconds and encodes whatever
+is freshest, so frames are never queued behind a slow encode or broker.
+
+Wire formats:
+    json   - Legacy JSON envelope with the JPEG base64-encoded in "frame_data"
+    binary - Raw JPEG bytes as the message value, metadata in Kafka headers
+             (versioned via the "frame-format" header)
+
+Motion gate (--motion-gate):
+    off  - Publish every sampled frame
+    diff - Skip frames whose downscaled grayscale difference from the last
+           published frame stays below --motion-threshold
+    mog2 - Same, scored by the foreground share of a MOG2 background model
+    Frames keep flowing for --motion-hold-seconds after motion, and a
+    heartbeat frame is still published every --motion-heartbeat-seconds.
+
+Resize (--resize-long-edge):
+    Frames are downscaled (aspect ratio preserved) before encoding; messages
+    then carry original_width/original_height and scale_x/scale_y (original
+    over sent pixels). With --full-res-bucket the native-resolution JPEG is
+    also stored in S3 (full_res_bucket/full_res_key) for the consumer to
+    render detections on.
+
+Parallel encode (--encode-workers):
+    With more than one worker, sampled frames are resized and JPEG-encoded on
+    a bounded per-stream thread pool (OpenCV releases the GIL) and handed to
+    Kafka strictly in capture order, for 4K or high frame rates where a single
+    encode per frame interval no longer keeps up.
+
+Adaptive quality (--adaptive-quality):
+    A per-stream controller lowers JPEG quality (down to --min-jpeg-quality,
+    then optionally the frame rate with --adaptive-frame-rate) while Kafka's
+    outbound queue, delivery latency or the stream's --max-bytes-per-second
+    budget is over its limit, and restores it once they have headroom again.
+
+Multi-stream mode (--streams-file or --rtsp-urls):
+    Capture and publish threads per camera and a single shared Kafka
+    producer per process; each stream connects and reconnects on its own. --processes
+    shards the streams round-robin over worker processes, each serving its
+    metrics on --metrics-port + shard index.
+
 Usage:
     python producer.py --rtsp-url rtsp://localhost:8554/stream --kafka-bootstrap localhost:9092
+    python producer.py --streams-file cameras.txt --processes 4
+    python producer.py --motion-gate diff --motion-threshold 0.01 --motion-heartbeat-seconds 10
+    python producer.py --resize-long-edge 640 --full-res-bucket video-pipeline-full-res
+    python producer.py --frame-rate 30 --encode-workers 4
+    python producer.py --adaptive-quality --min-jpeg-quality 40 --max-bytes-per-second 2000000
 """
 
 import argparse
 import base64
+import hashlib
 import json
+import multiprocessing
 import os
 import signal
+import socket
 import sys
+import threading
 import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
+import boto3
 import cv2
 import logging
 import numpy as np
 import structlog
+from botocore.config import Config as BotoConfig
 from confluent_kafka import Producer, KafkaException
 from dotenv import load_dotenv
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
 
 load_dotenv()
 
@@ -49,6 +105,447 @@ structlog.configure(
 
 logger = structlog.get_logger(__name__)
 
+# Wire formats understood by the consumer
+WIRE_FORMAT_JSON = "json"
+WIRE_FORMAT_BINARY = "binary"
+WIRE_FORMATS = (WIRE_FORMAT_JSON, WIRE_FORMAT_BINARY)
+
+# Header carrying the binary envelope version; bump on incompatible changes
+FRAME_FORMAT_HEADER = "frame-format"
+BINARY_FRAME_FORMAT = "jpeg-v1"
+
+# Motion gate methods
+MOTION_GATE_OFF = "off"
+MOTION_GATE_DIFF = "diff"
+MOTION_GATE_MOG2 = "mog2"
+MOTION_GATES = (MOTION_GATE_OFF, MOTION_GATE_DIFF, MOTION_GATE_MOG2)
+
+# Prometheus metrics
+FRAMES_PUBLISHED = Counter(
+    "producer_frames_published_total",
+    "Frames published to Kafka, by why the motion gate let them through",
+    ["stream_id", "reason"]
+)
+FRAMES_SKIPPED = Counter(
+    "producer_frames_skipped_total",
+    "Sampled frames the motion gate did not publish",
+    ["stream_id"]
+)
+MOTION_SCORE = Histogram(
+    "producer_motion_score",
+    "Motion gate score per sampled frame (share of changed pixels)",
+    ["stream_id"],
+    buckets=[0.001, 0.0025, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25, 0.5, 1.0]
+)
+FRAME_AGE = Histogram(
+    "producer_frame_age_seconds",
+    "Time from a frame leaving the decoder to being handed to Kafka",
+    ["stream_id"],
+    buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5]
+)
+FRAMES_SUPERSEDED = Counter(
+    "producer_frames_superseded_total",
+    "Captured frames replaced by a newer frame before the publisher took them",
+    ["stream_id"]
+)
+ENCODE_SECONDS = Histogram(
+    "producer_encode_seconds",
+    "Resize + JPEG encode time per published frame",
+    ["stream_id"],
+    buckets=[0.001, 0.0025, 0.005, 0.01, 0.02, 0.04, 0.08, 0.16, 0.32]
+)
+ENCODE_QUEUE = Gauge(
+    "producer_encode_queue",
+    "Frames on the encode pool (encoding, or encoded and waiting for an earlier frame)",
+    ["stream_id"]
+)
+DELIVERY_LATENCY = Histogram(
+    "producer_delivery_latency_seconds",
+    "Time from produce() to the broker acknowledging the message",
+    ["stream_id"],
+    buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+)
+KAFKA_QUEUE = Gauge(
+    "producer_kafka_queue_messages",
+    "Messages in librdkafka's outbound queue (shared by all streams of a process)"
+)
+JPEG_QUALITY = Gauge(
+    "producer_jpeg_quality",
+    "JPEG quality frames are currently published at",
+    ["stream_id"]
+)
+TARGET_FRAME_RATE = Gauge(
+    "producer_target_frame_rate",
+    "Frame rate the stream is currently sampled at",
+    ["stream_id"]
+)
+QUALITY_ADJUSTMENTS = Counter(
+    "producer_quality_adjustments_total",
+    "Adaptive quality controller changes to JPEG quality or frame rate",
+    ["stream_id", "setting", "direction", "reason"]
+)
+FRAME_BYTES = Histogram(
+    "producer_frame_bytes",
+    "Encoded JPEG size of published frames",
+    ["stream_id"],
+    buckets=[16384, 32768, 65536, 131072, 262144, 524288, 1048576, 2097152, 4194304]
+)
+FULL_RES_UPLOADS = Counter(
+    "producer_full_res_uploads_total",
+    "Full-resolution frame uploads to S3 (dropped = upload backlog full)",
+    ["status"]
+)
+FULL_RES_UPLOADS_PENDING = Gauge(
+    "producer_full_res_uploads_pending",
+    "Full-resolution frame uploads queued or in flight"
+)
+
+STREAM_FPS = Gauge(
+    "producer_stream_fps",
+    "Frames published per second by a stream, over the last measurement window",
+    ["stream_id"]
+)
+STREAM_UP = Gauge(
+    "producer_stream_up",
+    "1 while the stream's RTSP connection is open, 0 while (re)connecting",
+    ["stream_id"]
+)
+FRAMES_DROPPED = Counter(
+    "producer_frames_dropped_total",
+    "Sampled frames lost before reaching Kafka (queue_full = librdkafka queue full)",
+    ["stream_id", "reason"]
+)
+STREAM_RECONNECTS = Counter(
+    "producer_stream_reconnects_total",
+    "RTSP reconnect attempts after a stream stopped delivering frames",
+    ["stream_id", "status"]
+)
+
+# Window over which producer_stream_fps is measured
+FPS_WINDOW_SECONDS = 10.0
+
+# RTSP connect backoff: 2, 4, 8, ... seconds, capped
+MAX_CONNECT_BACKOFF_SECONDS = 30
+
+# Frames allowed on the encode pool per worker before the publisher waits
+ENCODE_PENDING_PER_WORKER = 2
+
+# Full-resolution upload threads, and queued uploads beyond which frames are
+# published without a full-resolution copy rather than stalling capture
+FULL_RES_UPLOAD_WORKERS = 4
+FULL_RES_MAX_PENDING = 16
+
+
+def kafka_producer_config(kafka_bootstrap: str, client_id: str) -> dict:
+    """Kafka producer configuration shared by single- and multi-stream mode."""
+    return {
+        "bootstrap.servers": kafka_bootstrap,
+        "client.id": client_id,
+        "acks": "all",
+        "retries": 3,
+        "retry.backoff.ms": 1000,
+        "message.max.bytes": 10485760,  # 10MB max message size
+        "compression.type": "lz4",
+        "linger.ms": 5,
+        "batch.size": 1048576,  # 1MB batch size
+    }
+
+
+def resize_to_long_edge(frame: np.ndarray, long_edge: int) -> Tuple[np.ndarray, Optional[Tuple[float, float]]]:
+    """
+    Downscale a frame so its long edge is at most long_edge, keeping the aspect ratio.
+    
+    Returns the frame and the (x, y) factors mapping its coordinates back to
+    the original frame, or None when it was left at native resolution.
+    """
+    height, width = frame.shape[:2]
+    if long_edge <= 0 or max(width, height) <= long_edge:
+        return frame, None
+    
+    ratio = long_edge / max(width, height)
+    size = (max(1, round(width * ratio)), max(1, round(height * ratio)))
+    resized = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    return resized, (width / size[0], height / size[1])
+
+
+class StreamConnectError(RuntimeError):
+    """The RTSP stream could not be (re)opened within connect_retries attempts."""
+
+
+class LatestFrameSlot:
+    """
+    Single-frame handoff between a capture thread and a publisher.
+    
+    put() overwrites whatever is waiting, so the publisher only ever sees the
+    newest frame and nothing queues up behind it; take() returns each frame
+    at most once.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.latest: Optional[Tuple[np.ndarray, float, datetime]] = None
+        self.closed = False
+
+    def put(self, frame: np.ndarray, captured_at: float, timestamp: datetime) -> bool:
+        """Store a frame; returns True if it replaced one that was never taken."""
+        with self.condition:
+            superseded = self.latest is not None
+            self.latest = (frame, captured_at, timestamp)
+            self.condition.notify()
+            return superseded
+
+    def take(self, timeout: float) -> Optional[Tuple[np.ndarray, float, datetime]]:
+        """Newest untaken (frame, captured_at, timestamp), waiting up to timeout for one."""
+        with self.condition:
+            if self.latest is None and not self.closed:
+                self.condition.wait(timeout)
+            latest, self.latest = self.latest, None
+            return latest
+
+    def close(self):
+        """Wake a waiting take()."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class QualityController:
+    """
+    Closed-loop JPEG quality (and optionally frame rate) for one stream.
+    
+    Once per ADJUST_INTERVAL it checks what was observed since the last check:
+    librdkafka's outbound queue length, p90 delivery latency, delivery errors
+    and the stream's Kafka bytes/second against its budget. Any signal over
+    its limit steps quality down by DECREASE_STEP, and once quality is at its
+    floor, the frame rate by FRAME_RATE_DECREASE. After RECOVER_CHECKS
+    consecutive checks with every signal comfortably under its limit, the frame
+    rate is restored first, then quality rises by INCREASE_STEP. Backing off
+    fast and recovering slowly keeps it from oscillating at the limit.
+    Delivery reports arrive on whichever thread polls the producer (and
+    BufferErrors on encode pool threads), so all state is behind one lock.
+    """
+
+    ADJUST_INTERVAL = 1.0
+    DECREASE_STEP = 10
+    INCREASE_STEP = 5
+    FRAME_RATE_DECREASE = 0.75
+    RECOVER_CHECKS = 3
+    # Share of the queue/latency limits and of the byte budget below which a
+    # check counts towards recovery
+    HEADROOM = 0.5
+    BUDGET_HEADROOM = 0.85
+
+    def __init__(
+        self,
+        stream_id: str,
+        max_quality: int,
+        min_quality: int,
+        max_frame_rate: float,
+        min_frame_rate: float,
+        adapt_frame_rate: bool,
+        max_queued_messages: int,
+        max_delivery_latency: float,
+        max_bytes_per_second: int,
+    ):
+        self.stream_id = stream_id
+        self.max_quality = max_quality
+        self.min_quality = min(min_quality, max_quality)
+        self.max_frame_rate = max_frame_rate
+        self.min_frame_rate = min(min_frame_rate, max_frame_rate)
+        self.adapt_frame_rate = adapt_frame_rate
+        self.max_queued_messages = max_queued_messages
+        self.max_delivery_latency = max_delivery_latency
+        self.max_bytes_per_second = max_bytes_per_second
+        
+        self.quality = max_quality
+        self.frame_rate = max_frame_rate
+        self.lock = threading.RLock()
+        self.window_start = time.monotonic()
+        self.window_bytes = 0
+        self.window_latencies: List[float] = []
+        self.window_errors = 0
+        self.clear_checks = 0
+        JPEG_QUALITY.labels(stream_id=stream_id).set(self.quality)
+        TARGET_FRAME_RATE.labels(stream_id=stream_id).set(self.frame_rate)
+
+    def record_frame(self, sent_bytes: int):
+        """Count bytes handed to Kafka (all topics) for the byte budget."""
+        with self.lock:
+            self.window_bytes += sent_bytes
+
+    def record_delivery(self, latency: Optional[float], failed: bool):
+        """Count a delivery report."""
+        with self.lock:
+            if failed:
+                self.window_errors += 1
+            elif latency is not None:
+                self.window_latencies.append(latency)
+
+    def queue_full(self, now: float):
+        """Back off immediately: produce() just raised BufferError."""
+        with self.lock:
+            self._decrease("queue_full")
+            self._reset_window(now)
+
+    def update(self, now: float, queued_messages: int):
+        """Adjust quality/frame rate if an interval has passed (called every publish tick)."""
+        with self.lock:
+            elapsed = now - self.window_start
+            if elapsed < self.ADJUST_INTERVAL:
+                return
+            
+            bytes_per_second = self.window_bytes / elapsed
+            latency = float(np.percentile(self.window_latencies, 90)) if self.window_latencies else 0.0
+            errors = self.window_errors
+            self._reset_window(now)
+            self._adjust(queued_messages, latency, bytes_per_second, errors)
+
+    def _adjust(self, queued_messages: int, latency: float, bytes_per_second: float, errors: int):
+        over_limit = None
+        if errors:
+            over_limit = "delivery_error"
+        elif queued_messages > self.max_queued_messages:
+            over_limit = "queue"
+        elif latency > self.max_delivery_latency:
+            over_limit = "latency"
+        elif self.max_bytes_per_second and bytes_per_second > self.max_bytes_per_second:
+            over_limit = "bytes"
+        
+        if over_limit:
+            self.clear_checks = 0
+            self._decrease(over_limit)
+            return
+        
+        headroom = (
+            queued_messages <= self.max_queued_messages * self.HEADROOM
+            and latency <= self.max_delivery_latency * self.HEADROOM
+            and (
+                not self.max_bytes_per_second
+                or bytes_per_second <= self.max_bytes_per_second * self.BUDGET_HEADROOM
+            )
+        )
+        self.clear_checks = self.clear_checks + 1 if headroom else 0
+        if self.clear_checks >= self.RECOVER_CHECKS:
+            self.clear_checks = 0
+            self._increase()
+
+    def _reset_window(self, now: float):
+        with self.lock:
+            self.window_start = now
+            self.window_bytes = 0
+            self.window_latencies = []
+            self.window_errors = 0
+
+    def _decrease(self, reason: str):
+        if self.quality > self.min_quality:
+            self.quality = max(self.min_quality, self.quality - self.DECREASE_STEP)
+            self._record("quality", "down", reason)
+        elif self.adapt_frame_rate and self.frame_rate > self.min_frame_rate:
+            self.frame_rate = max(self.min_frame_rate, self.frame_rate * self.FRAME_RATE_DECREASE)
+            self._record("frame_rate", "down", reason)
+
+    def _increase(self):
+        if self.frame_rate < self.max_frame_rate:
+            self.frame_rate = min(self.max_frame_rate, self.frame_rate / self.FRAME_RATE_DECREASE)
+            self._record("frame_rate", "up", "recovered")
+        elif self.quality < self.max_quality:
+            self.quality = min(self.max_quality, self.quality + self.INCREASE_STEP)
+            self._record("quality", "up", "recovered")
+
+    def _record(self, setting: str, direction: str, reason: str):
+        QUALITY_ADJUSTMENTS.labels(
+            stream_id=self.stream_id, setting=setting, direction=direction, reason=reason
+        ).inc()
+        JPEG_QUALITY.labels(stream_id=self.stream_id).set(self.quality)
+        TARGET_FRAME_RATE.labels(stream_id=self.stream_id).set(self.frame_rate)
+        logger.info(
+            "Adaptive quality adjusted",
+            stream_id=self.stream_id,
+            setting=setting,
+            direction=direction,
+            reason=reason,
+            jpeg_quality=self.quality,
+            frame_rate=round(self.frame_rate, 2),
+        )
+
+
+class MotionGate:
+    """
+    Decides whether a sampled frame changed enough to be worth publishing.
+    
+    Frames are compared as small blurred grayscale images. diff scores the
+    share of pixels differing from the last published frame by more than
+    PIXEL_THRESHOLD gray levels, so slow drift accumulates until it is sent;
+    mog2 scores the foreground share of a MOG2 background model, which
+    absorbs gradual lighting changes. Once motion is seen every frame is
+    published for hold_seconds, so slow movers are sent at the full rate.
+    Other frames scoring below threshold are skipped unless heartbeat_seconds
+    have passed since the last publish.
+    """
+
+    WIDTH = 160
+    PIXEL_THRESHOLD = 25
+
+    def __init__(self, method: str, threshold: float, heartbeat_seconds: float, hold_seconds: float):
+        if method not in (MOTION_GATE_DIFF, MOTION_GATE_MOG2):
+            raise ValueError(f"Unsupported motion gate: {method}")
+        
+        self.method = method
+        self.threshold = threshold
+        self.heartbeat_seconds = heartbeat_seconds
+        self.hold_seconds = hold_seconds
+        self.reference: Optional[np.ndarray] = None
+        self.last_publish_time: Optional[float] = None
+        self.last_motion_time: Optional[float] = None
+        self.subtractor = (
+            cv2.createBackgroundSubtractorMOG2(history=500, varThreshold=16, detectShadows=False)
+            if method == MOTION_GATE_MOG2
+            else None
+        )
+
+    def _preprocess(self, frame: np.ndarray) -> np.ndarray:
+        """Downscaled, blurred grayscale copy of a frame."""
+        height, width = frame.shape[:2]
+        size = (self.WIDTH, max(1, round(height * self.WIDTH / width)))
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        return cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+
+    def score(self, gray: np.ndarray) -> float:
+        """Share of changed pixels (0-1); 1.0 when there is no diff reference yet."""
+        if self.subtractor is not None:
+            return float(np.count_nonzero(self.subtractor.apply(gray))) / gray.size
+        if self.reference is None or self.reference.shape != gray.shape:
+            return 1.0
+        changed = cv2.absdiff(gray, self.reference) > self.PIXEL_THRESHOLD
+        return float(np.count_nonzero(changed)) / gray.size
+
+    def check(self, frame: np.ndarray, now: float) -> Tuple[bool, float, str]:
+        """
+        Score a frame and decide whether to publish it.
+        
+        Returns (publish, score, reason), reason being "motion", "hold",
+        "heartbeat" or "skipped". A published frame becomes the diff reference.
+        """
+        gray = self._preprocess(frame)
+        score = self.score(gray)
+        
+        if self.last_publish_time is None:
+            # First frame of the stream: nothing to compare against yet
+            reason = "heartbeat"
+        elif score >= self.threshold:
+            reason = "motion"
+            self.last_motion_time = now
+        elif self.last_motion_time is not None and now - self.last_motion_time < self.hold_seconds:
+            reason = "hold"
+        elif now - self.last_publish_time >= self.heartbeat_seconds:
+            reason = "heartbeat"
+        else:
+            return False, score, "skipped"
+        
+        self.reference = gray
+        self.last_publish_time = now
+        return True, score, reason
+
 
 class FrameProducer:
     """Captures frames from RTSP stream and publishes to multiple Kafka topics."""
@@ -60,17 +557,90 @@ class FrameProducer:
         kafka_topics: List[str],
         frame_rate: int = 10,
         jpeg_quality: int = 85,
+        wire_format: str = WIRE_FORMAT_JSON,
+        motion_gate: str = MOTION_GATE_OFF,
+        motion_threshold: float = 0.01,
+        motion_heartbeat_seconds: float = 10.0,
+        motion_hold_seconds: float = 2.0,
+        resize_long_edge: int = 0,
+        full_res_bucket: str = "",
+        full_res_prefix: str = "full-res",
+        encode_workers: int = 1,
+        adaptive_quality: bool = False,
+        min_jpeg_quality: int = 40,
+        adaptive_frame_rate: bool = False,
+        min_frame_rate: float = 2.0,
+        max_queued_messages: int = 500,
+        max_delivery_latency: float = 1.0,
+        max_bytes_per_second: int = 0,
+        connect_retries: Optional[int] = 5,
+        producer: Optional[Producer] = None,
+        s3_client=None,
+        full_res_executor: Optional[ThreadPoolExecutor] = None,
     ):
+        """
+        producer, s3_client and full_res_executor may be shared between streams
+        (multi-stream mode); shared resources are left to their owner on stop.
+        connect_retries=None keeps reconnecting for as long as the stream runs.
+        """
+        if wire_format not in WIRE_FORMATS:
+            raise ValueError(f"Unsupported wire format: {wire_format}")
+        if motion_gate not in MOTION_GATES:
+            raise ValueError(f"Unsupported motion gate: {motion_gate}")
+
         self.rtsp_url = rtsp_url
         self.kafka_bootstrap = kafka_bootstrap
         self.kafka_topics = kafka_topics
         self.frame_rate = frame_rate
         self.jpeg_quality = jpeg_quality
+        self.wire_format = wire_format
+        self.resize_long_edge = resize_long_edge
+        self.full_res_bucket = full_res_bucket
+        self.full_res_prefix = full_res_prefix
+        self.connect_retries = connect_retries
         self.running = False
-        self.producer: Optional[Producer] = None
+        self.stop_event = threading.Event()
+        self.producer: Optional[Producer] = producer
+        self.owns_producer = producer is None
         self.cap: Optional[cv2.VideoCapture] = None
+        self.frame_slot = LatestFrameSlot()
+        self.capture_thread: Optional[threading.Thread] = None
+        self.capture_error: Optional[StreamConnectError] = None
         self.frame_count = 0
+        self.skipped_count = 0
         self.stream_id = self._generate_stream_id()
+        self.motion_gate = (
+            MotionGate(motion_gate, motion_threshold, motion_heartbeat_seconds, motion_hold_seconds)
+            if motion_gate != MOTION_GATE_OFF
+            else None
+        )
+        self.s3_client = s3_client
+        self.full_res_executor: Optional[ThreadPoolExecutor] = full_res_executor
+        self.owns_full_res_executor = full_res_executor is None
+        self.fps_window_start = time.time()
+        self.fps_window_frames = 0
+        self.full_res_slots = threading.BoundedSemaphore(FULL_RES_MAX_PENDING)
+        # encode_workers > 1: encode on a pool, publish in submission order
+        self.encode_workers = max(1, encode_workers)
+        self.encode_executor: Optional[ThreadPoolExecutor] = None
+        self.encode_pending = deque()
+        self.encode_lock = threading.Lock()
+        self.encode_slots = threading.BoundedSemaphore(self.encode_workers * ENCODE_PENDING_PER_WORKER)
+        self.quality_controller = (
+            QualityController(
+                self.stream_id,
+                max_quality=jpeg_quality,
+                min_quality=min_jpeg_quality,
+                max_frame_rate=frame_rate,
+                min_frame_rate=min_frame_rate,
+                adapt_frame_rate=adaptive_frame_rate,
+                max_queued_messages=max_queued_messages,
+                max_delivery_latency=max_delivery_latency,
+                max_bytes_per_second=max_bytes_per_second,
+            )
+            if adaptive_quality
+            else None
+        )
 
         logger.info(
             "FrameProducer initialized",
@@ -78,28 +648,21 @@ class FrameProducer:
             kafka_topics=kafka_topics,
             num_topics=len(kafka_topics),
             frame_rate=frame_rate,
+            wire_format=wire_format,
+            motion_gate=motion_gate,
+            resize_long_edge=resize_long_edge,
+            full_res_bucket=full_res_bucket or None,
             stream_id=self.stream_id,
         )
 
     def _generate_stream_id(self) -> str:
         """Generate a unique stream ID based on RTSP URL."""
-        import hashlib
         url_hash = hashlib.md5(self.rtsp_url.encode()).hexdigest()[:8]
         return f"stream_{url_hash}"
 
     def _init_kafka_producer(self) -> Producer:
         """Initialize Kafka producer with configuration."""
-        config = {
-            "bootstrap.servers": self.kafka_bootstrap,
-            "client.id": f"frame-producer-{self.stream_id}",
-            "acks": "all",
-            "retries": 3,
-            "retry.backoff.ms": 1000,
-            "message.max.bytes": 10485760,  # 10MB max message size
-            "compression.type": "lz4",
-            "linger.ms": 5,
-            "batch.size": 1048576,  # 1MB batch size
-        }
+        config = kafka_producer_config(self.kafka_bootstrap, f"frame-producer-{self.stream_id}")
         
         logger.info("Initializing Kafka producer", config=config)
         return Producer(config)
@@ -120,6 +683,7 @@ class FrameProducer:
         
         logger.info(
             "RTSP stream connected",
+            stream_id=self.stream_id,
             width=width,
             height=height,
             fps=fps,
@@ -127,14 +691,152 @@ class FrameProducer:
         
         return cap
 
-    def _encode_frame(self, frame: np.ndarray) -> str:
-        """Encode frame to base64 JPEG."""
-        encode_params = [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]
+    def _connect(self) -> Optional[cv2.VideoCapture]:
+        """
+        Open the stream, retrying with capped exponential backoff.
+        
+        Gives up after connect_retries attempts (None = never); returns None
+        if the producer is stopped while waiting.
+        """
+        retry_count = 0
+        while self.running:
+            try:
+                cap = self._init_video_capture()
+                STREAM_UP.labels(stream_id=self.stream_id).set(1)
+                return cap
+            except RuntimeError as e:
+                STREAM_UP.labels(stream_id=self.stream_id).set(0)
+                retry_count += 1
+                if self.connect_retries is not None and retry_count > self.connect_retries:
+                    raise StreamConnectError("Failed to connect to RTSP stream after retries")
+                wait_time = min(2 ** retry_count, MAX_CONNECT_BACKOFF_SECONDS)
+                logger.warning(
+                    "Failed to connect to RTSP stream, retrying",
+                    stream_id=self.stream_id,
+                    error=str(e),
+                    retry_count=retry_count,
+                    wait_time=wait_time,
+                )
+                self.stop_event.wait(wait_time)
+        return None
+
+    def _reconnect(self):
+        """Reopen a stream that stopped delivering frames."""
+        logger.warning("Failed to read frame, attempting reconnection", stream_id=self.stream_id)
+        STREAM_UP.labels(stream_id=self.stream_id).set(0)
+        STREAM_FPS.labels(stream_id=self.stream_id).set(0)
+        self.cap.release()
+        self.stop_event.wait(1)
+        try:
+            cap = self._connect()
+        except StreamConnectError:
+            STREAM_RECONNECTS.labels(stream_id=self.stream_id, status="failure").inc()
+            raise
+        if cap is not None:
+            self.cap = cap
+            STREAM_RECONNECTS.labels(stream_id=self.stream_id, status="success").inc()
+
+    def _capture_loop(self):
+        """
+        Capture thread: decode frames as fast as the stream delivers them into
+        the latest-frame slot. The blocking read paces this loop, so it does
+        not spin, and reconnects happen here without stalling the publisher.
+        The capture is released here once the loop exits, never under a read.
+        """
+        while self.running:
+            try:
+                ret, frame = self.cap.read()
+                if not ret:
+                    if self.running:
+                        self._reconnect()
+                    continue
+                
+                if self.frame_slot.put(frame, time.monotonic(), datetime.utcnow()):
+                    FRAMES_SUPERSEDED.labels(stream_id=self.stream_id).inc()
+            except StreamConnectError as e:
+                # Out of reconnect attempts: stop the producer; start() re-raises
+                logger.error("Giving up on RTSP stream", stream_id=self.stream_id, error=str(e))
+                self.capture_error = e
+                self.running = False
+                self.stop_event.set()
+                self.frame_slot.close()
+            except Exception as e:
+                logger.error("Error in capture thread", stream_id=self.stream_id, error=str(e))
+                self.stop_event.wait(1)
+        
+        self.cap.release()
+        logger.info("Video capture released", stream_id=self.stream_id)
+
+    def _update_fps(self, now: float):
+        """Refresh producer_stream_fps once per window (called for every sampled frame)."""
+        elapsed = now - self.fps_window_start
+        if elapsed >= FPS_WINDOW_SECONDS:
+            STREAM_FPS.labels(stream_id=self.stream_id).set(self.fps_window_frames / elapsed)
+            self.fps_window_start = now
+            self.fps_window_frames = 0
+
+    def _init_s3_client(self):
+        """Initialize the S3 client for full-resolution frames."""
+        boto_config = BotoConfig(
+            region_name=os.getenv("AWS_REGION", "us-east-1"),
+            retries={"max_attempts": 3, "mode": "adaptive"},
+            max_pool_connections=FULL_RES_UPLOAD_WORKERS,
+        )
+        return boto3.client("s3", config=boto_config)
+
+    def _encode_frame(self, frame: np.ndarray, quality: Optional[int] = None) -> bytes:
+        """Encode frame to JPEG bytes (at jpeg_quality unless given)."""
+        encode_params = [cv2.IMWRITE_JPEG_QUALITY, quality or self.jpeg_quality]
         _, buffer = cv2.imencode(".jpg", frame, encode_params)
-        return base64.b64encode(buffer).decode("utf-8")
+        return buffer.tobytes()
+
+    def _build_message(
+        self,
+        jpeg_bytes: bytes,
+        frame: np.ndarray,
+        timestamp: datetime,
+        original: Optional[np.ndarray] = None,
+        scale: Optional[Tuple[float, float]] = None,
+        full_res_key: Optional[str] = None,
+    ) -> Tuple[bytes, Optional[List[Tuple[str, bytes]]]]:
+        """Build the Kafka value and headers for the configured wire format."""
+        metadata = {
+            "stream_id": self.stream_id,
+            "frame_number": self.frame_count,
+            "timestamp": timestamp.isoformat(),
+            "width": frame.shape[1],
+            "height": frame.shape[0],
+        }
+        if scale:
+            metadata["original_width"] = original.shape[1]
+            metadata["original_height"] = original.shape[0]
+            metadata["scale_x"] = round(scale[0], 6)
+            metadata["scale_y"] = round(scale[1], 6)
+        if full_res_key:
+            metadata["full_res_bucket"] = self.full_res_bucket
+            metadata["full_res_key"] = full_res_key
+        
+        if self.wire_format == WIRE_FORMAT_BINARY:
+            # Raw JPEG as the value, metadata as ASCII headers
+            headers = [(FRAME_FORMAT_HEADER, BINARY_FRAME_FORMAT.encode("utf-8"))]
+            headers.extend(
+                (key.replace("_", "-"), str(value).encode("utf-8"))
+                for key, value in metadata.items()
+            )
+            return jpeg_bytes, headers
+        
+        # Legacy JSON envelope (no headers, understood by every consumer)
+        metadata["frame_data"] = base64.b64encode(jpeg_bytes).decode("utf-8")
+        return json.dumps(metadata).encode("utf-8"), None
 
     def _delivery_callback(self, err, msg):
         """Callback for Kafka message delivery."""
+        latency = msg.latency()
+        if latency is not None and not err:
+            DELIVERY_LATENCY.labels(stream_id=self.stream_id).observe(latency)
+        if self.quality_controller:
+            self.quality_controller.record_delivery(latency, failed=err is not None)
+        
         if err:
             logger.error(
                 "Message delivery failed",
@@ -149,24 +851,78 @@ class FrameProducer:
                 offset=msg.offset(),
             )
 
-    def _publish_frame(self, frame: np.ndarray, timestamp: datetime):
-        """Publish a single frame to ALL configured Kafka topics."""
+    def _upload_full_res(self, frame: np.ndarray, key: str):
+        """Encode and store a native-resolution frame (runs on the full-res upload pool)."""
+        try:
+            self.s3_client.put_object(
+                Bucket=self.full_res_bucket,
+                Key=key,
+                Body=self._encode_frame(frame),
+                ContentType="image/jpeg",
+            )
+            FULL_RES_UPLOADS.labels(status="success").inc()
+        except Exception as e:
+            FULL_RES_UPLOADS.labels(status="error").inc()
+            logger.error("Full-resolution upload failed", bucket=self.full_res_bucket, key=key, error=str(e))
+        finally:
+            self.full_res_slots.release()
+            FULL_RES_UPLOADS_PENDING.dec()
+
+    def _submit_full_res(self, frame: np.ndarray, timestamp: datetime) -> Optional[str]:
+        """Queue the native-resolution frame for upload; returns its S3 key, or None if the backlog is full."""
+        if not self.full_res_slots.acquire(blocking=False):
+            FULL_RES_UPLOADS.labels(status="dropped").inc()
+            return None
+        
+        key = (
+            f"{self.full_res_prefix}/{self.stream_id}/"
+            f"{timestamp.strftime('%Y%m%d_%H%M%S_%f')}_frame{self.frame_count}.jpg"
+        )
+        FULL_RES_UPLOADS_PENDING.inc()
+        self.full_res_executor.submit(self._upload_full_res, frame, key)
+        return key
+
+    def _encode_for_publish(
+        self, frame: np.ndarray
+    ) -> Tuple[np.ndarray, Optional[Tuple[float, float]], bytes]:
+        """Downscale and JPEG-encode a sampled frame; returns (sent frame, scale, JPEG)."""
+        start_time = time.perf_counter()
+        resized, scale = resize_to_long_edge(frame, self.resize_long_edge)
+        # The full-res copy goes to S3, not Kafka, so only this encode adapts
+        quality = self.quality_controller.quality if self.quality_controller else None
+        jpeg_bytes = self._encode_frame(resized, quality)
+        ENCODE_SECONDS.labels(stream_id=self.stream_id).observe(time.perf_counter() - start_time)
+        return resized, scale, jpeg_bytes
+
+    def _publish_frame(
+        self,
+        frame: np.ndarray,
+        timestamp: datetime,
+        encoded: Optional[Tuple[np.ndarray, Optional[Tuple[float, float]], bytes]] = None,
+    ) -> bool:
+        """
+        Publish a single frame to ALL configured Kafka topics; False if it was dropped.
+        
+        encoded is the frame's _encode_for_publish result when it was encoded
+        on the pool; otherwise the frame is encoded here.
+        """
         try:
-            # Encode frame once (shared across all topics)
-            frame_b64 = self._encode_frame(frame)
+            # Downscale before encoding; the original is kept for the full-res copy
+            # (encoded once, shared across all topics)
+            original = frame
+            frame, scale, jpeg_bytes = encoded or self._encode_for_publish(original)
+            full_res_key = (
+                self._submit_full_res(original, timestamp)
+                if scale and self.full_res_executor
+                else None
+            )
             
-            # Create message payload (same stream_id for all topics)
-            message = {
-                "stream_id": self.stream_id,
-                "frame_number": self.frame_count,
-                "timestamp": timestamp.isoformat(),
-                "width": frame.shape[1],
-                "height": frame.shape[0],
-                "frame_data": frame_b64,
-            }
+            FRAME_BYTES.labels(stream_id=self.stream_id).observe(len(jpeg_bytes))
             
-            # Serialize to JSON
-            payload = json.dumps(message).encode("utf-8")
+            # Build message payload (same stream_id for all topics)
+            payload, headers = self._build_message(
+                jpeg_bytes, frame, timestamp, original, scale, full_res_key
+            )
             
             # Publish to ALL Kafka topics
             for topic in self.kafka_topics:
@@ -174,104 +930,225 @@ class FrameProducer:
                     topic=topic,
                     key=self.stream_id.encode("utf-8"),
                     value=payload,
+                    headers=headers,
                     callback=self._delivery_callback,
                 )
             
             # Trigger any available delivery callbacks
             self.producer.poll(0)
             
+            if self.quality_controller:
+                self.quality_controller.record_frame(len(payload) * len(self.kafka_topics))
             self.frame_count += 1
+            self.fps_window_frames += 1
             
             if self.frame_count % 100 == 0:
                 logger.info(
                     "Frames published",
                     frame_count=self.frame_count,
+                    skipped_frames=self.skipped_count,
                     stream_id=self.stream_id,
                     topics=self.kafka_topics,
                 )
-                
+            return True
+            
+        except BufferError:
+            # librdkafka's local queue is full: drop the frame rather than block
+            # capture (topics produced to before the error keep their copy)
+            FRAMES_DROPPED.labels(stream_id=self.stream_id, reason="queue_full").inc()
+            logger.warning("Kafka queue full, frame dropped", stream_id=self.stream_id)
+            if self.quality_controller:
+                self.quality_controller.queue_full(time.monotonic())
+            self.producer.poll(0.1)
+            return False
         except KafkaException as e:
             logger.error("Failed to publish frame", error=str(e))
             raise
 
+    def _publish_sampled(
+        self,
+        frame: np.ndarray,
+        captured_at: float,
+        timestamp: datetime,
+        reason: str,
+        encoded: Optional[Tuple[np.ndarray, Optional[Tuple[float, float]], bytes]] = None,
+    ):
+        """Publish a frame that passed the motion gate and record it."""
+        if self._publish_frame(frame, timestamp, encoded):
+            FRAMES_PUBLISHED.labels(stream_id=self.stream_id, reason=reason).inc()
+            FRAME_AGE.labels(stream_id=self.stream_id).observe(time.monotonic() - captured_at)
+
+    def _submit_encode(self, frame: np.ndarray, captured_at: float, timestamp: datetime, reason: str):
+        """Queue a frame on the encode pool, waiting while the pool's backlog is full."""
+        self.encode_slots.acquire()
+        ENCODE_QUEUE.labels(stream_id=self.stream_id).inc()
+        future = self.encode_executor.submit(self._encode_for_publish, frame)
+        with self.encode_lock:
+            self.encode_pending.append((future, frame, captured_at, timestamp, reason))
+        future.add_done_callback(self._publish_encoded)
+
+    def _publish_encoded(self, _: Future):
+        """
+        Encode done-callback: publish every finished frame at the head of the
+        queue, so frames reach Kafka in submission order whichever worker
+        finishes first.
+        """
+        with self.encode_lock:
+            while self.encode_pending and self.encode_pending[0][0].done():
+                future, frame, captured_at, timestamp, reason = self.encode_pending.popleft()
+                try:
+                    self._publish_sampled(frame, captured_at, timestamp, reason, future.result())
+                except Exception as e:
+                    FRAMES_DROPPED.labels(stream_id=self.stream_id, reason="error").inc()
+                    logger.error("Failed to publish encoded frame", stream_id=self.stream_id, error=str(e))
+                finally:
+                    self.encode_slots.release()
+                    ENCODE_QUEUE.labels(stream_id=self.stream_id).dec()
+
     def start(self):
         """Start capturing and publishing frames."""
         self.running = True
-        self.producer = self._init_kafka_producer()
+        self.stop_event.clear()
+        self.capture_error = None
+        if self.producer is None:
+            self.producer = self._init_kafka_producer()
+        if self.full_res_bucket and self.resize_long_edge > 0 and self.full_res_executor is None:
+            self.s3_client = self._init_s3_client()
+            self.full_res_executor = ThreadPoolExecutor(
+                max_workers=FULL_RES_UPLOAD_WORKERS,
+                thread_name_prefix="full-res-upload",
+            )
+        if self.encode_workers > 1:
+            self.encode_executor = ThreadPoolExecutor(
+                max_workers=self.encode_workers,
+                thread_name_prefix=f"encode-{self.stream_id}",
+            )
         
         # Retry connection with backoff
-        max_retries = 5
-        retry_count = 0
-        
-        while retry_count < max_retries and self.running:
-            try:
-                self.cap = self._init_video_capture()
-                break
-            except RuntimeError as e:
-                retry_count += 1
-                wait_time = 2 ** retry_count
-                logger.warning(
-                    "Failed to connect to RTSP stream, retrying",
-                    error=str(e),
-                    retry_count=retry_count,
-                    wait_time=wait_time,
-                )
-                time.sleep(wait_time)
-        
-        if not self.cap or not self.cap.isOpened():
-            raise RuntimeError("Failed to connect to RTSP stream after retries")
+        self.cap = self._connect()
+        if not self.running:
+            self.stop()
+            return
         
         # Calculate frame interval
         frame_interval = 1.0 / self.frame_rate
-        last_frame_time = 0
+        last_gate_log_time = time.time()
+        gate_published = gate_skipped = 0
+        
+        self.frame_slot = LatestFrameSlot()
+        self.capture_thread = threading.Thread(
+            target=self._capture_loop,
+            name=f"capture-{self.stream_id}",
+            daemon=True,
+        )
+        self.capture_thread.start()
         
         logger.info(
-            "Starting frame capture loop",
+            "Starting frame publish loop",
+            stream_id=self.stream_id,
             frame_rate=self.frame_rate,
+            encode_workers=self.encode_workers,
             topics=self.kafka_topics,
         )
         
+        next_publish_time = time.monotonic()
         while self.running:
             try:
-                current_time = time.time()
+                # Sleep until the next publish slot (stop() cuts the wait short)
+                delay = next_publish_time - time.monotonic()
+                if delay > 0 and self.stop_event.wait(delay):
+                    break
                 
-                # Rate limiting
-                if current_time - last_frame_time < frame_interval:
-                    # Read and discard frames to keep buffer fresh
-                    self.cap.grab()
-                    continue
+                if self.quality_controller:
+                    queued_messages = len(self.producer)
+                    KAFKA_QUEUE.set(queued_messages)
+                    self.quality_controller.update(time.monotonic(), queued_messages)
+                    frame_interval = 1.0 / self.quality_controller.frame_rate
                 
-                ret, frame = self.cap.read()
+                # Schedule off the previous deadline so wake-up jitter does not
+                # accumulate; after a stall of over an interval, start afresh
+                # rather than bursting to catch up
+                next_publish_time += frame_interval
+                if next_publish_time < time.monotonic():
+                    next_publish_time = time.monotonic() + frame_interval
                 
-                if not ret:
-                    logger.warning("Failed to read frame, attempting reconnection")
-                    self.cap.release()
-                    time.sleep(1)
-                    self.cap = self._init_video_capture()
+                latest = self.frame_slot.take(timeout=frame_interval)
+                if latest is None:
+                    # Stream stalled or reconnecting
                     continue
                 
-                timestamp = datetime.utcnow()
-                self._publish_frame(frame, timestamp)
-                last_frame_time = current_time
+                frame, captured_at, timestamp = latest
+                current_time = time.time()
+                self._update_fps(current_time)
+                
+                reason = "ungated"
+                if self.motion_gate:
+                    publish, score, reason = self.motion_gate.check(frame, current_time)
+                    MOTION_SCORE.labels(stream_id=self.stream_id).observe(score)
+                    
+                    # Idle cameras publish rarely, so summarize the gate on a timer
+                    if current_time - last_gate_log_time >= 60:
+                        logger.info(
+                            "Motion gate summary",
+                            stream_id=self.stream_id,
+                            published=gate_published,
+                            skipped=gate_skipped,
+                            interval_seconds=round(current_time - last_gate_log_time),
+                        )
+                        last_gate_log_time = current_time
+                        gate_published = gate_skipped = 0
+                    
+                    if not publish:
+                        self.skipped_count += 1
+                        gate_skipped += 1
+                        FRAMES_SKIPPED.labels(stream_id=self.stream_id).inc()
+                        continue
+                    gate_published += 1
+                
+                if self.encode_executor:
+                    self._submit_encode(frame, captured_at, timestamp, reason)
+                else:
+                    self._publish_sampled(frame, captured_at, timestamp, reason)
                 
             except KeyboardInterrupt:
                 logger.info("Received interrupt, stopping")
                 break
             except Exception as e:
-                logger.error("Error in capture loop", error=str(e))
-                time.sleep(1)
+                FRAMES_DROPPED.labels(stream_id=self.stream_id, reason="error").inc()
+                logger.error("Error in capture loop", stream_id=self.stream_id, error=str(e))
+                self.stop_event.wait(1)
         
         self.stop()
+        if self.capture_error:
+            raise self.capture_error
 
     def stop(self):
-        """Stop the producer and cleanup resources."""
+        """Stop the producer and cleanup resources (shared ones are left to their owner)."""
         self.running = False
+        self.stop_event.set()
+        self.frame_slot.close()
+        STREAM_UP.labels(stream_id=self.stream_id).set(0)
         
-        if self.cap:
+        if self.capture_thread:
+            # The capture thread releases the capture when its loop exits; a
+            # read blocked on the stream returns at the next frame or timeout
+            self.capture_thread.join(timeout=10)
+            if self.capture_thread.is_alive():
+                logger.warning("Capture thread still reading, capture released when it returns", stream_id=self.stream_id)
+        elif self.cap:
             self.cap.release()
-            logger.info("Video capture released")
+            logger.info("Video capture released", stream_id=self.stream_id)
         
-        if self.producer:
+        if self.encode_executor:
+            # Frames on the pool are published by their done-callbacks
+            self.encode_executor.shutdown(wait=True)
+            self.encode_executor = None
+        
+        if self.full_res_executor and self.owns_full_res_executor:
+            # Messages already reference these keys, so let the uploads finish
+            self.full_res_executor.shutdown(wait=True)
+        
+        if self.producer and self.owns_producer:
             # Flush any remaining messages
             remaining = self.producer.flush(timeout=10)
             if remaining > 0:
@@ -281,11 +1158,210 @@ class FrameProducer:
         logger.info(
             "Producer stopped",
             total_frames=self.frame_count,
+            skipped_frames=self.skipped_count,
             stream_id=self.stream_id,
             topics=self.kafka_topics,
         )
 
 
+class MultiStreamProducer:
+    """
+    Publishes many RTSP streams from one process.
+    
+    Each stream runs a FrameProducer capture loop on its own thread, and all of
+    them share one Kafka producer (and one full-resolution upload pool), so a
+    process holds one set of broker connections instead of one per camera.
+    Streams connect and reconnect independently; the main thread serves
+    delivery callbacks until stopped.
+    """
+
+    def __init__(self, rtsp_urls: List[str], kafka_bootstrap: str, kafka_topics: List[str], **stream_options):
+        self.kafka_bootstrap = kafka_bootstrap
+        self.kafka_topics = kafka_topics
+        self.stream_options = stream_options
+        self.rtsp_urls = list(dict.fromkeys(rtsp_urls))
+        if len(self.rtsp_urls) < len(rtsp_urls):
+            logger.warning("Ignoring duplicate stream URLs", duplicates=len(rtsp_urls) - len(self.rtsp_urls))
+        
+        self.running = False
+        self.producer: Optional[Producer] = None
+        self.full_res_executor: Optional[ThreadPoolExecutor] = None
+        self.streams: List[FrameProducer] = []
+        self.threads: List[threading.Thread] = []
+
+    def _run_stream(self, stream: FrameProducer):
+        """Capture thread: run one stream, restarting it if its loop dies."""
+        while self.running:
+            try:
+                stream.start()
+            except Exception as e:
+                logger.error("Stream failed, restarting", stream_id=stream.stream_id, error=str(e))
+                stream.stop_event.wait(MAX_CONNECT_BACKOFF_SECONDS)
+
+    def start(self):
+        """Start a capture thread per stream and poll delivery callbacks until stopped."""
+        self.running = True
+        config = kafka_producer_config(
+            self.kafka_bootstrap, f"frame-producer-{socket.gethostname()}-{os.getpid()}"
+        )
+        logger.info("Initializing shared Kafka producer", config=config, streams=len(self.rtsp_urls))
+        self.producer = Producer(config)
+        
+        s3_client = None
+        options = self.stream_options
+        if options.get("full_res_bucket") and options.get("resize_long_edge", 0) > 0:
+            workers = min(32, FULL_RES_UPLOAD_WORKERS * len(self.rtsp_urls))
+            s3_client = boto3.client("s3", config=BotoConfig(
+                region_name=os.getenv("AWS_REGION", "us-east-1"),
+                retries={"max_attempts": 3, "mode": "adaptive"},
+                max_pool_connections=workers,
+            ))
+            self.full_res_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="full-res-upload")
+        
+        for rtsp_url in self.rtsp_urls:
+            stream = FrameProducer(
+                rtsp_url,
+                self.kafka_bootstrap,
+                self.kafka_topics,
+                connect_retries=None,
+                producer=self.producer,
+                s3_client=s3_client,
+                full_res_executor=self.full_res_executor,
+                **options,
+            )
+            thread = threading.Thread(
+                target=self._run_stream,
+                args=(stream,),
+                name=f"capture-{stream.stream_id}",
+                daemon=True,
+            )
+            self.streams.append(stream)
+            self.threads.append(thread)
+            thread.start()
+        
+        logger.info("Multi-stream producer started", streams=len(self.streams), topics=self.kafka_topics)
+        while self.running:
+            self.producer.poll(0.5)
+
+    def stop(self):
+        """Stop every stream, wait for the capture threads, then flush the shared producer."""
+        self.running = False
+        for stream in self.streams:
+            stream.running = False
+            stream.stop_event.set()
+        for thread in self.threads:
+            # A capture blocked in an RTSP read returns at the next frame or timeout
+            thread.join(timeout=10)
+        
+        if self.full_res_executor:
+            self.full_res_executor.shutdown(wait=True)
+        
+        if self.producer:
+            remaining = self.producer.flush(timeout=10)
+            if remaining > 0:
+                logger.warning("Some messages were not delivered", remaining=remaining)
+            logger.info("Kafka producer flushed")
+        
+        logger.info(
+            "Multi-stream producer stopped",
+            streams=len(self.streams),
+            total_frames=sum(stream.frame_count for stream in self.streams),
+            skipped_frames=sum(stream.skipped_count for stream in self.streams),
+        )
+
+
+def load_stream_urls(streams_file: str, rtsp_urls: str) -> List[str]:
+    """
+    RTSP URLs for multi-stream mode: one per line in streams_file (blank lines
+    and # comments ignored), plus the comma-separated rtsp_urls.
+    """
+    urls = []
+    if streams_file:
+        with open(streams_file) as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+                if line:
+                    urls.append(line)
+    urls.extend(url.strip() for url in rtsp_urls.split(",") if url.strip())
+    return urls
+
+
+def stream_options(args) -> dict:
+    """FrameProducer keyword arguments shared by every stream, from the parsed CLI."""
+    return {
+        "frame_rate": args.frame_rate,
+        "jpeg_quality": args.jpeg_quality,
+        "wire_format": args.wire_format,
+        "motion_gate": args.motion_gate,
+        "motion_threshold": args.motion_threshold,
+        "motion_heartbeat_seconds": args.motion_heartbeat_seconds,
+        "motion_hold_seconds": args.motion_hold_seconds,
+        "resize_long_edge": args.resize_long_edge,
+        "full_res_bucket": args.full_res_bucket,
+        "full_res_prefix": args.full_res_prefix,
+        "encode_workers": args.encode_workers,
+        "adaptive_quality": args.adaptive_quality,
+        "min_jpeg_quality": args.min_jpeg_quality,
+        "adaptive_frame_rate": args.adaptive_frame_rate,
+        "min_frame_rate": args.min_frame_rate,
+        "max_queued_messages": args.max_queued_messages,
+        "max_delivery_latency": args.max_delivery_latency,
+        "max_bytes_per_second": args.max_bytes_per_second,
+    }
+
+
+def run_streams(rtsp_urls: List[str], args, shard: int = 0):
+    """Run a MultiStreamProducer for rtsp_urls until SIGINT/SIGTERM (one shard process)."""
+    start_http_server(args.metrics_port + shard)
+    
+    producer = MultiStreamProducer(
+        rtsp_urls,
+        args.kafka_bootstrap,
+        parse_topics(args.kafka_topics),
+        **stream_options(args),
+    )
+    
+    def signal_handler(sig, frame):
+        logger.info("Shutdown signal received", shard=shard)
+        producer.running = False
+    
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+    
+    producer.start()
+    producer.stop()
+
+
+def run_sharded(rtsp_urls: List[str], args):
+    """Split streams round-robin over args.processes shard processes and wait for them."""
+    shards = [rtsp_urls[i::args.processes] for i in range(args.processes)]
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=run_streams, args=(urls, args, index), name=f"producer-shard-{index}")
+        for index, urls in enumerate(shards)
+        if urls
+    ]
+    for process in processes:
+        process.start()
+    logger.info(
+        "Producer shards started",
+        shards=len(processes),
+        streams=len(rtsp_urls),
+        metrics_ports=[args.metrics_port + index for index in range(len(processes))],
+    )
+    
+    def signal_handler(sig, frame):
+        logger.info("Shutdown signal received, stopping shards")
+        for process in processes:
+            process.terminate()
+    
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+    
+    for process in processes:
+        process.join()
+
+
 def parse_topics(topics_str: str) -> List[str]:
     """Parse comma-separated topics string into a list."""
     if not topics_str:
@@ -301,6 +1377,24 @@ def main():
         default=os.getenv("RTSP_URL", "rtsp://localhost:8554/stream"),
         help="RTSP stream URL",
     )
+    parser.add_argument(
+        "--streams-file",
+        type=str,
+        default=os.getenv("STREAMS_FILE", ""),
+        help="File with one RTSP URL per line (multi-stream mode)",
+    )
+    parser.add_argument(
+        "--rtsp-urls",
+        type=str,
+        default=os.getenv("RTSP_URLS", ""),
+        help="Comma-separated RTSP URLs (multi-stream mode)",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=int(os.getenv("PRODUCER_PROCESSES", "1")),
+        help="Multi-stream mode: shard streams across this many processes",
+    )
     parser.add_argument(
         "--kafka-bootstrap",
         type=str,
@@ -325,25 +1419,150 @@ def main():
         default=int(os.getenv("JPEG_QUALITY", "85")),
         help="JPEG encoding quality (0-100)",
     )
+    parser.add_argument(
+        "--wire-format",
+        type=str,
+        choices=WIRE_FORMATS,
+        default=os.getenv("WIRE_FORMAT", WIRE_FORMAT_JSON),
+        help="Kafka message format (binary requires consumers that understand it)",
+    )
+    parser.add_argument(
+        "--motion-gate",
+        type=str,
+        choices=MOTION_GATES,
+        default=os.getenv("MOTION_GATE", MOTION_GATE_OFF),
+        help="Skip frames without motion: frame difference (diff) or background subtraction (mog2)",
+    )
+    parser.add_argument(
+        "--motion-threshold",
+        type=float,
+        default=float(os.getenv("MOTION_THRESHOLD", "0.01")),
+        help="Share of changed pixels (0-1) needed to publish a frame",
+    )
+    parser.add_argument(
+        "--motion-heartbeat-seconds",
+        type=float,
+        default=float(os.getenv("MOTION_HEARTBEAT_SECONDS", "10")),
+        help="Publish at least one frame per interval even without motion",
+    )
+    parser.add_argument(
+        "--motion-hold-seconds",
+        type=float,
+        default=float(os.getenv("MOTION_HOLD_SECONDS", "2")),
+        help="Keep publishing every frame for this long after motion",
+    )
+    parser.add_argument(
+        "--resize-long-edge",
+        type=int,
+        default=int(os.getenv("RESIZE_LONG_EDGE", "0")),
+        help="Downscale frames to this long edge before encoding (0 = native resolution)",
+    )
+    parser.add_argument(
+        "--full-res-bucket",
+        type=str,
+        default=os.getenv("FULL_RES_S3_BUCKET", ""),
+        help="S3 bucket for native-resolution copies of resized frames (empty = none)",
+    )
+    parser.add_argument(
+        "--full-res-prefix",
+        type=str,
+        default=os.getenv("FULL_RES_S3_PREFIX", "full-res"),
+        help="S3 key prefix for native-resolution frames",
+    )
+    parser.add_argument(
+        "--encode-workers",
+        type=int,
+        default=int(os.getenv("ENCODE_WORKERS", "1")),
+        help="JPEG encode threads per stream (1 = encode on the publish thread)",
+    )
+    parser.add_argument(
+        "--adaptive-quality",
+        action="store_true",
+        default=os.getenv("ADAPTIVE_QUALITY", "false").lower() == "true",
+        help="Lower JPEG quality (--jpeg-quality is the ceiling) while Kafka is congested",
+    )
+    parser.add_argument(
+        "--min-jpeg-quality",
+        type=int,
+        default=int(os.getenv("MIN_JPEG_QUALITY", "40")),
+        help="Adaptive quality floor",
+    )
+    parser.add_argument(
+        "--adaptive-frame-rate",
+        action="store_true",
+        default=os.getenv("ADAPTIVE_FRAME_RATE", "false").lower() == "true",
+        help="Also lower the frame rate once quality is at its floor",
+    )
+    parser.add_argument(
+        "--min-frame-rate",
+        type=float,
+        default=float(os.getenv("MIN_FRAME_RATE", "2")),
+        help="Adaptive frame rate floor",
+    )
+    parser.add_argument(
+        "--max-queued-messages",
+        type=int,
+        default=int(os.getenv("MAX_QUEUED_MESSAGES", "500")),
+        help="Back off while librdkafka's outbound queue holds more messages than this",
+    )
+    parser.add_argument(
+        "--max-delivery-latency",
+        type=float,
+        default=float(os.getenv("MAX_DELIVERY_LATENCY_SECONDS", "1.0")),
+        help="Back off while p90 delivery latency (seconds) exceeds this",
+    )
+    parser.add_argument(
+        "--max-bytes-per-second",
+        type=int,
+        default=int(os.getenv("MAX_BYTES_PER_SECOND", "0")),
+        help="Per-stream budget for bytes sent to Kafka, all topics (0 = no budget)",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=int(os.getenv("METRICS_PORT", "9101")),
+        help="Prometheus metrics port (shard N of a multi-process run uses port + N)",
+    )
     
     args = parser.parse_args()
     
     # Parse topics from comma-separated string
     kafka_topics = parse_topics(args.kafka_topics)
     
+    rtsp_urls = load_stream_urls(args.streams_file, args.rtsp_urls)
+    if rtsp_urls:
+        logger.info(
+            "Starting multi-stream producer",
+            streams=len(rtsp_urls),
+            processes=args.processes,
+            kafka_bootstrap=args.kafka_bootstrap,
+            kafka_topics=kafka_topics,
+            wire_format=args.wire_format,
+        )
+        if args.processes > 1:
+            run_sharded(rtsp_urls, args)
+        else:
+            run_streams(rtsp_urls, args)
+        return
+    
     logger.info(
         "Starting producer with configuration",
         rtsp_url=args.rtsp_url,
         kafka_bootstrap=args.kafka_bootstrap,
         kafka_topics=kafka_topics,
+        wire_format=args.wire_format,
+        motion_gate=args.motion_gate,
+        resize_long_edge=args.resize_long_edge,
+        full_res_bucket=args.full_res_bucket or None,
     )
     
+    start_http_server(args.metrics_port)
+    
     producer = FrameProducer(
         rtsp_url=args.rtsp_url,
         kafka_bootstrap=args.kafka_bootstrap,
         kafka_topics=kafka_topics,
-        frame_rate=args.frame_rate,
-        jpeg_quality=args.jpeg_quality,
+        **stream_options(args),
     )
     
     # Handle graceful shutdown